@@ -10,6 +10,15 @@ class FilterResultCollection:
     Attributes
     ----------
     _filter_result_dict : dict
+    _filters : numpy.ndarray
+        the cached filters array, None until requested or after a change
+    _filter_results : numpy.ndarray
+        the cached filter results array, None until requested or after a
+        change
+    _listeners : list of (set, str)
+        the changed variables of every MatchResultCollection holding this
+        collection, with the variable it is held under; told of every
+        added filter result
 
     Methods
     -------
@@ -30,8 +39,14 @@ class FilterResultCollection:
     __contains__(filter)
     """
 
+    __slots__ = ("_filter_result_dict", "_filters", "_filter_results",
+                 "_listeners")
+
     def __init__(self):
         self._filter_result_dict = {}
+        self._filters = None
+        self._filter_results = None
+        self._listeners = []
 
     @property
     def filters(self):
@@ -43,7 +58,9 @@ class FilterResultCollection:
         numpy.ndarray(Filter)
             all filters in the collection
         """
-        return np.array(list(self._filter_result_dict.keys()))
+        if self._filters is None:
+            self._filters = np.array(list(self._filter_result_dict.keys()))
+        return self._filters
 
     @property
     def filter_results(self):
@@ -55,7 +72,10 @@ class FilterResultCollection:
         numpy.ndarray(FilterResult)
             all filter results in the collection
         """
-        return np.array(list(self._filter_result_dict.values()))
+        if self._filter_results is None:
+            self._filter_results = np.array(
+                list(self._filter_result_dict.values()))
+        return self._filter_results
 
     @property
     def size(self):
@@ -88,9 +108,36 @@ class FilterResultCollection:
         if isinstance(filter, Filter) and \
                 isinstance(filter_result, FilterResult):
             self._filter_result_dict[filter] = filter_result
+            self._filters = self._filter_results = None
+            for changed, variable in self._listeners:
+                changed.add(variable)
         else:
             raise ValueError("invalid input")
 
+    def _watch(self, changed, variable):
+        """
+        Add variable to changed whenever a filter result is added
+
+        Parameters
+        ----------
+        changed : set
+        variable : str
+        """
+        self._listeners.append((changed, variable))
+
+    def _unwatch(self, changed, variable):
+        """
+        Stop adding variable to changed
+
+        Parameters
+        ----------
+        changed : set
+        variable : str
+        """
+        self._listeners = [(listener, key) for listener, key
+                           in self._listeners
+                           if listener is not changed or key != variable]
+
     def get_filter_result(self, filter):
         """
         Get the corresponding FilterResult object of the filter
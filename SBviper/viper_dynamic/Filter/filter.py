@@ -1,3 +1,152 @@
+import functools
+import hashlib
+import inspect
+import threading
+import time
+import types
+
+import numpy as np
+
+
+def _code_identity(code):
+    """
+    Digest of the bytecode and constants of a code object
+
+    Parameters
+    ----------
+    code : types.CodeType
+
+    Returns
+    -------
+    str
+    """
+    digest = hashlib.blake2b(code.co_code, digest_size=8)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            # nested functions, whose repr holds an address
+            digest.update(_code_identity(constant).encode())
+        else:
+            digest.update(repr(constant).encode())
+    return digest.hexdigest()
+
+
+def _value_identity(value):
+    """
+    A representation of a value that is the same in every process
+
+    Parameters
+    ----------
+    value : object
+
+    Returns
+    -------
+    str:
+        the representation, None if the value has none, like the default
+        repr of an object which holds its address
+    """
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(),
+                                 digest_size=16)
+        return "array(%s, %s, %s)" % (value.dtype, value.shape,
+                                      digest.hexdigest())
+    if callable(value) and not isinstance(value, type):
+        return _callable_identity(value)
+    text = repr(value)
+    return None if " at 0x" in text else text
+
+
+def _accepts_tol(function):
+    """
+    Whether a filter function takes the tolerance as a tol argument
+
+    Parameters
+    ----------
+    function : Function
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        return "tol" in inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        # builtins without a signature
+        return False
+
+
+def _join(name, identities):
+    """
+    Format a name and the identities of its parts
+
+    Parameters
+    ----------
+    name : str
+    identities : list of (str, str)
+        (prefix, identity) pairs, the prefix is "" for positional parts
+
+    Returns
+    -------
+    str:
+        name(prefix identity, ...), None if an identity is None
+    """
+    if any(identity is None for _, identity in identities):
+        return None
+    return name + "(" + ", ".join(prefix + identity
+                                  for prefix, identity in identities) + ")"
+
+
+def _callable_identity(function):
+    """
+    A representation of a callable and of the parameters it carries
+    (partial arguments, defaults, closure variables, bound instance) that
+    is the same in every process
+
+    Parameters
+    ----------
+    function : Function
+
+    Returns
+    -------
+    str:
+        the representation, None if a part of the callable has no stable
+        representation
+    """
+    if isinstance(function, functools.partial):
+        return _join("partial", [("", _callable_identity(function.func))] +
+                     [("", _value_identity(argument))
+                      for argument in function.args] +
+                     [(name + "=", _value_identity(argument))
+                      for name, argument in sorted(function.keywords.items())])
+    if isinstance(function, types.MethodType):
+        return _join("method", [("", _callable_identity(function.__func__)),
+                                ("", _value_identity(function.__self__))])
+    name = getattr(function, "__qualname__", None)
+    if name is None:
+        # a callable object, identified by its class and its repr
+        state = repr(function)
+        if " at 0x" in state:
+            return None
+        return type(function).__module__ + "." + \
+            type(function).__qualname__ + ":" + state
+    name = str(getattr(function, "__module__", "")) + "." + name
+    code = getattr(function, "__code__", None)
+    if code is None:
+        # builtin and numpy functions
+        return name
+    identities = [("code=", _code_identity(code))]
+    identities += [("", _value_identity(default))
+                   for default in function.__defaults__ or ()]
+    identities += [(key + "=", _value_identity(default)) for key, default in
+                   sorted((function.__kwdefaults__ or {}).items())]
+    for cell in function.__closure__ or ():
+        try:
+            identities.append(("", _value_identity(cell.cell_contents)))
+        except ValueError:
+            # a variable of the enclosing scope not assigned yet
+            return None
+    return _join(name, identities)
+
+
 class Filter:
     """
     Representation of a filter for the TimeSeriesMatcher
@@ -21,6 +170,44 @@ class Filter:
         the tolerance value, the time series pair will be captured by
         the filter
 
+    _vectorized_function : Function
+        Optional kernel computing the scores of many time series pairs in
+        one call. It takes two (pairs x time points) arrays and returns
+        an array with one score per row pair
+        A pair is filtered if its score is below the tolerance, like the
+        frechet_distance filter
+
+    _score_function : Function
+        Optional function that takes in two TimeSeries and only returns
+        the score. When it is set, the filter applies _tol itself (a pair
+        is filtered if its score is below the tolerance), so one score can
+        be evaluated against any number of tolerances
+
+    _early_abandon : boolean
+        Whether _score_function takes the tolerance as a third argument
+        and may stop early, returning inf, once the score is known to be
+        at least the tolerance
+
+    _bound_function : Function
+        Optional function that takes in two TimeSeries and the tolerance
+        and returns a lower and an upper bound of the score, refined until
+        they are on the same side of the tolerance, so the verdict can be
+        decided without the exact score
+
+    _key : str
+        Optional name of the functions and their parameters, replacing
+        them in the identity of the filter
+
+    _calls : int
+        The number of time series pairs scored by this filter
+
+    _total_time : double
+        The time in seconds spent scoring those pairs
+
+    _lock : threading.Lock
+        Guards _calls and _total_time against the threads of the thread
+        backend recording their costs at once
+
     Methods
     -------
     get_tol()
@@ -40,22 +227,96 @@ class Filter:
     run_filter()
         Run the filter and return a boolean value representing whether
         the time series is captured by the filter or not
+
+    has_bounds()
+        Whether the filter can decide verdicts from bounds of the score
+
+    run_bounds(ts_a, ts_b)
+        Decide the verdict of a pair from bounds of its score
+
+    early_abandon()
+        Whether the scores are only exact below the tolerance
+
+    is_vectorized()
+        Whether the filter has a kernel for many time series pairs
+
+    run_vectorized(matrix_a, matrix_b)
+        Run the kernel on all row pairs of two arrays at once
+
+    mean_cost()
+        The measured mean time in seconds to score one pair
+
+    score(ts_a, ts_b)
+        Return the raw score of a time series pair
+
+    evaluate(scores, tols)
+        Apply one or many tolerances to an array of scores
+
+    name()
+        A readable name of the filter
+
+    identity()
+        A key identifying the functions and tolerance of this filter
+
+    clear_caches()
+        Drop the caches held by the functions of this filter
     """
 
-    def __init__(self, filter_function, tol):
+    def __init__(self, filter_function, tol, vectorized_function=None,
+                 score_function=None, early_abandon=False,
+                 bound_function=None, key=None):
         """
         Parameters
         ----------
         filter_function : Function
             a function that takes in two TimeSeries objects, or two array
             like objects and returns a value representing the similarity
-            of the two objects representing time series
+            of the two objects representing time series; if it has a tol
+            parameter, it is called with the tolerance of the filter
 
         tol : double
             a tolerance value for the filter function
+
+        vectorized_function : Function
+            optional kernel that takes two (pairs x time points) arrays and
+            returns one score per row pair, scoring like filter_function
+
+        score_function : Function
+            optional function that takes in two TimeSeries objects and
+            returns only the score; if given, it is used instead of
+            filter_function and the verdict is score < tol
+
+        early_abandon : boolean
+            if True, score_function is called as score_function(ts_a, ts_b,
+            tol) and may return inf as soon as the score is known to be at
+            least tol; scores are then only exact below tol
+
+        bound_function : Function
+            optional function that takes in two TimeSeries objects and tol
+            and returns (lower, upper) bounds of the score such that
+            lower >= tol or upper < tol
+
+        key : str
+            optional name of the functions and their parameters, used
+            instead of them in the identity of the filter; needed for the
+            score cache and incremental runs when a function carries state
+            without a stable repr, and must change with that state
         """
+        if filter_function is None and score_function is None:
+            raise ValueError("A filter needs a filter_function or a "
+                             "score_function")
         self._filter_function = filter_function
+        self._passes_tol = _accepts_tol(filter_function)
         self._tol = tol
+        self._vectorized_function = vectorized_function
+        self._score_function = score_function
+        self._early_abandon = early_abandon
+        self._bound_function = bound_function
+        self._key = key
+        self._identity = None
+        self._calls = 0
+        self._total_time = 0.0
+        self._lock = threading.Lock()
 
     def get_tol(self):
         """
@@ -89,6 +350,7 @@ class Filter:
         """
         res = self._tol
         self._tol = new_tol
+        self._identity = None
         return res
 
     def set_filter_function(self, new_filter_function):
@@ -105,6 +367,8 @@ class Filter:
         """
         res = self._filter_function
         self._filter_function = new_filter_function
+        self._passes_tol = _accepts_tol(new_filter_function)
+        self._identity = None
         return res
 
     def run_filter(self, ts_a, ts_b):
@@ -122,4 +386,255 @@ class Filter:
             true if and only if the time series is captured by
             the filter
         """
-        return self._filter_function(ts_a, ts_b)
+        start = time.perf_counter()
+        if self._score_function is not None and self._early_abandon:
+            score = self._score_function(ts_a, ts_b, self._tol)
+            result = (score, self._tol, bool(score < self._tol))
+        elif self._score_function is not None:
+            score = self._score_function(ts_a, ts_b)
+            result = (score, self._tol, bool(score < self._tol))
+        elif self._passes_tol:
+            result = self._filter_function(ts_a, ts_b, tol=self._tol)
+        else:
+            result = self._filter_function(ts_a, ts_b)
+        self._record_cost(time.perf_counter() - start, 1)
+        return result
+
+    def score(self, ts_a, ts_b):
+        """
+        Parameters
+        ----------
+        ts_a : TimeSeries / array like
+        ts_b : TimeSeries / array like
+
+        Returns
+        -------
+        double
+            the raw score of the pair, independent of the tolerance
+        """
+        return self.run_filter(ts_a, ts_b)[0]
+
+    def evaluate(self, scores, tols=None):
+        """
+        Apply one or many tolerances to an array of scores, a score being
+        captured by the filter if it is below the tolerance
+
+        Parameters
+        ----------
+        scores : array like
+            the scores of the pairs
+        tols : array like
+            the tolerances to apply, the tolerance of the filter if None
+
+        Returns
+        -------
+        numpy.ndarray(boolean)
+            if tols is an array, a (tolerances x pairs) array of verdicts,
+            otherwise one verdict per pair
+        """
+        scores = np.asarray(scores, dtype=float)
+        if tols is None:
+            return scores < self._tol
+        tols = np.asarray(tols, dtype=float)
+        return scores[np.newaxis, ...] < tols.reshape(tols.shape + (1,) *
+                                                       scores.ndim)
+
+    @property
+    def has_bounds(self):
+        """
+        Returns
+        -------
+        boolean
+            true if and only if the filter can decide verdicts from bounds
+        """
+        return self._bound_function is not None
+
+    def run_bounds(self, ts_a, ts_b):
+        """
+        Decide whether a time series pair is captured by the filter from
+        bounds of its score
+
+        Parameters
+        ----------
+        ts_a : TimeSeries
+        ts_b : TimeSeries
+
+        Raises
+        ------
+        ValueError:
+            if the filter has no bound function
+
+        Returns
+        -------
+        double
+            the upper bound of the score if the pair is captured, the
+            lower bound otherwise; exact when both bounds meet
+        double
+            the tolerance of the filter
+        boolean
+            true if and only if the pair is captured by the filter, the
+            same verdict as run_filter
+        """
+        if self._bound_function is None:
+            raise ValueError("This filter has no bound function")
+        start = time.perf_counter()
+        lower, upper = self._bound_function(ts_a, ts_b, self._tol)
+        self._record_cost(time.perf_counter() - start, 1)
+        if upper < self._tol:
+            return upper, self._tol, True
+        return lower, self._tol, False
+
+    @property
+    def early_abandon(self):
+        """
+        Returns
+        -------
+        boolean
+            true if and only if the scores of the filter are only exact
+            below its tolerance
+        """
+        return self._early_abandon
+
+    @property
+    def is_vectorized(self):
+        """
+        Returns
+        -------
+        boolean
+            true if and only if the filter has a vectorized kernel
+        """
+        return self._vectorized_function is not None
+
+    def run_vectorized(self, matrix_a, matrix_b):
+        """
+        Run the vectorized kernel on every row pair of two arrays
+
+        Parameters
+        ----------
+        matrix_a : numpy.ndarray
+            a (pairs x time points) array
+        matrix_b : numpy.ndarray
+            a (pairs x time points) array
+
+        Raises
+        ------
+        ValueError:
+            if the filter has no vectorized kernel
+
+        Returns
+        -------
+        numpy.ndarray(double)
+            the score of every pair
+        numpy.ndarray(boolean)
+            for every pair, true if and only if it is captured by the
+            filter
+        """
+        if self._vectorized_function is None:
+            raise ValueError("This filter has no vectorized kernel")
+        start = time.perf_counter()
+        scores = np.asarray(self._vectorized_function(matrix_a, matrix_b))
+        self._record_cost(time.perf_counter() - start, scores.shape[0])
+        return scores, scores < self._tol
+
+    @property
+    def name(self):
+        """
+        Returns
+        -------
+        str
+            the qualified name of the function computing the scores
+        """
+        for function in (self._score_function, self._filter_function,
+                         self._vectorized_function):
+            if function is not None:
+                return getattr(function, "__qualname__",
+                               type(function).__qualname__)
+        return type(self).__qualname__
+
+    @property
+    def identity(self):
+        """
+        Returns
+        -------
+        str
+            a key made of the filter functions, the parameters they carry
+            (partial arguments, defaults, closure variables) and the
+            tolerance, or of the explicit key of the filter; two filters
+            with the same identity produce the same results on the same
+            time series. None if a function has no representation that is
+            the same in every process, its outputs are then neither cached
+            nor reused
+            Computed once, so state changed inside the functions afterwards
+            is not seen; set_tol and set_filter_function reset it
+        """
+        if self._identity is None:
+            self._identity = (self._compute_identity(),)
+        return self._identity[0]
+
+    def _compute_identity(self):
+        if self._key is not None:
+            parts = ["key=" + self._key]
+        else:
+            try:
+                parts = [_callable_identity(function)
+                         if function is not None else "None"
+                         for function in (self._filter_function,
+                                          self._vectorized_function,
+                                          self._score_function,
+                                          self._bound_function)]
+            except RecursionError:
+                # a function capturing itself
+                return None
+            if None in parts:
+                return None
+        if self._early_abandon:
+            parts.append("early_abandon")
+        return "|".join(parts + [repr(self._tol)])
+
+    def clear_caches(self):
+        """
+        Drop the caches held by the functions of this filter, those with a
+        clear_cache method like LowerBoundCascade
+        """
+        for function in (self._filter_function, self._vectorized_function,
+                         self._score_function, self._bound_function):
+            clear_cache = getattr(function, "clear_cache", None)
+            if callable(clear_cache):
+                clear_cache()
+
+    def _record_cost(self, seconds, pairs):
+        """
+        Parameters
+        ----------
+        seconds : double
+            the time spent scoring
+        pairs : int
+            the number of pairs scored in that time
+        """
+        with self._lock:
+            self._calls += pairs
+            self._total_time += seconds
+
+    def __getstate__(self):
+        # locks cannot be pickled, the process backend copies the filters
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def mean_cost(self):
+        """
+        Returns
+        -------
+        double
+            the measured mean time in seconds to score one pair, including
+            the pairs scored by the process backend, 0 if the filter has
+            not run yet
+        """
+        if self._calls == 0:
+            return 0.0
+        return self._total_time / self._calls
@@ -7,6 +7,7 @@ class FilterResult:
     _score : double
     _tol : double
     _filtered_or_not() : boolean
+    _skipped : boolean
 
     Methods
     -------
@@ -16,21 +17,30 @@ class FilterResult:
         Get the tolerance of this filter result
     filtered_or_not()
         Get whether this ts pair has been filtered or not, from this filter
+    skipped()
+        Get whether this filter was skipped because the verdict was
+        already decided by another filter
     """
 
-    def __init__(self, score, tol, filtered_or_not):
+    __slots__ = ("_score", "_tol", "_filtered_or_not", "_skipped")
+
+    def __init__(self, score, tol, filtered_or_not, skipped=False):
         """
         Parameters
         ----------
         score : double
-            the score for this filter result
+            the score for this filter result, None if skipped
         tol : double
             the tolerance for this filter result
         filtered_or_not : boolean
+            None if skipped
+        skipped : boolean
+            true if the filter did not run on this ts pair
         """
         self._score = score
         self._tol = tol
         self._filtered_or_not = filtered_or_not
+        self._skipped = skipped
 
     @property
     def score(self):
@@ -68,3 +78,15 @@ class FilterResult:
         """
         return self._filtered_or_not
 
+    @property
+    def skipped(self):
+        """
+        Get whether this filter was skipped for the ts pair
+
+        Returns
+        -------
+        boolean:
+            true if the filter did not run because another filter had
+            already filtered the ts pair
+        """
+        return self._skipped
@@ -0,0 +1,188 @@
+import hashlib
+import sqlite3
+import time
+
+# the maximum number of keys per SQL query
+_BATCH_SIZE = 500
+
+
+class ScoreCache:
+    """
+    Persistent cache of filter outputs, stored in a SQLite database
+    An output is keyed by the fingerprints of both time series and the
+    identity of the filter (its functions and tolerance), and entries are
+    evicted in least recently used order
+
+    Attributes
+    ----------
+    _connection : sqlite3.Connection
+    _max_entries : int
+        the maximum number of entries kept in the database
+    _hits : int
+        the number of lookups that found an entry
+    _misses : int
+        the number of lookups that did not find an entry
+
+    Methods
+    -------
+    make_key(ts_a, ts_b, ts_filter)
+        Compute the key of a filter output
+    get_many(keys)
+        Get the cached filter outputs of many keys
+    put_many(items)
+        Store many filter outputs
+    hits()
+        Get the number of lookups that found an entry
+    misses()
+        Get the number of lookups that did not find an entry
+    clear()
+        Remove every entry
+    close()
+        Close the database
+    __len__()
+    """
+
+    def __init__(self, path, max_entries=1000000):
+        """
+        Parameters
+        ----------
+        path : str
+            the path to the database file, created if needed
+        max_entries : int
+            the maximum number of entries kept in the database
+        """
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, "
+            "score REAL, tol REAL, result INTEGER, last_used REAL)")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS scores_last_used "
+            "ON scores (last_used)")
+        self._connection.commit()
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(ts_a, ts_b, ts_filter):
+        """
+        Compute the key of a filter output
+
+        Parameters
+        ----------
+        ts_a : TimeSeries
+        ts_b : TimeSeries
+        ts_filter : Filter
+
+        Returns
+        -------
+        str:
+            a hex digest identifying the output of ts_filter on the pair,
+            None if the filter has no stable identity
+        """
+        if ts_filter.identity is None:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (ts_a.fingerprint, ts_b.fingerprint, ts_filter.identity):
+            digest.update(part.encode())
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    @property
+    def hits(self):
+        """
+        Get the number of lookups that found an entry
+
+        Returns
+        -------
+        int:
+            the number of cache hits
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Get the number of lookups that did not find an entry
+
+        Returns
+        -------
+        int:
+            the number of cache misses
+        """
+        return self._misses
+
+    def get_many(self, keys):
+        """
+        Get the cached filter outputs of many keys
+
+        Parameters
+        ----------
+        keys : list of str
+            keys from make_key, None keys are never found
+
+        Returns
+        -------
+        list of (double, double, boolean):
+            the (score, tol, result) of every key, None if not found
+        """
+        found = {}
+        keys_given = keys
+        keys = [key for key in keys if key is not None]
+        for start in range(0, len(keys), _BATCH_SIZE):
+            batch = keys[start:start + _BATCH_SIZE]
+            rows = self._connection.execute(
+                "SELECT key, score, tol, result FROM scores WHERE key IN (" +
+                ",".join("?" * len(batch)) + ")", batch).fetchall()
+            for key, score, tol, result in rows:
+                found[key] = (score, tol, bool(result))
+        if found:
+            now = time.time()
+            self._connection.executemany(
+                "UPDATE scores SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found])
+            self._connection.commit()
+        self._hits += len(found)
+        self._misses += len(keys) - len(found)
+        return [found.get(key) for key in keys_given]
+
+    def put_many(self, items):
+        """
+        Store many filter outputs, then evict the least recently used
+        entries beyond max_entries
+
+        Parameters
+        ----------
+        items : list of (str, (double, double, boolean))
+            pairs of a key from make_key and the (score, tol, result) of
+            the filter; items with a None key are not stored
+        """
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+            [(key, float(score), float(tol), int(bool(result)), now)
+             for key, (score, tol, result) in items if key is not None])
+        excess = len(self) - self._max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores "
+                "ORDER BY last_used LIMIT ?)", (excess,))
+        self._connection.commit()
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+        self._connection.execute("DELETE FROM scores")
+        self._connection.commit()
+
+    def close(self):
+        """
+        Close the database
+        """
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM scores").fetchone()[0]
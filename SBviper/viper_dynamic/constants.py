@@ -1,7 +1,47 @@
 from SBviper.viper_helpers.wrappers.frechet_distance_wrapper import \
     frechet_distance_wrapper
+from SBviper.viper_helpers.matching.frechet_distance import \
+    discrete_frechet_distance, frechet_distance, frechet_distance_rows
+from SBviper.viper_helpers.matching.derivative_dtw import \
+    derivative_dtw_distance
+from SBviper.viper_helpers.matching.lower_bounds import LowerBoundCascade
+from SBviper.viper_helpers.matching.pointwise_distance import \
+    linf_bounds, linf_distance, l1_distance, l2_distance, rmse, \
+    relative_error
 from SBviper.viper_dynamic.Filter.filter import Filter
 
-frechet_distance_filter = Filter(frechet_distance_wrapper, 0.5)
+frechet_distance_filter = Filter(frechet_distance_wrapper, 0.5,
+                                 frechet_distance_rows, frechet_distance,
+                                 bound_function=linf_bounds)
 
-str_to_function = {"frechet_distance": frechet_distance_filter}
+# stops once the distance reaches the tolerance
+discrete_frechet_filter = Filter(None, 0.5,
+                                 score_function=discrete_frechet_distance,
+                                 early_abandon=True)
+derivative_dtw_filter = Filter(None, 0.5,
+                               score_function=derivative_dtw_distance,
+                               early_abandon=True)
+# the same verdicts as derivative_dtw, deciding most pairs on bounds
+# shared by every matcher: its envelope cache is bounded in bytes and
+# cleared at the end of every run
+derivative_dtw_cascade_filter = Filter(None, 0.5,
+                                       score_function=LowerBoundCascade(),
+                                       early_abandon=True)
+
+# the pointwise kernels score single pairs and whole collections alike
+linf_distance_filter = Filter(None, 0.5, linf_distance, linf_distance,
+                              bound_function=linf_bounds)
+l1_distance_filter = Filter(None, 0.5, l1_distance, l1_distance)
+l2_distance_filter = Filter(None, 0.5, l2_distance, l2_distance)
+rmse_filter = Filter(None, 0.5, rmse, rmse)
+relative_error_filter = Filter(None, 0.05, relative_error, relative_error)
+
+str_to_function = {"frechet_distance": frechet_distance_filter,
+                   "discrete_frechet_distance": discrete_frechet_filter,
+                   "derivative_dtw": derivative_dtw_filter,
+                   "derivative_dtw_cascade": derivative_dtw_cascade_filter,
+                   "linf_distance": linf_distance_filter,
+                   "l1_distance": l1_distance_filter,
+                   "l2_distance": l2_distance_filter,
+                   "rmse": rmse_filter,
+                   "relative_error": relative_error_filter}
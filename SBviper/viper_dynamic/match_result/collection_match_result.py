@@ -2,15 +2,75 @@ import numpy as np
 
 from SBviper.viper_dynamic.match_result.match_result import MatchResult
 
+# codes of the verdicts array
+VERDICT_NOT_FILTERED = 0
+VERDICT_FILTERED = 1
+VERDICT_SKIPPED = -1
+VERDICT_MISSING = -2
+
+# number of rows allocated for the first match results
+INITIAL_CAPACITY = 16
+
+
+def _as_float(value):
+    """
+    Convert a score or tolerance for the arrays
+
+    Parameters
+    ----------
+    value : object
+
+    Returns
+    -------
+    double:
+        value as a float, NaN if it is not a number
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
 
 class MatchResultCollection:
     """
     Representation of a collection of match results from time series matcher
 
+    Besides the added MatchResult objects, the filter results are copied
+    column by column into (variable x filter) arrays of scores, tolerances
+    and verdicts, 17 bytes per (variable, filter): the used rows of a
+    collection of 10k variables and 10 filters take under 2 MB, the spare
+    rows kept for further additions at most as much again. The collection
+    can be sorted or queried on these arrays without touching the
+    MatchResult objects.
+    Filter results added to a MatchResult after it was added to the
+    collection are copied into the arrays on their next access. Scores
+    that are not numbers are NaN in the arrays; the MatchResult objects
+    keep them as they are.
+
     Attributes
     -------
-    _match_result_dict : dict
-        dictionary of variable_str to the corresponding MatchResult object
+    _index : dict
+        variable_str to its row in the arrays
+    _variable_list : list of str
+        the variables, by row
+    _match_result_list : list of MatchResult
+        the added MatchResult objects, by row
+    _changed : set
+        the variables whose MatchResult got new filter results since its
+        row was copied
+    _filter_list : list of Filter
+        the filters, by column
+    _filter_index : dict
+        Filter to its column in the arrays
+    _scores : numpy.ndarray
+        the score of every (variable, filter), NaN if skipped or missing;
+        allocated with spare rows, only the first size rows are used
+    _tols : numpy.ndarray
+        the tolerance of every (variable, filter), NaN if missing
+    _verdicts : numpy.ndarray
+        the VERDICT_* code of every (variable, filter), as int8
+    _cache : dict
+        the arrays built by the properties since the last change
 
     Methods
     -------
@@ -18,12 +78,32 @@ class MatchResultCollection:
         Return an array of all variables in the collection
     match_results()
         Return an array of all MatchResult objects in the collection
+    filters()
+        Return an array of the filters of the score columns
+    scores()
+        Return the (variable x filter) array of scores
+    tols()
+        Return the (variable x filter) array of tolerances
+    verdicts()
+        Return the (variable x filter) array of verdict codes
+    filtered_mask()
+        Return whether a filter captured every variable
     size()
         Return the number of (variable, MatchResult) pairs in the collection
+    nbytes()
+        Return the number of bytes of the used rows of the arrays
+    capacity_nbytes()
+        Return the number of bytes allocated for the arrays
+    query()
+        Get a MatchResultQuery over this collection
     add_match_result(variable, match_result)
         Add a new MatchResult object of a variable to this MatchResultCollection
     get_match_result(variable)
         Get the corresponding MatchResult object of the variable
+    row(variable)
+        Get the row of a variable in the arrays
+    column(filter)
+        Get the column of a filter in the arrays
     __len__()
         Return the number of MatchResult objects in this collection
     __setitem__(variable, march_result)
@@ -32,7 +112,38 @@ class MatchResultCollection:
     """
 
     def __init__(self):
-        self._match_result_dict = {}
+        self._index = {}
+        self._variable_list = []
+        self._match_result_list = []
+        self._changed = set()
+        self._filter_list = []
+        self._filter_index = {}
+        self._scores = np.empty((0, 0))
+        self._tols = np.empty((0, 0))
+        self._verdicts = np.empty((0, 0), dtype=np.int8)
+        self._cache = {}
+
+    def _cached(self, name, build):
+        """
+        Get a derived array, building it once per change of the collection
+        The rows of changed MatchResult objects are copied first
+
+        Parameters
+        ----------
+        name : str
+        build : Function
+            builds the array
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if self._changed:
+            self._copy_changed()
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = build()
+        return value
 
     @property
     def variables(self):
@@ -44,7 +155,8 @@ class MatchResultCollection:
         numpy.ndarray(str):
             all variables in the collection
         """
-        return np.array(list(self._match_result_dict.keys()))
+        return self._cached("variables",
+                            lambda: np.array(self._variable_list))
 
     @property
     def match_results(self):
@@ -56,7 +168,79 @@ class MatchResultCollection:
         numpy.ndarray:
             all MatchResult in the collection
         """
-        return np.array(list(self._match_result_dict.values()))
+        def build():
+            match_results = np.empty(self.size, dtype=object)
+            match_results[:] = self._match_result_list
+            return match_results
+        return self._cached("match_results", build)
+
+    @property
+    def filters(self):
+        """
+        Return an array of the filters of the score columns
+
+        Returns
+        -------
+        numpy.ndarray(Filter):
+            the filter of every column, in the order they were first seen
+        """
+        def build():
+            filters = np.empty(len(self._filter_list), dtype=object)
+            filters[:] = self._filter_list
+            return filters
+        return self._cached("filters", build)
+
+    @property
+    def scores(self):
+        """
+        Return the (variable x filter) array of scores
+
+        Returns
+        -------
+        numpy.ndarray:
+            the scores, NaN where the filter was skipped or did not run; a
+            read only view, valid until the next change
+        """
+        return self._cached("scores", lambda: self._view(self._scores))
+
+    @property
+    def tols(self):
+        """
+        Return the (variable x filter) array of tolerances
+
+        Returns
+        -------
+        numpy.ndarray:
+            the tolerances, NaN where the filter did not run; a read only
+            view
+        """
+        return self._cached("tols", lambda: self._view(self._tols))
+
+    @property
+    def verdicts(self):
+        """
+        Return the (variable x filter) array of verdict codes
+
+        Returns
+        -------
+        numpy.ndarray(int8):
+            VERDICT_FILTERED, VERDICT_NOT_FILTERED, VERDICT_SKIPPED or
+            VERDICT_MISSING for every (variable, filter); a read only view
+        """
+        return self._cached("verdicts", lambda: self._view(self._verdicts))
+
+    @property
+    def filtered_mask(self):
+        """
+        Return whether a filter captured every variable
+
+        Returns
+        -------
+        numpy.ndarray(bool):
+            MatchResult.filtered of every row
+        """
+        return self._cached("filtered_mask", lambda: np.any(
+            self.verdicts == VERDICT_FILTERED, axis=1))
 
     @property
     def size(self):
@@ -68,11 +252,150 @@ class MatchResultCollection:
         int:
             the number of (variable, MatchResult) paris in the collection
         """
-        return len(self._match_result_dict)
+        return len(self._variable_list)
+
+    @property
+    def nbytes(self):
+        """
+        Return the number of bytes of the used rows of the score, tol and
+        verdict arrays
+
+        Returns
+        -------
+        int:
+            the bytes of the first size rows, the spare rows left out
+        """
+        return self.scores.nbytes + self.tols.nbytes + self.verdicts.nbytes
+
+    @property
+    def capacity_nbytes(self):
+        """
+        Return the number of bytes allocated for the score, tol and verdict
+        arrays
+
+        Returns
+        -------
+        int:
+            the allocated bytes, including the spare rows
+        """
+        if self._changed:
+            self._copy_changed()
+        return self._scores.nbytes + self._tols.nbytes + self._verdicts.nbytes
+
+    @property
+    def query(self):
+        """
+        Get a MatchResultQuery over this collection, for top-k, range and
+        verdict queries; its sorted indices are kept until the next change
+
+        Returns
+        -------
+        MatchResultQuery
+        """
+        # query imports the verdict codes of this module
+        from SBviper.viper_dynamic.match_result.query import MatchResultQuery
+        return self._cached("query", lambda: MatchResultQuery(self))
+
+    def _view(self, array):
+        """
+        Get the used rows of an array, read only
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        view = array[:self.size]
+        view.flags.writeable = False
+        return view
+
+    def _reserve(self, rows, columns):
+        """
+        Grow the arrays to hold at least rows x columns, doubling the rows
+        so that adding n match results costs amortized O(n)
+
+        Parameters
+        ----------
+        rows : int
+        columns : int
+        """
+        capacity, width = self._scores.shape
+        if rows <= capacity and columns <= width:
+            return
+        if rows > capacity:
+            capacity = max(rows, 2 * capacity, INITIAL_CAPACITY)
+        width = max(columns, width)
+        used = self.size
+        old_width = self._scores.shape[1]
+        for name, fill, dtype in (("_scores", np.nan, float),
+                                  ("_tols", np.nan, float),
+                                  ("_verdicts", VERDICT_MISSING, np.int8)):
+            array = np.full((capacity, width), fill, dtype=dtype)
+            array[:used, :old_width] = getattr(self, name)[:used]
+            setattr(self, name, array)
+
+    def _column(self, filter):
+        """
+        Get the column of a filter, adding one if it is new
+
+        Parameters
+        ----------
+        filter : Filter
+
+        Returns
+        -------
+        int
+        """
+        column = self._filter_index.get(filter)
+        if column is None:
+            column = self._filter_index[filter] = len(self._filter_list)
+            self._filter_list.append(filter)
+        return column
+
+    def _copy_row(self, row, match_result):
+        """
+        Copy the filter results of a MatchResult into a row of the arrays
+
+        Parameters
+        ----------
+        row : int
+        match_result : MatchResult
+        """
+        filter_results = match_result.filter_results
+        columns = [self._column(filter) for filter in filter_results.filters]
+        self._reserve(self.size, len(self._filter_list))
+        self._scores[row] = np.nan
+        self._tols[row] = np.nan
+        self._verdicts[row] = VERDICT_MISSING
+        for column, filter_result in zip(columns,
+                                         filter_results.filter_results):
+            self._tols[row, column] = _as_float(filter_result.tol)
+            if filter_result.skipped:
+                self._verdicts[row, column] = VERDICT_SKIPPED
+            else:
+                self._scores[row, column] = _as_float(filter_result.score)
+                self._verdicts[row, column] = VERDICT_FILTERED \
+                    if filter_result.filtered_or_not else VERDICT_NOT_FILTERED
+
+    def _copy_changed(self):
+        """
+        Copy the rows of the MatchResult objects that got new filter results
+        since they were added
+        """
+        for variable in self._changed:
+            row = self._index[variable]
+            self._copy_row(row, self._match_result_list[row])
+        self._changed.clear()
+        self._cache.clear()
 
     def add_match_result(self, variable, match_result):
         """
         Add a new MatchResult object of a variable to this MatchResultCollection
+        The MatchResult is kept as it is and its filter results are copied
+        into the arrays; adding the result of a variable again replaces it
 
         Parameters
         ----------
@@ -86,10 +409,23 @@ class MatchResultCollection:
         ValueError:
             if the input is not a valid TimeSeries object
         """
-        if isinstance(match_result, MatchResult):
-            self._match_result_dict[variable] = match_result
-        else:
+        if not isinstance(match_result, MatchResult):
             raise ValueError("Input must be a valid TimeSeries object")
+        row = self._index.get(variable)
+        if row is None:
+            row = self.size
+            self._reserve(row + 1, len(self._filter_list))
+            self._index[variable] = row
+            self._variable_list.append(variable)
+            self._match_result_list.append(match_result)
+        else:
+            self._match_result_list[row].filter_results._unwatch(
+                self._changed, variable)
+            self._match_result_list[row] = match_result
+            self._changed.discard(variable)
+        match_result.filter_results._watch(self._changed, variable)
+        self._copy_row(row, match_result)
+        self._cache.clear()
 
     def get_match_result(self, variable):
         """
@@ -103,12 +439,44 @@ class MatchResultCollection:
         Returns
         -------
         MatchResult:
-            the corresponding MatchResult, None if not found
+            the MatchResult added for variable, None if not found
         """
-        try:
-            return self._match_result_dict[variable]
-        except KeyError:
+        row = self._index.get(variable)
+        if row is None:
             return None
+        return self._match_result_list[row]
+
+    def row(self, variable):
+        """
+        Get the row of a variable in the arrays
+
+        Parameters
+        ----------
+        variable : str
+
+        Returns
+        -------
+        int:
+            the row, None if the variable is not in the collection
+        """
+        return self._index.get(variable)
+
+    def column(self, filter):
+        """
+        Get the column of a filter in the arrays
+
+        Parameters
+        ----------
+        filter : Filter
+
+        Returns
+        -------
+        int:
+            the column, None if no match result has a result of filter
+        """
+        if self._changed:
+            self._copy_changed()
+        return self._filter_index.get(filter)
 
     def __len__(self):
         return self.size
@@ -120,4 +488,4 @@ class MatchResultCollection:
         return self.get_match_result(variable)
 
     def __contains__(self, variable):
-        return variable in self._match_result_dict
+        return variable in self._index
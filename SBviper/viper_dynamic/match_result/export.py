@@ -0,0 +1,394 @@
+"""
+Streaming export of match results to CSV, JSON Lines and Parquet
+
+Every writer takes one match result at a time and writes one row per
+(variable, filter), so it can be given as the callback of
+TimeSeriesMatcher.run or iter_run and write results as they are produced
+with constant memory. A variable without filter results, because it only
+exists in one model, is written as a single row without a filter.
+"""
+
+import csv
+import json
+import math
+
+import numpy as np
+
+FIELDS = ("variable", "filter", "score", "tol", "verdict")
+TRAJECTORY_FIELDS = ("original_time", "original_values", "revised_time",
+                     "revised_values")
+
+
+def downsample(time_series, points):
+    """
+    Keep evenly spaced time points of a time series, always including the
+    first and the last
+
+    Parameters
+    ----------
+    time_series : TimeSeries
+        None if the variable does not exist in that model
+    points : int
+        the maximum number of time points kept
+
+    Returns
+    -------
+    list of double:
+        the kept time points, None if time_series is None
+    list of double:
+        the kept values, None if time_series is None
+    """
+    if time_series is None:
+        return None, None
+    time_points = np.asarray(time_series.time_points, dtype=float)
+    values = np.asarray(time_series.values, dtype=float)
+    if time_points.shape[0] > points:
+        indices = np.unique(np.linspace(0, time_points.shape[0] - 1,
+                                        points).round().astype(int))
+        time_points, values = time_points[indices], values[indices]
+    return time_points.tolist(), values.tolist()
+
+
+def _json_value(value):
+    """
+    Replace the non-finite floats of a value by None, strict JSON having no
+    literal for them
+
+    Parameters
+    ----------
+    value : double / list of double / object
+
+    Returns
+    -------
+    object:
+        value, with None for every infinite or NaN float
+    """
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
+
+
+def _verdict(filter_result):
+    """
+    Get the verdict of a filter result as a string
+
+    Parameters
+    ----------
+    filter_result : FilterResult
+
+    Returns
+    -------
+    str:
+        "skipped", "filtered" or "not_filtered"
+    """
+    if filter_result.skipped:
+        return "skipped"
+    return "filtered" if filter_result.filtered_or_not else "not_filtered"
+
+
+class ResultWriter:
+    """
+    Base class of the streaming match result writers
+    Subclasses implement _write_row and _close
+
+    Attributes
+    ----------
+    _trajectory_points : int
+        the number of time points of the trajectories written with every
+        row, None to leave the trajectories out
+    _rows : int
+        the number of rows written
+    _closed : bool
+
+    Methods
+    -------
+    fields()
+        Get the names of the written fields
+    rows()
+        Get the number of rows written
+    write(variable, match_result)
+        Write the rows of a match result
+    write_collection(collection)
+        Write the rows of every match result of a collection
+    close()
+        Flush and close the output
+    __call__(variable, match_result)
+        Same as write, to use the writer as a matcher callback
+    """
+
+    def __init__(self, trajectory_points=None):
+        """
+        Parameters
+        ----------
+        trajectory_points : int
+            if given, the original and revised trajectories are written
+            with every row, downsampled to at most this many time points
+
+        Raises
+        ------
+        ValueError:
+            if trajectory_points is below 2
+        """
+        if trajectory_points is not None and trajectory_points < 2:
+            raise ValueError("trajectory_points must be at least 2")
+        self._trajectory_points = trajectory_points
+        self._rows = 0
+        self._closed = False
+
+    @property
+    def fields(self):
+        """
+        Get the names of the written fields
+
+        Returns
+        -------
+        tuple of str
+        """
+        if self._trajectory_points is None:
+            return FIELDS
+        return FIELDS + TRAJECTORY_FIELDS
+
+    @property
+    def rows(self):
+        """
+        Get the number of rows written
+
+        Returns
+        -------
+        int
+        """
+        return self._rows
+
+    def _write_row(self, row):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def write(self, variable, match_result):
+        """
+        Write the rows of a match result, one per filter
+
+        Parameters
+        ----------
+        variable : str
+        match_result : MatchResult
+
+        Raises
+        ------
+        ValueError:
+            if the writer is closed
+        """
+        if self._closed:
+            raise ValueError("The writer is closed")
+        trajectories = ()
+        if self._trajectory_points is not None:
+            trajectories = downsample(match_result.original_ts,
+                                      self._trajectory_points) + \
+                downsample(match_result.revised_ts, self._trajectory_points)
+        filter_results = match_result.filter_results
+        if len(filter_results) == 0:
+            self._write_row((str(variable), None, None, None, None) +
+                            trajectories)
+            self._rows += 1
+            return
+        for ts_filter, filter_result in zip(filter_results.filters,
+                                            filter_results.filter_results):
+            score, tol = filter_result.score, filter_result.tol
+            self._write_row((str(variable), ts_filter.name,
+                             None if score is None else float(score),
+                             None if tol is None else float(tol),
+                             _verdict(filter_result)) + trajectories)
+            self._rows += 1
+
+    def write_collection(self, collection):
+        """
+        Write the rows of every match result of a collection
+
+        Parameters
+        ----------
+        collection : MatchResultCollection
+        """
+        for variable, match_result in zip(collection.variables,
+                                          collection.match_results):
+            self.write(variable, match_result)
+
+    def close(self):
+        """
+        Flush and close the output; closing twice does nothing
+        """
+        if not self._closed:
+            self._closed = True
+            self._close()
+
+    def __call__(self, variable, match_result):
+        self.write(variable, match_result)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class _TextWriter(ResultWriter):
+    """
+    A writer to a text file, opened from a path or given as a file object
+    """
+
+    def __init__(self, output, trajectory_points=None):
+        """
+        Parameters
+        ----------
+        output : str / file object
+            the path of the file to write, or a text file object that is
+            left open
+        trajectory_points : int
+            see ResultWriter
+        """
+        super().__init__(trajectory_points)
+        self._owns_file = isinstance(output, str)
+        self._file = open(output, "w", newline="") if self._owns_file \
+            else output
+
+    def _close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class CSVWriter(_TextWriter):
+    """
+    Writes match results as CSV, with a header row
+    Trajectories are written as JSON arrays with null for non-finite
+    values, missing values as empty cells and infinite scores as inf
+
+    Methods
+    -------
+    see ResultWriter
+    """
+
+    def __init__(self, output, trajectory_points=None):
+        """
+        Parameters
+        ----------
+        output : str / file object
+            the path of the file to write, or a text file object that is
+            left open
+        trajectory_points : int
+            see ResultWriter
+        """
+        super().__init__(output, trajectory_points)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.fields)
+
+    def _write_row(self, row):
+        self._writer.writerow(
+            [json.dumps(_json_value(value), allow_nan=False)
+             if isinstance(value, list) else value for value in row])
+
+
+class JSONLinesWriter(_TextWriter):
+    """
+    Writes match results as strict JSON Lines, one object per row
+    Missing and non-finite values are null; every object also has a
+    "nonfinite_score" field, "inf", "-inf" or "nan" when the score is not
+    finite (an early abandoned filter scores inf) and null otherwise
+
+    Methods
+    -------
+    see ResultWriter
+    """
+
+    def _write_row(self, row):
+        record = {field: _json_value(value)
+                  for field, value in zip(self.fields, row)}
+        score = row[FIELDS.index("score")]
+        record["nonfinite_score"] = None \
+            if score is None or math.isfinite(score) else str(score)
+        self._file.write(json.dumps(record, allow_nan=False))
+        self._file.write("\n")
+
+
+class ParquetWriter(ResultWriter):
+    """
+    Writes match results as Parquet, one row group per row_group_size rows
+    Requires pyarrow
+
+    Attributes
+    ----------
+    _row_group_size : int
+        the number of rows buffered before a row group is written
+    _buffer : list of tuple
+        the rows not written yet
+
+    Methods
+    -------
+    see ResultWriter
+    """
+
+    def __init__(self, path, trajectory_points=None, row_group_size=10000):
+        """
+        Parameters
+        ----------
+        path : str
+            the path of the file to write
+        trajectory_points : int
+            see ResultWriter
+        row_group_size : int
+            the number of rows buffered before a row group is written
+
+        Raises
+        ------
+        ImportError:
+            if pyarrow is not installed
+        ValueError:
+            if row_group_size is not positive
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError("ParquetWriter requires pyarrow, install it "
+                              "with pip install pyarrow") from error
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be positive")
+        super().__init__(trajectory_points)
+        self._pa = pyarrow
+        columns = [pyarrow.field("variable", pyarrow.string()),
+                   pyarrow.field("filter", pyarrow.string()),
+                   pyarrow.field("score", pyarrow.float64()),
+                   pyarrow.field("tol", pyarrow.float64()),
+                   pyarrow.field("verdict", pyarrow.string())]
+        if trajectory_points is not None:
+            columns += [pyarrow.field(name, pyarrow.list_(pyarrow.float64()))
+                        for name in TRAJECTORY_FIELDS]
+        self._schema = pyarrow.schema(columns)
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self._row_group_size = row_group_size
+        self._buffer = []
+
+    def _flush(self):
+        """
+        Write the buffered rows as a row group
+        """
+        if self._buffer:
+            columns = list(zip(*self._buffer))
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(column, type=field.type)
+                 for column, field in zip(columns, self._schema)],
+                schema=self._schema))
+            self._buffer = []
+
+    def _write_row(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _close(self):
+        self._flush()
+        self._writer.close()
@@ -19,9 +19,13 @@ class MatchResult:
         Get the time series from the original model in this matching pair
     revised_ts()
         Get the time series from the revised model in this matching pair
+    filtered()
+        Whether a filter captured this matching pair
     """
 
-    def __init__(self, original_ts, revised_ts):
+    __slots__ = ("_original_ts", "_revised_ts", "_filter_results")
+
+    def __init__(self, original_ts, revised_ts, filter_results=None):
         """
         Parameters
         ----------
@@ -31,10 +35,13 @@ class MatchResult:
         revised_ts : TimeSeries
             the time series in the revised model in this matching pair
             None if the paired time series does not exist in the revised model
+        filter_results : FilterResultCollection
+            the filter results of this matching pair, empty if None
         """
         self._original_ts = original_ts
         self._revised_ts = revised_ts
-        self._filter_results = FilterResultCollection()
+        self._filter_results = FilterResultCollection() \
+            if filter_results is None else filter_results
 
     @property
     def original_ts(self):
@@ -74,3 +81,16 @@ class MatchResult:
         FilterResultCollection
         """
         return self._filter_results
+
+    @property
+    def filtered(self):
+        """
+        Whether a filter captured this matching pair
+
+        Returns
+        -------
+        bool:
+            True if and only if a filter result has filtered_or_not set
+        """
+        return any(filter_result.filtered_or_not
+                   for filter_result in self._filter_results.filter_results)
@@ -0,0 +1,444 @@
+"""
+Queries over the score arrays of a MatchResultCollection
+
+Range queries bisect the scores of a filter sorted once per change of the
+collection, top-k queries partition the score column around the k-th
+score, and the selections they return combine with &, | and ~ across
+filters.
+"""
+
+import numpy as np
+
+from SBviper.viper_dynamic.match_result.collection_match_result import \
+    VERDICT_FILTERED, VERDICT_SKIPPED
+
+
+class Selection:
+    """
+    A set of variables of a MatchResultCollection, as a boolean mask over
+    its rows
+
+    Attributes
+    ----------
+    _query : MatchResultQuery
+        the query that made this selection
+    _mask : numpy.ndarray(bool)
+        whether every row of the collection is selected
+
+    Methods
+    -------
+    mask()
+        Get the boolean mask over the rows of the collection
+    rows()
+        Get the selected rows
+    variables()
+        Get the selected variables
+    match_results()
+        Get the MatchResult of the selected variables
+    __len__()
+        Return the number of selected variables
+    __and__(other), __or__(other), __xor__(other), __invert__()
+        Combine selections of the same collection
+    """
+
+    __slots__ = ("_query", "_mask")
+
+    def __init__(self, query, mask):
+        """
+        Parameters
+        ----------
+        query : MatchResultQuery
+        mask : numpy.ndarray(bool)
+            whether every row of the collection is selected
+        """
+        self._query = query
+        self._mask = mask
+        self._mask.flags.writeable = False
+
+    @property
+    def mask(self):
+        """
+        Get the boolean mask over the rows of the collection
+
+        Returns
+        -------
+        numpy.ndarray(bool)
+        """
+        return self._mask
+
+    @property
+    def rows(self):
+        """
+        Get the selected rows
+
+        Returns
+        -------
+        numpy.ndarray(int):
+            the rows, in increasing order
+        """
+        return np.flatnonzero(self._mask)
+
+    @property
+    def variables(self):
+        """
+        Get the selected variables
+
+        Returns
+        -------
+        numpy.ndarray(str):
+            the variables, in the order of the collection
+        """
+        return self._query.collection.variables[self._mask]
+
+    @property
+    def match_results(self):
+        """
+        Get the MatchResult of the selected variables
+
+        Returns
+        -------
+        numpy.ndarray(MatchResult):
+            the match results, in the order of the collection
+        """
+        return self._query.collection.match_results[self._mask]
+
+    def _combine(self, other, operator):
+        """
+        Combine the masks of two selections
+
+        Parameters
+        ----------
+        other : Selection
+        operator : numpy.ufunc
+
+        Raises
+        ------
+        ValueError:
+            if the selections are not over the same collection
+
+        Returns
+        -------
+        Selection
+        """
+        if not isinstance(other, Selection) or \
+                other._query.collection is not self._query.collection or \
+                other._mask.shape != self._mask.shape:
+            raise ValueError("Only selections of the same collection can be "
+                             "combined")
+        return Selection(self._query, operator(self._mask, other._mask))
+
+    def __and__(self, other):
+        return self._combine(other, np.logical_and)
+
+    def __or__(self, other):
+        return self._combine(other, np.logical_or)
+
+    def __xor__(self, other):
+        return self._combine(other, np.logical_xor)
+
+    def __invert__(self):
+        return Selection(self._query, ~self._mask)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._mask))
+
+    def __repr__(self):
+        return "Selection(%d of %d variables)" % (len(self),
+                                                  self._mask.shape[0])
+
+
+class MatchResultQuery:
+    """
+    Top-k, range and verdict queries over the scores of a
+    MatchResultCollection
+    The sorted scores of a filter are computed on its first range query
+    and kept until the collection changes
+
+    Attributes
+    ----------
+    _collection : MatchResultCollection
+        the queried collection
+    _scores : numpy.ndarray
+        the score array the sorted indices were built from
+    _sorted : dict
+        column to (rows sorted by score, sorted scores), NaN scores left
+        out
+
+    Methods
+    -------
+    collection()
+        Get the queried collection
+    column(filter)
+        Get the column of a filter
+    sorted_rows(filter)
+        Get the rows with a score for filter, sorted by score
+    top_k(filter, k, largest, selection)
+        Get the k variables with the largest or smallest scores
+    score_range(filter, low, high, include_low, include_high)
+        Select the variables whose score is within a range
+    filtered(filter)
+        Select the variables a filter captured
+    skipped(filter)
+        Select the variables a filter was skipped for
+    everything()
+        Select every variable
+    """
+
+    def __init__(self, collection):
+        """
+        Parameters
+        ----------
+        collection : MatchResultCollection
+            the collection to query
+        """
+        self._collection = collection
+        self._scores = None
+        self._sorted = {}
+
+    @property
+    def collection(self):
+        """
+        Get the queried collection
+
+        Returns
+        -------
+        MatchResultCollection
+        """
+        return self._collection
+
+    def _current_scores(self):
+        """
+        Get the scores of the collection, dropping the sorted indices if
+        the collection changed since they were built
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        scores = self._collection.scores
+        if scores is not self._scores:
+            self._scores = scores
+            self._sorted = {}
+        return scores
+
+    def column(self, filter):
+        """
+        Get the column of a filter
+
+        Parameters
+        ----------
+        filter : Filter / str / int
+            the filter, the name of the filter or its column
+
+        Raises
+        ------
+        ValueError:
+            if no column matches, or if a name matches several filters
+
+        Returns
+        -------
+        int
+        """
+        filters = self._collection.filters
+        if isinstance(filter, (int, np.integer)):
+            if not 0 <= filter < len(filters):
+                raise ValueError("No filter column %d" % filter)
+            return int(filter)
+        if isinstance(filter, str):
+            columns = [column for column, ts_filter in enumerate(filters)
+                       if ts_filter.name == filter]
+            if len(columns) > 1:
+                raise ValueError("Several filters are named " + filter)
+        else:
+            column = self._collection.column(filter)
+            columns = [] if column is None else [column]
+        if not columns:
+            raise ValueError("The collection has no results of " + str(filter))
+        return columns[0]
+
+    def _sorted_scores(self, column):
+        """
+        Get the rows with a score in a column and their sorted scores
+
+        Parameters
+        ----------
+        column : int
+
+        Returns
+        -------
+        numpy.ndarray(int):
+            the rows, by increasing score
+        numpy.ndarray:
+            their scores
+        """
+        scores = self._current_scores()
+        entry = self._sorted.get(column)
+        if entry is None:
+            values = scores[:, column]
+            rows = np.flatnonzero(~np.isnan(values))
+            rows = rows[np.argsort(values[rows], kind="stable")]
+            entry = self._sorted[column] = (rows, values[rows])
+        return entry
+
+    def sorted_rows(self, filter):
+        """
+        Get the rows with a score for filter, sorted by score
+
+        Parameters
+        ----------
+        filter : Filter / str / int
+
+        Returns
+        -------
+        numpy.ndarray(int):
+            the rows, by increasing score; rows without a score are left out
+        """
+        return self._sorted_scores(self.column(filter))[0]
+
+    def top_k(self, filter, k, largest=True, selection=None):
+        """
+        Get the k variables with the largest or smallest scores of a filter
+        Uses the sorted scores when they were already built, and partitions
+        the score column in O(n + k log k) otherwise; ties are broken by
+        row
+        The largest scores of a filter that abandons early, like
+        derivative_dtw, are not ranked: every pair at or above its
+        tolerance scores inf. Score them in full instead, e.g. with
+        TimeSeriesMatcher.sweep_tolerances or a larger tolerance
+
+        Parameters
+        ----------
+        filter : Filter / str / int
+        k : int
+        largest : bool
+            if True the largest scores, the most divergent variables for
+            distance filters, otherwise the smallest
+        selection : Selection
+            if given, only the selected variables are ranked
+
+        Raises
+        ------
+        ValueError:
+            if k is negative, or if largest is True and the filter abandons
+            early
+
+        Returns
+        -------
+        list of (str, double):
+            the (variable, score) pairs, best first; variables without a
+            score are left out
+        """
+        if k < 0:
+            raise ValueError("k must not be negative")
+        column = self.column(filter)
+        ts_filter = self._collection.filters[column]
+        if largest and getattr(ts_filter, "early_abandon", False):
+            raise ValueError("The scores of %s are inf for every pair at or "
+                             "above its tolerance and cannot be ranked by "
+                             "the largest" % ts_filter.name)
+        scores = self._current_scores()
+        variables = self._collection.variables
+        if selection is None and column in self._sorted:
+            rows, values = self._sorted[column]
+            if largest:
+                # the last k, largest first, ties in row order
+                start = max(rows.shape[0] - k, 0)
+                order = np.lexsort((rows[start:], -values[start:]))
+                rows, values = rows[start:][order], values[start:][order]
+            return [(str(variables[row]), float(value))
+                    for row, value in zip(rows[:k], values[:k])]
+        values = scores[:, column]
+        candidates = ~np.isnan(values)
+        if selection is not None:
+            candidates &= selection.mask
+        rows = np.flatnonzero(candidates)
+        keys = -values[rows] if largest else values[rows]
+        k = min(k, rows.shape[0])
+        if k == 0:
+            return []
+        if k < rows.shape[0]:
+            kth = np.partition(keys, k - 1)[k - 1]
+            below = np.flatnonzero(keys < kth)
+            # the first rows of those tied with the k-th score
+            tied = np.flatnonzero(keys == kth)[:k - below.shape[0]]
+            best = np.concatenate((below, tied))
+        else:
+            best = np.arange(rows.shape[0])
+        best = best[np.lexsort((best, keys[best]))]
+        return [(str(variables[row]), float(value))
+                for row, value in zip(rows[best], values[rows[best]])]
+
+    def score_range(self, filter, low=None, high=None, include_low=True,
+                    include_high=True):
+        """
+        Select the variables whose score of a filter is within a range, by
+        bisecting the sorted scores
+
+        Parameters
+        ----------
+        filter : Filter / str / int
+        low : double
+            the lower end of the range, None for no lower end
+        high : double
+            the upper end of the range, None for no upper end
+        include_low : bool
+            whether a score equal to low is selected
+        include_high : bool
+            whether a score equal to high is selected
+
+        Returns
+        -------
+        Selection:
+            the variables with a score in the range
+        """
+        rows, values = self._sorted_scores(self.column(filter))
+        start = 0 if low is None else np.searchsorted(
+            values, low, side="left" if include_low else "right")
+        end = values.shape[0] if high is None else np.searchsorted(
+            values, high, side="right" if include_high else "left")
+        mask = np.zeros(self._collection.size, dtype=bool)
+        mask[rows[start:max(start, end)]] = True
+        return Selection(self, mask)
+
+    def filtered(self, filter=None):
+        """
+        Select the variables a filter captured
+
+        Parameters
+        ----------
+        filter : Filter / str / int
+            None for the variables any filter captured
+
+        Returns
+        -------
+        Selection
+        """
+        if filter is None:
+            return Selection(self, self._collection.filtered_mask.copy())
+        verdicts = self._collection.verdicts[:, self.column(filter)]
+        return Selection(self, verdicts == VERDICT_FILTERED)
+
+    def skipped(self, filter):
+        """
+        Select the variables a filter was skipped for
+
+        Parameters
+        ----------
+        filter : Filter / str / int
+
+        Returns
+        -------
+        Selection
+        """
+        verdicts = self._collection.verdicts[:, self.column(filter)]
+        return Selection(self, verdicts == VERDICT_SKIPPED)
+
+    def everything(self):
+        """
+        Select every variable
+
+        Returns
+        -------
+        Selection
+        """
+        return Selection(self, np.ones(self._collection.size, dtype=bool))
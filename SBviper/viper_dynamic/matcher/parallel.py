@@ -0,0 +1,304 @@
+"""Thread and process pool backends for TimeSeriesMatcher."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from SBviper.viper_dynamic.time_series.time_series import TimeSeries
+
+BACKENDS = ("thread", "process")
+
+
+def _partition(n_items, n_parts):
+    """
+    Split range(n_items) into at most n_parts contiguous chunks of nearly
+    equal size
+
+    Parameters
+    ----------
+    n_items : int
+    n_parts : int
+
+    Returns
+    -------
+    list of (int, int):
+        the (start, stop) of every chunk, in order
+    """
+    n_parts = max(1, min(n_parts, n_items))
+    bounds = np.linspace(0, n_items, n_parts + 1).astype(int)
+    return [(bounds[i], bounds[i + 1]) for i in range(n_parts)
+            if bounds[i] < bounds[i + 1]]
+
+
+def evaluate_pairs(filters, pairs, short_circuit=False, decided=None,
+                   known=None):
+    """
+    Run every filter on every pair of time series
+
+    Parameters
+    ----------
+    filters : list of Filter
+        in the order they are run
+    pairs : list of (TimeSeries, TimeSeries)
+    short_circuit : bool
+        if True, the remaining filters of a pair are skipped as soon as a
+        filter has filtered it, unless their output is known
+    decided : list of bool
+        for every pair, whether it was already filtered beforehand
+    known : list of list of (double, double, boolean)
+        for every pair, the already known (score, tol, result) of every
+        filter, or None where the filter has to run
+
+    Returns
+    -------
+    list of list of (double, double, boolean):
+        for every pair, the (score, tol, result) of every filter, None for
+        the filters that were skipped
+    """
+    evaluations = []
+    for row, (ts_a, ts_b) in enumerate(pairs):
+        done = decided is not None and decided[row]
+        row_evaluations = []
+        for index, ts_filter in enumerate(filters):
+            # known outputs are kept even after the pair is decided
+            evaluation = None if known is None else known[row][index]
+            if evaluation is None:
+                if short_circuit and done:
+                    row_evaluations.append(None)
+                    continue
+                evaluation = ts_filter.run_filter(ts_a, ts_b)
+            done = done or bool(evaluation[2])
+            row_evaluations.append(evaluation)
+        evaluations.append(row_evaluations)
+    return evaluations
+
+
+def _costs(filters):
+    """
+    Get the measured cost of every filter
+
+    Parameters
+    ----------
+    filters : list of Filter
+
+    Returns
+    -------
+    list of (int, double):
+        the (pairs scored, seconds spent) of every filter
+    """
+    return [(ts_filter._calls, ts_filter._total_time)
+            for ts_filter in filters]
+
+
+def _evaluate_pairs_in_process(filters, pairs, short_circuit, decided,
+                               known):
+    """
+    Process pool worker: evaluate_pairs, also returning the cost of the
+    filters measured in the worker, which the copies of the filters in the
+    parent do not see
+
+    Parameters
+    ----------
+    see evaluate_pairs
+
+    Returns
+    -------
+    list of list of (double, double, boolean):
+        see evaluate_pairs
+    list of (int, double):
+        the (pairs scored, seconds spent) of every filter in this call
+    """
+    before = _costs(filters)
+    evaluations = evaluate_pairs(filters, pairs, short_circuit, decided,
+                                 known)
+    return evaluations, [(calls - calls_before, seconds - seconds_before)
+                         for (calls, seconds), (calls_before, seconds_before)
+                         in zip(_costs(filters), before)]
+
+
+def _merge_costs(filters, futures):
+    """
+    Collect the outputs of process pool workers and add the costs they
+    measured to the filters
+
+    Parameters
+    ----------
+    filters : list of Filter
+    futures : list of concurrent.futures.Future
+        futures of _evaluate_pairs_in_process or _evaluate_shared_chunk
+
+    Returns
+    -------
+    list of list of (double, double, boolean):
+        the evaluations of every future, concatenated in order
+    """
+    evaluations = []
+    for future in futures:
+        chunk_evaluations, costs = future.result()
+        evaluations.extend(chunk_evaluations)
+        for ts_filter, (calls, seconds) in zip(filters, costs):
+            if calls > 0:
+                ts_filter._record_cost(seconds, calls)
+    return evaluations
+
+
+def _evaluate_shared_chunk(filters, name, n_variables, n_time_points,
+                           variables, start, stop, short_circuit, decided,
+                           known):
+    """
+    Process pool worker: run the filters on the rows [start, stop) of the
+    pair matrices held in a shared memory block
+
+    Parameters
+    ----------
+    filters : list of Filter
+    name : str
+        the name of the shared memory block, holding the original and the
+        revised time axes followed by the original and then the revised
+        (variables x time points) values as float64
+    n_variables : int
+        the number of rows of each pair matrix
+    n_time_points : int
+        the length of the time axis
+    variables : list of str
+        the names of the variables of the rows [start, stop)
+    start : int
+    stop : int
+    short_circuit : bool
+        see evaluate_pairs
+    decided : list of bool
+        for every row in [start, stop), see evaluate_pairs
+    known : list of list of (double, double, boolean)
+        for every row in [start, stop), see evaluate_pairs
+
+    Returns
+    -------
+    list of list of (double, double, boolean):
+        for every row, the (score, tol, result) of every filter
+    list of (int, double):
+        the (pairs scored, seconds spent) of every filter in this call
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        buffer = np.ndarray((2 * n_variables + 2, n_time_points),
+                            dtype=np.float64, buffer=block.buf)
+        buffer.flags.writeable = False
+        pairs = [(TimeSeries(variable, buffer[0], buffer[2 + row],
+                             copy=False),
+                  TimeSeries(variable, buffer[1],
+                             buffer[2 + n_variables + row], copy=False))
+                 for variable, row in zip(variables, range(start, stop))]
+        output = _evaluate_pairs_in_process(filters, pairs, short_circuit,
+                                            decided, known)
+        del pairs, buffer
+    finally:
+        block.close()
+    return output
+
+
+def evaluate_parallel(filters, variables, tsc_original, tsc_revised,
+                      workers, backend="thread", matrix_original=None,
+                      matrix_revised=None, short_circuit=False,
+                      decided=None, known=None):
+    """
+    Run the filters on the pairs of time series of the variables, split
+    across a pool of workers
+    The results are returned in the order of variables whatever the order
+    in which the workers finish
+
+    Parameters
+    ----------
+    filters : list of Filter
+    variables : list of str
+        variables that exist in both collections
+    tsc_original : TimeSeriesCollection
+    tsc_revised : TimeSeriesCollection
+    workers : int
+        the number of workers
+    backend : str
+        "thread" to share the series between threads, or "process" to copy
+        them once into shared memory for a pool of processes; the filters
+        must then be picklable
+    matrix_original : numpy.ndarray
+        the (variables x time points) values of the original collection,
+        required by the process backend to use shared memory, otherwise
+        the pairs of TimeSeries are pickled
+    matrix_revised : numpy.ndarray
+        the (variables x time points) values of the revised collection
+    short_circuit : bool
+        see evaluate_pairs
+    decided : list of bool
+        for every variable, see evaluate_pairs
+    known : list of list of (double, double, boolean)
+        for every variable, see evaluate_pairs
+
+    Raises
+    ------
+    ValueError:
+        if backend is unknown
+
+    Returns
+    -------
+    list of list of (double, double, boolean):
+        for every variable, the (score, tol, result) of every filter
+    """
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of " + ", ".join(BACKENDS))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = _partition(len(variables), workers)
+    if decided is None:
+        decided = [False] * len(variables)
+    if known is None:
+        known = [[None] * len(filters) for _ in variables]
+    if backend == "thread" or matrix_original is None:
+        pairs = [(tsc_original[variable], tsc_revised[variable])
+                 for variable in variables]
+        if backend == "thread":
+            # the filters are shared and record their costs under their lock
+            with ThreadPoolExecutor(max_workers=len(chunks) or 1) \
+                    as executor:
+                futures = [executor.submit(evaluate_pairs, filters,
+                                           pairs[start:stop], short_circuit,
+                                           decided[start:stop],
+                                           known[start:stop])
+                           for start, stop in chunks]
+                return [evaluation for future in futures
+                        for evaluation in future.result()]
+        with ProcessPoolExecutor(max_workers=len(chunks) or 1) as executor:
+            futures = [executor.submit(_evaluate_pairs_in_process, filters,
+                                       pairs[start:stop], short_circuit,
+                                       decided[start:stop],
+                                       known[start:stop])
+                       for start, stop in chunks]
+            return _merge_costs(filters, futures)
+    n_variables, n_time_points = matrix_original.shape
+    if os.name == "posix":
+        # workers started from now on share this resource tracker, so the
+        # block is only cleaned up by the unlink below
+        resource_tracker.ensure_running()
+    block = shared_memory.SharedMemory(
+        create=True, size=max(8 * n_time_points * (2 * n_variables + 2), 1))
+    try:
+        buffer = np.ndarray((2 * n_variables + 2, n_time_points),
+                            dtype=np.float64, buffer=block.buf)
+        buffer[0] = tsc_original.time_points
+        buffer[1] = tsc_revised.time_points
+        buffer[2:n_variables + 2] = matrix_original
+        buffer[n_variables + 2:] = matrix_revised
+        del buffer
+        with ProcessPoolExecutor(max_workers=len(chunks) or 1) as executor:
+            futures = [executor.submit(_evaluate_shared_chunk, filters,
+                                       block.name, n_variables,
+                                       n_time_points,
+                                       list(variables[start:stop]),
+                                       start, stop, short_circuit,
+                                       decided[start:stop],
+                                       known[start:stop])
+                       for start, stop in chunks]
+            return _merge_costs(filters, futures)
+    finally:
+        block.close()
+        block.unlink()
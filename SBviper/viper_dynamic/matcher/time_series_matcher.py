@@ -1,7 +1,19 @@
+import asyncio
+import itertools
+
+import numpy as np
+
 from SBviper.viper_dynamic.match_result.collection_match_result import \
     MatchResultCollection
 from SBviper.viper_dynamic.match_result.match_result import MatchResult
 from SBviper.viper_dynamic.Filter.filter_result import FilterResult
+from SBviper.viper_dynamic.matcher.parallel import evaluate_pairs, \
+    evaluate_parallel
+from SBviper.viper_dynamic.profiling import stage
+from SBviper.viper_dynamic.time_series.alignment import align_collections
+
+# number of variables evaluated at once by iter_run
+DEFAULT_CHUNK_SIZE = 256
 
 
 class TimeSeriesMatcher:
@@ -16,18 +28,40 @@ class TimeSeriesMatcher:
     _tsc_revised : TimeSeriesCollection
         The TimeSeriesCollection representing the revised model
     _filters : list of Filter
+    _previous_evaluations : dict
+        (variable, original fingerprint, revised fingerprint, filter
+        identities) to the filter outputs of the last run
+    _score_cache : ScoreCache
+        optional persistent cache of the per-variable filter outputs
+    _profiler : Profiler
+        optional profiler the stages of the runs are timed into
 
     Methods
     -------
     add_filter(ts_filter)
         Add a new filter object to the matcher
-    run()
+    set_collections(tsc_original, tsc_revised)
+        Replace the collections to match, keeping the previous results
+    run(vectorized, workers, backend, short_circuit, incremental,
+        coarse_to_fine, callback)
         Run all of the filters
-    run_filter(ts_filter)
+    iter_run(vectorized, workers, backend, short_circuit, incremental,
+             coarse_to_fine, chunk_size, callback)
+        Run all of the filters, yielding the match results as they come
+    run_filter(ts_filter, vectorized, workers, backend, short_circuit,
+               incremental, coarse_to_fine, callback)
         Run a specific filter
+    run_async(vectorized, workers, backend, short_circuit, incremental,
+              coarse_to_fine, chunk_size, callback, executor, semaphore)
+        Run all of the filters without blocking the event loop
+    score_matrix(filters, vectorized, workers, backend)
+        Get the raw scores of the filters on every common variable
+    sweep_tolerances(ts_filter, tols, vectorized, workers, backend)
+        Partition the variables for many tolerances from one scoring pass
     """
 
-    def __init__(self, tsc_original, tsc_revised):
+    def __init__(self, tsc_original, tsc_revised, grid=None,
+                 method="linear", score_cache=None, profiler=None):
         """
         Parameters
         ----------
@@ -38,10 +72,59 @@ class TimeSeriesMatcher:
         tsc_revised : TimeSeriesCollection
             the time series collection representing the
             simulation result of the revised model
+
+        grid : str or int
+            if given, both collections are resampled onto a common time grid
+            before matching: "union", "intersection" or a number of evenly
+            spaced time points, see alignment.common_time_grid
+
+        method : str
+            the interpolation used when resampling, "linear" or "cubic"
+
+        score_cache : ScoreCache
+            if given, the outputs of the per-variable filters are looked up
+            in and stored to this cache, across runs and processes
+
+        profiler : Profiler
+            if given, alignment, filter evaluation, cache accesses and
+            result assembly are timed into it, the time spent in every
+            filter is recorded under "filter:<name>", and the "pairs",
+            "short_circuit.skipped", "score_cache.hits" and
+            "score_cache.misses" counters count the pairs and filter outputs
+        """
+        self._profiler = profiler
+        self._score_cache = score_cache
+        self._grid = grid
+        self._method = method
+        self._filters = []
+        self._previous_evaluations = {}
+        self.set_collections(tsc_original, tsc_revised)
+
+    def set_collections(self, tsc_original=None, tsc_revised=None):
+        """
+        Replace the collections to match, e.g. after the revised model was
+        simulated again
+        The results of the last run are kept, so that an incremental run
+        only re-scores the variables whose time series changed
+
+        Parameters
+        ----------
+        tsc_original : TimeSeriesCollection
+            the new original collection, unchanged if None
+        tsc_revised : TimeSeriesCollection
+            the new revised collection, unchanged if None
         """
+        if tsc_original is None:
+            tsc_original = self._tsc_original
+        if tsc_revised is None:
+            tsc_revised = self._tsc_revised
+        if self._grid is not None:
+            with stage(self._profiler, "align", grid=str(self._grid)):
+                tsc_original, tsc_revised = \
+                    align_collections(tsc_original, tsc_revised, self._grid,
+                                      self._method)
         self._tsc_original = tsc_original
         self._tsc_revised = tsc_revised
-        self._filters = []
 
     def add_filter(self, ts_filter):
         """
@@ -54,10 +137,44 @@ class TimeSeriesMatcher:
         """
         self._filters.append(ts_filter)
 
-    def run(self):
+    def run(self, vectorized=False, workers=1, backend="thread",
+            short_circuit=False, incremental=False, coarse_to_fine=False,
+            callback=None):
         """
         Run all of the filters, iteratively, on both TimeSeriesCollection
 
+        Parameters
+        ----------
+        vectorized : bool
+            if True, filters with a vectorized kernel score all variables
+            in one call on the (variables x time points) arrays of both
+            collections; other filters, and collections without a shared
+            time axis, fall back to the per-variable path
+        workers : int
+            the number of workers the per-variable path is split across,
+            None for the number of CPUs; 1 (default) runs it in this thread
+        backend : str
+            "thread" or "process"; the process backend copies the series
+            once into shared memory and requires picklable filters
+        short_circuit : bool
+            if True, the per-variable filters run from the cheapest to the
+            most expensive measured cost, and the remaining filters of a
+            pair are skipped once a filter has filtered it; skipped filters
+            are recorded as FilterResult with skipped set
+        incremental : bool
+            if True, the filter outputs of the last run are reused for the
+            variables whose original and revised time series, filters and
+            tolerances are unchanged
+        coarse_to_fine : bool
+            if True, filters with a bound function decide every pair from
+            the min/max pyramids of its time series, starting at the
+            coarsest level and only descending where the bounds straddle
+            the tolerance; the verdicts are those of the full resolution,
+            the scores are the deciding bounds
+        callback : Function
+            called as callback(variable, match_result) for every
+            MatchResult as soon as it is built
+
         Raises
         ------
         ValueError:
@@ -70,12 +187,165 @@ class TimeSeriesMatcher:
         MatchResultCollection
             containing time series data that was filtered out by the filters
         """
-        return self.__run_helper(self._filters)
+        return self.__run_helper(self._filters, vectorized, workers, backend,
+                                 short_circuit, incremental, coarse_to_fine,
+                                 callback)
 
-    def run_filter(self, ts_filter):
+    def iter_run(self, vectorized=False, workers=1, backend="thread",
+                 short_circuit=False, incremental=False, coarse_to_fine=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, callback=None):
+        """
+        Run all of the filters on both TimeSeriesCollection, yielding every
+        MatchResult as soon as its filters have run
+        The variables are evaluated chunk by chunk, in the order of run(),
+        so only one chunk of results is held at a time
+
+        Parameters
+        ----------
+        vectorized : bool
+            see run()
+        workers : int
+            see run(), a pool of workers is started for every chunk
+        backend : str
+            see run()
+        short_circuit : bool
+            see run()
+        incremental : bool
+            see run(); the outputs are kept for the next run once the
+            generator is exhausted
+        coarse_to_fine : bool
+            see run()
+        chunk_size : int
+            the number of variables evaluated at once; None for a single
+            chunk
+        callback : Function
+            called as callback(variable, match_result) before every
+            MatchResult is yielded
+
+        Raises
+        ------
+        ValueError:
+            if chunk_size is not positive
+
+        Yields
+        ------
+        str
+            the variable
+        MatchResult
+            its match result; MatchResult.filtered tells whether a filter
+            captured it
+        """
+        return self.__iter_helper(self._filters, vectorized, workers,
+                                  backend, short_circuit, incremental,
+                                  coarse_to_fine, chunk_size, callback)
+
+    async def run_async(self, vectorized=False, workers=1, backend="thread",
+                        short_circuit=False, incremental=False,
+                        coarse_to_fine=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                        callback=None, executor=None, semaphore=None):
+        """
+        Run all of the filters like run(), without blocking the event loop
+        The variables are evaluated chunk by chunk in an executor, and the
+        event loop gets control back between chunks, so a cancelled run
+        stops after its current chunk
+
+        Parameters
+        ----------
+        vectorized : bool
+            see run()
+        workers : int
+            see run()
+        backend : str
+            see run()
+        short_circuit : bool
+            see run()
+        incremental : bool
+            see run(); the outputs are only kept if the run completes
+        coarse_to_fine : bool
+            see run()
+        chunk_size : int
+            see iter_run()
+        callback : Function
+            see run(), called from the executor
+        executor : concurrent.futures.ThreadPoolExecutor
+            the thread pool evaluating the chunks, the default executor of
+            the event loop if None; heavy filters can still be spread over
+            processes with workers and backend
+        semaphore : asyncio.Semaphore
+            if given, held during the run, to bound the number of
+            concurrent runs
+
+        Raises
+        ------
+        ValueError:
+            if chunk_size is not positive
+        asyncio.CancelledError:
+            if the task is cancelled
+
+        Returns
+        -------
+        MatchResultCollection
+            containing time series data that was filtered out by the filters
+        MatchResultCollection
+            containing time series data that wasn't filtered out by the
+            filters
+        """
+        if semaphore is not None:
+            async with semaphore:
+                return await self.run_async(
+                    vectorized, workers, backend, short_circuit, incremental,
+                    coarse_to_fine, chunk_size, callback, executor)
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        loop = asyncio.get_running_loop()
+        results = self.__iter_helper(self._filters, vectorized, workers,
+                                     backend, short_circuit, incremental,
+                                     coarse_to_fine, chunk_size, callback)
+        # a chunk is evaluated when its first result is requested, so
+        # every batch runs at most one chunk
+        batch_size = chunk_size or max(len(self._tsc_original.variables) +
+                                       len(self._tsc_revised.variables), 1)
+        filtered_collection = MatchResultCollection()
+        non_filtered_collection = MatchResultCollection()
+        while True:
+            batch = await loop.run_in_executor(
+                executor, list, itertools.islice(results, batch_size))
+            if not batch:
+                break
+            for variable, match_result in batch:
+                if match_result.filtered:
+                    filtered_collection.add_match_result(variable,
+                                                         match_result)
+                else:
+                    non_filtered_collection.add_match_result(variable,
+                                                             match_result)
+        return filtered_collection, non_filtered_collection
+
+    def run_filter(self, ts_filter, vectorized=False, workers=1,
+                   backend="thread", short_circuit=False, incremental=False,
+                   coarse_to_fine=False, callback=None):
         """
         Run a specific filter on both TimeSeriesCollection
 
+        Parameters
+        ----------
+        ts_filter : Filter
+            the filter to run
+        vectorized : bool
+            see run()
+        workers : int
+            see run()
+        backend : str
+            see run()
+        short_circuit : bool
+            see run()
+        incremental : bool
+            see run()
+        coarse_to_fine : bool
+            see run()
+        callback : Function
+            see run()
+
         Raises
         ------
         ValueError:
@@ -88,80 +358,569 @@ class TimeSeriesMatcher:
         MatchResultCollection
             containing time series data that was filtered out by the filters
         """
-        return self.__run_helper(list(ts_filter))
+        return self.__run_helper([ts_filter], vectorized, workers, backend,
+                                 short_circuit, incremental, coarse_to_fine,
+                                 callback)
 
-    def __run_helper(self, filters):
-        filtered_collection = MatchResultCollection()
-        non_filtered_collection = MatchResultCollection()
-        '''
-        0: iterate through the original ts collection
-            0.0: add to a set of visited variables
-            0.1: if the variable does not exist in the revised ts collection
-                -> create MatchResult with None filter results and
-                   None revised ts
-                -> add to MatchResultCollection
-            0.2: (variable exist in both tsc)
-                0.2.0: create MatchResult
-                0.2.1: iterate through filters
-                    0.2.1.0: create FilterResult based on the 
-                             run result of the filter
-                    0.2.1.1: add FilterResult to 
-                             MatchResult.FilterResultCollection
-                0.2.2: add to MatchResultCollection
-        1: iterate through the revised ts collection
-            1.1: if the variable does not exist in the set of visited variables
-                -> create MatchResult with None filter results and None original
-                   ts
-        '''
-        visited = set()
-        # iterate through the original ts collection
-        for variable in self._tsc_original.variables:
-            # add to a set of visited variables
-            visited.add(variable)
-            # if the variable does not exist in the revised ts collection
-            if variable not in self._tsc_revised:
-                # create MatchResult with None filter results and None
-                # revised ts add to MatchResultCollection
-                non_filtered_collection.add_match_result(variable,
-                                                         MatchResult(
-                                                             self._tsc_original[
-                                                                 variable],
-                                                             None))
+    def score_matrix(self, filters=None, vectorized=False, workers=1,
+                     backend="thread"):
+        """
+        Score every variable that exists in both TimeSeriesCollection with
+        the filters, without applying their tolerances
+
+        Parameters
+        ----------
+        filters : list of Filter
+            the filters to score with, the filters of the matcher if None
+        vectorized : bool
+            see run()
+        workers : int
+            see run()
+        backend : str
+            see run()
+
+        Returns
+        -------
+        list of str:
+            the common variables, in the order of the rows
+        numpy.ndarray:
+            the (variables x filters) array of scores
+        """
+        if filters is None:
+            filters = self._filters
+        variables = self._common_variables()
+        try:
+            evaluations = self._evaluate(filters, variables, vectorized,
+                                         workers, backend)
+        finally:
+            for ts_filter in filters:
+                ts_filter.clear_caches()
+        scores = np.array([[evaluation[0] for evaluation in row_evaluations]
+                           for row_evaluations in evaluations], dtype=float)
+        return variables, scores.reshape((len(variables), len(filters)))
+
+    def sweep_tolerances(self, ts_filter, tols, vectorized=False, workers=1,
+                         backend="thread"):
+        """
+        Partition the common variables into filtered and non filtered ones
+        for every tolerance, scoring every pair only once
+        A pair is filtered for a tolerance if its score is below it; a
+        filter with early abandoning scores up to the largest tolerance
+
+        Parameters
+        ----------
+        ts_filter : Filter
+            the filter to score with
+        tols : array like
+            the tolerances to evaluate
+        vectorized : bool
+            see run()
+        workers : int
+            see run()
+        backend : str
+            see run()
+
+        Returns
+        -------
+        list of (numpy.ndarray, numpy.ndarray):
+            for every tolerance, the names of the filtered variables and
+            the names of the non filtered variables
+        """
+        tols = np.asarray(tols, dtype=float)
+        old_tol = ts_filter.get_tol()
+        if ts_filter.early_abandon and tols.size:
+            # scores must be exact up to the largest tolerance
+            ts_filter.set_tol(max(old_tol, float(tols.max())))
+        try:
+            variables, scores = self.score_matrix([ts_filter], vectorized,
+                                                  workers, backend)
+        finally:
+            ts_filter.set_tol(old_tol)
+        variables = np.array(variables, dtype=object)
+        verdicts = ts_filter.evaluate(scores[:, 0], tols)
+        return [(variables[verdict], variables[~verdict])
+                for verdict in verdicts]
+
+    def _common_variables(self):
+        """
+        Get the variables that exist in both TimeSeriesCollection
+
+        Returns
+        -------
+        list of str:
+            the common variables, in the order of the original collection
+        """
+        return [variable for variable in self._tsc_original.variables
+                if variable in self._tsc_revised]
+
+    def _pair_matrices(self, variables):
+        """
+        Get the values of the variables in both collections as two aligned
+        (variables x time points) arrays
+
+        Parameters
+        ----------
+        variables : list of str
+            variables that exist in both collections
+
+        Returns
+        -------
+        numpy.ndarray:
+            the values in the original collection, None if a collection has
+            no shared time axis or the time axes have different lengths
+        numpy.ndarray:
+            the values in the revised collection, None in the same cases
+        """
+        try:
+            matrix_original = self._tsc_original.values_matrix
+            matrix_revised = self._tsc_revised.values_matrix
+        except ValueError:
+            return None, None
+        if matrix_original.shape[1] != matrix_revised.shape[1]:
+            return None, None
+        return (self._select_rows(self._tsc_original, matrix_original,
+                                  variables),
+                self._select_rows(self._tsc_revised, matrix_revised,
+                                  variables))
+
+    @staticmethod
+    def _select_rows(tsc, matrix, variables):
+        """
+        Select the rows of the variables, without copying when the
+        collection already holds exactly these variables in this order
+
+        Parameters
+        ----------
+        tsc : TimeSeriesCollection
+        matrix : numpy.ndarray
+            tsc.values_matrix
+        variables : list of str
+
+        Returns
+        -------
+        numpy.ndarray:
+            the (variables x time points) values
+        """
+        all_variables = list(tsc.variables)
+        if all_variables == list(variables):
+            return matrix
+        rows = {variable: row for row, variable in enumerate(all_variables)}
+        return matrix[[rows[variable] for variable in variables]]
+
+    def _evaluate(self, filters, variables, vectorized, workers=1,
+                  backend="thread", short_circuit=False,
+                  coarse_to_fine=False):
+        """
+        Run the filters on the pairs of time series of the variables
+
+        Parameters
+        ----------
+        filters : list of Filter
+        variables : list of str
+            variables that exist in both collections
+        vectorized : bool
+            whether to use the vectorized kernels of the filters
+        workers : int
+            the number of workers of the per-variable path
+        backend : str
+            "thread" or "process"
+        short_circuit : bool
+            whether to skip the remaining filters of a filtered pair
+        coarse_to_fine : bool
+            whether to decide the filters with a bound function from the
+            pyramids of the time series
+
+        Returns
+        -------
+        list of list of (double, double, boolean):
+            for every variable, the (score, tol, result) of every filter,
+            None for the filters that were skipped
+        """
+        evaluations = [[None] * len(filters) for _ in variables]
+        per_pair = list(range(len(filters)))
+        matrix_original = matrix_revised = None
+        if variables and ((vectorized and any(ts_filter.is_vectorized
+                                              for ts_filter in filters)) or
+                          (workers != 1 and backend == "process")):
+            matrix_original, matrix_revised = self._pair_matrices(variables)
+        if vectorized and matrix_original is not None:
+            per_pair = []
+            for index, ts_filter in enumerate(filters):
+                if not ts_filter.is_vectorized:
+                    per_pair.append(index)
+                    continue
+                with stage(self._profiler, "filter:" + ts_filter.name,
+                           vectorized=True, pairs=len(variables)):
+                    scores, results = ts_filter.run_vectorized(
+                        matrix_original, matrix_revised)
+                tol = ts_filter.get_tol()
+                for row in range(len(variables)):
+                    evaluations[row][index] = \
+                        (scores[row], tol, bool(results[row]))
+        if coarse_to_fine:
+            with stage(self._profiler, "bounds", pairs=len(variables)):
+                per_pair = self._evaluate_bounds(filters, variables, per_pair,
+                                                 evaluations)
+        if not per_pair:
+            return evaluations
+        decided = None
+        probed = {}
+        if short_circuit:
+            decided = [any(evaluation is not None and evaluation[2]
+                           for evaluation in row_evaluations)
+                       for row_evaluations in evaluations]
+            probe_row, probed = self._probe_costs(filters, variables,
+                                                  per_pair, decided)
+            # cheapest first, so that the expensive filters are the ones
+            # being skipped
+            per_pair.sort(key=lambda index: filters[index].mean_cost)
+        per_pair_filters = [filters[index] for index in per_pair]
+        pairs = [(self._tsc_original[variable], self._tsc_revised[variable])
+                 for variable in variables]
+        known = cache_keys = None
+        if self._score_cache is not None:
+            cache_keys = [[self._score_cache.make_key(ts_a, ts_b, ts_filter)
+                           for ts_filter in per_pair_filters]
+                          for ts_a, ts_b in pairs]
+            with stage(self._profiler, "score_cache.get"):
+                flat_known = self._score_cache.get_many(
+                    [key for row_keys in cache_keys for key in row_keys])
+            known = [flat_known[row * len(per_pair):
+                                (row + 1) * len(per_pair)]
+                     for row in range(len(variables))]
+        run_known = known
+        if probed:
+            # the outputs of the probe are not computed again
+            run_known = [[None] * len(per_pair) for _ in variables] \
+                if known is None else [list(row_known) for row_known in known]
+            for position, index in enumerate(per_pair):
+                if index in probed and \
+                        run_known[probe_row][position] is None:
+                    run_known[probe_row][position] = probed[index]
+        costs = [(ts_filter._calls, ts_filter._total_time)
+                 for ts_filter in per_pair_filters]
+        with stage(self._profiler, "evaluate_pairs", pairs=len(variables),
+                   workers=str(workers), backend=backend):
+            if workers != 1 and len(variables) > 1:
+                per_pair_evaluations = evaluate_parallel(
+                    per_pair_filters, variables, self._tsc_original,
+                    self._tsc_revised, workers, backend, matrix_original,
+                    matrix_revised, short_circuit, decided, run_known)
+            else:
+                per_pair_evaluations = evaluate_pairs(
+                    per_pair_filters, pairs, short_circuit, decided,
+                    run_known)
+        if self._profiler is not None:
+            # the costs measured by worker processes are merged back into
+            # the filters, so they show up here as well
+            for ts_filter, (calls, total_time) in zip(per_pair_filters,
+                                                       costs):
+                self._profiler.add("filter:" + ts_filter.name,
+                                   ts_filter._total_time - total_time,
+                                   ts_filter._calls - calls)
+            self._profiler.count("pairs", len(variables))
+            if short_circuit:
+                self._profiler.count("short_circuit.skipped", sum(
+                    evaluation is None for row_evaluations in
+                    per_pair_evaluations for evaluation in row_evaluations))
+            if known is not None:
+                hits = sum(evaluation is not None for row_known in known
+                           for evaluation in row_known)
+                self._profiler.count("score_cache.hits", hits)
+                self._profiler.count("score_cache.misses",
+                                     len(variables) * len(per_pair) - hits)
+        if self._score_cache is not None:
+            with stage(self._profiler, "score_cache.put"):
+                self._score_cache.put_many(
+                    [(key, evaluation)
+                     for row_keys, row_known, row_evaluations in
+                     zip(cache_keys, known, per_pair_evaluations)
+                     for key, known_evaluation, evaluation in
+                     zip(row_keys, row_known, row_evaluations)
+                     if known_evaluation is None and
+                     evaluation is not None])
+        for row, row_evaluations in enumerate(per_pair_evaluations):
+            for index, evaluation in zip(per_pair, row_evaluations):
+                evaluations[row][index] = evaluation
+        return evaluations
+
+    def _probe_costs(self, filters, variables, indices, decided):
+        """
+        Measure the cost of the filters that have not run yet on the first
+        undecided pair, so that the first short-circuited run can already
+        run the cheap filters first
+
+        Parameters
+        ----------
+        filters : list of Filter
+        variables : list of str
+        indices : list of int
+            the indices of the filters run pair by pair
+        decided : list of bool
+            for every variable, whether it is already filtered
+
+        Returns
+        -------
+        int:
+            the row of the probed pair, None if nothing was probed
+        dict:
+            filter index to the (score, tol, result) of the probed pair
+        """
+        fresh = [index for index in indices if filters[index]._calls == 0]
+        if len(indices) < 2 or not fresh:
+            return None, {}
+        probe_row = next((row for row, done in enumerate(decided)
+                          if not done), None)
+        if probe_row is None:
+            return None, {}
+        ts_a = self._tsc_original[variables[probe_row]]
+        ts_b = self._tsc_revised[variables[probe_row]]
+        with stage(self._profiler, "probe_costs", filters=len(fresh)):
+            return probe_row, {index: filters[index].run_filter(ts_a, ts_b)
+                               for index in fresh}
+
+    def _evaluate_bounds(self, filters, variables, indices, evaluations):
+        """
+        Decide the filters that have a bound function on every pair of time
+        series of the same length
+
+        Parameters
+        ----------
+        filters : list of Filter
+        variables : list of str
+            variables that exist in both collections
+        indices : list of int
+            the indices of the filters left to run
+        evaluations : list of list of (double, double, boolean)
+            for every variable, the outputs of every filter, filled in place
+
+        Returns
+        -------
+        list of int:
+            the indices of the filters that still have to run on some pairs
+        """
+        remaining = []
+        for index in indices:
+            ts_filter = filters[index]
+            if not ts_filter.has_bounds:
+                remaining.append(index)
                 continue
-            # variable exist in both tsc
-            # create MatchResult
-            match_result = MatchResult(self._tsc_original[variable],
-                                       self._tsc_revised[variable])
-            # iterate through filters
-            filtered = False
-            for filter in filters:
-                # create FilterResult based on the run result of the filter
-                score, tol, result = \
-                    filter.run_filter(self._tsc_original[variable],
-                                      self._tsc_revised[
-                                          variable])
-                if result:
-                    filtered = True
+            bounded_all = True
+            for row, variable in enumerate(variables):
+                ts_a = self._tsc_original[variable]
+                ts_b = self._tsc_revised[variable]
+                if len(ts_a) != len(ts_b):
+                    bounded_all = False
+                    continue
+                evaluations[row][index] = ts_filter.run_bounds(ts_a, ts_b)
+            if not bounded_all:
+                remaining.append(index)
+        return remaining
+
+    def _evaluate_incremental(self, filters, variables, vectorized,
+                              workers=1, backend="thread",
+                              short_circuit=False, coarse_to_fine=False,
+                              current=None):
+        """
+        Run the filters on the pairs of time series of the variables,
+        reusing the outputs of the last run for unchanged pairs
+
+        Parameters
+        ----------
+        filters : list of Filter
+        variables : list of str
+            variables that exist in both collections
+        vectorized : bool
+            see _evaluate
+        workers : int
+            see _evaluate
+        backend : str
+            see _evaluate
+        short_circuit : bool
+            see _evaluate; without it, outputs with skipped filters are not
+            reused
+        coarse_to_fine : bool
+            see _evaluate; outputs are only reused from a run with the same
+            option, since the scores differ
+        current : dict
+            if given, the outputs are added to it, for the caller to keep
+            as the outputs of this run; otherwise they replace the outputs
+            of the last run
+
+        Returns
+        -------
+        list of list of (double, double, boolean):
+            for every variable, the (score, tol, result) of every filter,
+            None for the filters that were skipped
+        """
+        identities = tuple(ts_filter.identity for ts_filter in filters) + \
+            (coarse_to_fine,)
+        if None in identities:
+            # a filter without a stable identity cannot be told apart from
+            # another one, so nothing is reused nor kept
+            return self._evaluate(filters, variables, vectorized, workers,
+                                  backend, short_circuit, coarse_to_fine)
+        keys = [(variable, self._tsc_original[variable].fingerprint,
+                 self._tsc_revised[variable].fingerprint, identities)
+                for variable in variables]
+        evaluations = [self._previous_evaluations.get(key) for key in keys]
+        if not short_circuit:
+            # a short-circuited run skipped filters, whose scores this run
+            # has to compute
+            evaluations = [None if row_evaluations is None or
+                           None in row_evaluations else row_evaluations
+                           for row_evaluations in evaluations]
+        changed = [row for row, row_evaluations in enumerate(evaluations)
+                   if row_evaluations is None]
+        changed_evaluations = self._evaluate(
+            filters, [variables[row] for row in changed], vectorized,
+            workers, backend, short_circuit, coarse_to_fine)
+        for row, row_evaluations in zip(changed, changed_evaluations):
+            evaluations[row] = row_evaluations
+        if current is None:
+            # only the last run is kept, so the memory use stays bounded
+            self._previous_evaluations = dict(zip(keys, evaluations))
+        else:
+            current.update(zip(keys, evaluations))
+        return evaluations
+
+    def __make_match_result(self, filters, variable, evaluations):
+        """
+        Build the MatchResult of a variable
+
+        Parameters
+        ----------
+        filters : list of Filter
+        variable : str
+        evaluations : list of (double, double, boolean)
+            the output of every filter, None for skipped filters; None if
+            the variable does not exist in both collections
+
+        Returns
+        -------
+        MatchResult
+        """
+        if evaluations is None:
+            # the variable only exists in one collection, so it is not
+            # matched and has no filter results
+            original_ts = self._tsc_original[variable] \
+                if variable in self._tsc_original else None
+            revised_ts = self._tsc_revised[variable] \
+                if variable in self._tsc_revised else None
+            return MatchResult(original_ts, revised_ts)
+        match_result = MatchResult(self._tsc_original[variable],
+                                   self._tsc_revised[variable])
+        for filter, evaluation in zip(filters, evaluations):
+            if evaluation is None:
+                # skipped, the pair was already filtered
+                filter_result = FilterResult(None, filter.get_tol(), None,
+                                             skipped=True)
+            else:
+                score, tol, result = evaluation
                 filter_result = FilterResult(score, tol, result)
-                # add FilterResult to MatchResult.FilterResultCollection
-                match_result.filter_results.add_filter_result(filter,
-                                                              filter_result)
-            # add to MatchResultCollection
-            if filtered:
-                filtered_collection.add_match_result(variable,
-                                                     match_result)
+            match_result.filter_results.add_filter_result(filter,
+                                                          filter_result)
+        return match_result
+
+    @staticmethod
+    def _clearing_caches(filters, results):
+        """
+        Yield the results of a run, dropping the caches of its filters once
+        the run ends or is closed
+        The caches only serve one run, and filters like the ones of
+        constants are shared by every matcher
+
+        Parameters
+        ----------
+        filters : list of Filter
+        results : generator
+
+        Yields
+        ------
+        the items of results
+        """
+        try:
+            yield from results
+        finally:
+            for ts_filter in filters:
+                ts_filter.clear_caches()
+
+    def __iter_helper(self, filters, vectorized=False, workers=1,
+                      backend="thread", short_circuit=False,
+                      incremental=False, coarse_to_fine=False,
+                      chunk_size=DEFAULT_CHUNK_SIZE, callback=None):
+        return self._clearing_caches(filters, self.__iter_results(
+            filters, vectorized, workers, backend, short_circuit,
+            incremental, coarse_to_fine, chunk_size, callback))
+
+    def __iter_results(self, filters, vectorized=False, workers=1,
+                       backend="thread", short_circuit=False,
+                       incremental=False, coarse_to_fine=False,
+                       chunk_size=DEFAULT_CHUNK_SIZE, callback=None):
+        '''
+        1: iterate through the original ts collection, chunk by chunk
+            1.1: run every filter on the variables of the chunk that exist
+                 in both ts collections
+            1.2: create a MatchResult for every variable of the chunk, with
+                 None filter results and None revised ts if the variable
+                 does not exist in the revised ts collection
+            1.3: hand every MatchResult to the callback and yield it
+        2: iterate through the revised ts collection
+            2.1: if the variable does not exist in the original ts
+                 collection -> create MatchResult with None filter results
+                 and None original ts
+        '''
+        variables = list(self._tsc_original.variables)
+        if chunk_size is None:
+            chunk_size = max(len(variables), 1)
+        elif chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        current_evaluations = {} if incremental else None
+        for start in range(0, len(variables), chunk_size):
+            chunk = variables[start:start + chunk_size]
+            common_variables = [variable for variable in chunk
+                                if variable in self._tsc_revised]
+            if incremental:
+                chunk_evaluations = self._evaluate_incremental(
+                    filters, common_variables, vectorized, workers, backend,
+                    short_circuit, coarse_to_fine, current_evaluations)
             else:
-                non_filtered_collection.add_match_result(variable,
-                                                         match_result)
-        # iterate through the revised ts collection
+                chunk_evaluations = self._evaluate(
+                    filters, common_variables, vectorized, workers, backend,
+                    short_circuit, coarse_to_fine)
+            evaluations = dict(zip(common_variables, chunk_evaluations))
+            with stage(self._profiler, "assemble", variables=len(chunk)):
+                match_results = [self.__make_match_result(
+                    filters, variable, evaluations.get(variable))
+                    for variable in chunk]
+            for variable, match_result in zip(chunk, match_results):
+                if callback is not None:
+                    callback(variable, match_result)
+                yield variable, match_result
+        if incremental:
+            # only the last run is kept, so the memory use stays bounded
+            self._previous_evaluations = current_evaluations
         for variable in self._tsc_revised.variables:
-            # if the variable does not exist in the set of visited variables
-            if variable not in visited:
-                # create MatchResult with None filter results and None original
-                # ts
+            if variable not in self._tsc_original:
+                match_result = self.__make_match_result(filters, variable,
+                                                        None)
+                if callback is not None:
+                    callback(variable, match_result)
+                yield variable, match_result
+
+    def __run_helper(self, filters, vectorized=False, workers=1,
+                     backend="thread", short_circuit=False,
+                     incremental=False, coarse_to_fine=False,
+                     callback=None):
+        filtered_collection = MatchResultCollection()
+        non_filtered_collection = MatchResultCollection()
+        # a single chunk, so every filter runs once over all the variables
+        for variable, match_result in self.__iter_helper(
+                filters, vectorized, workers, backend, short_circuit,
+                incremental, coarse_to_fine, None, callback):
+            if match_result.filtered:
+                filtered_collection.add_match_result(variable, match_result)
+            else:
                 non_filtered_collection.add_match_result(variable,
-                                                         MatchResult(
-                                                             None,
-                                                             self._tsc_revised[
-                                                                 variable]))
+                                                         match_result)
         return filtered_collection, non_filtered_collection
@@ -0,0 +1,375 @@
+"""Instrumentation of the loaders and the matcher."""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+class Profiler:
+    """
+    Collects the time, call count and peak memory of named stages, counters,
+    and optionally a cProfile capture, for the loaders and the matcher to report
+    into
+    Stages are timed with the stage() context manager; every timed stage is
+    also recorded as an event for the Chrome trace export
+
+    Attributes
+    ----------
+    _trace_memory : bool
+        whether tracemalloc measures the peak memory of every stage
+    _cprofile : cProfile.Profile
+        the cProfile capture, None if not requested
+    _stats : dict
+        stage name to {"count", "total_seconds", "min_seconds",
+        "max_seconds", "peak_bytes"}
+    _counters : dict
+        counter name to its value
+    _events : list of dict
+        the Chrome trace events of the timed stages
+    _max_events : int
+        the maximum number of events kept; statistics keep accumulating
+    _open_stages : list of dict
+        the "before" traced memory and the "peak" seen so far of every
+        stage running while tracemalloc traces
+
+    Methods
+    -------
+    stage(name, **args)
+        Time a block of code as a stage
+    add(name, seconds, count)
+        Record time measured elsewhere under a stage
+    count(name, n)
+        Increment a counter
+    stats()
+        Get the statistics of every stage
+    counters()
+        Get the value of every counter
+    cprofile_report(limit)
+        Get the cProfile report of the captured code
+    start()
+        Start the tracemalloc and cProfile captures
+    stop()
+        Stop the tracemalloc and cProfile captures
+    to_dict()
+        Get the statistics and counters as a dict
+    to_json(path)
+        Export the statistics and counters as JSON
+    to_chrome_trace(path)
+        Export the timed stages in the Chrome trace event format
+    """
+
+    def __init__(self, trace_memory=False, cprofile=False,
+                 max_events=100000):
+        """
+        Parameters
+        ----------
+        trace_memory : bool
+            if True, tracemalloc measures the peak memory of every stage
+            while the profiler is started; this slows down allocations
+        cprofile : bool
+            if True, cProfile captures every call while the profiler is
+            started
+        max_events : int
+            the maximum number of trace events kept
+        """
+        self._trace_memory = trace_memory
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._stats = {}
+        self._counters = {}
+        self._events = []
+        self._max_events = max_events
+        self._open_stages = []
+        self._started_tracemalloc = False
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the tracemalloc and cProfile captures that were requested
+        """
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        """
+        Stop the tracemalloc and cProfile captures
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def _record(self, name, seconds, count, peak):
+        """
+        Add a measurement to the statistics of a stage
+
+        Parameters
+        ----------
+        name : str
+        seconds : double
+        count : int
+        peak : int
+            the peak traced memory above the start of the stage, 0 if not
+            measured
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {"count": 0, "total_seconds": 0.0,
+                                         "min_seconds": float("inf"),
+                                         "max_seconds": 0.0, "peak_bytes": 0}
+        stats["count"] += count
+        stats["total_seconds"] += seconds
+        per_call = seconds / max(count, 1)
+        stats["min_seconds"] = min(stats["min_seconds"], per_call)
+        stats["max_seconds"] = max(stats["max_seconds"], per_call)
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak)
+
+    def _update_peaks(self):
+        """
+        Carry the traced memory peak over to every open stage, before the
+        peak is reset or read
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for open_stage in self._open_stages:
+            open_stage["peak"] = max(open_stage["peak"], peak)
+
+    def _enter_memory(self):
+        """
+        Start measuring the peak memory of a stage
+
+        Returns
+        -------
+        dict:
+            the "before" traced memory and the "peak" seen so far
+        """
+        with self._lock:
+            # the peak is global: the open stages keep theirs before the
+            # reset, so nested stages are measured as well
+            self._update_peaks()
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            open_stage = {"before": current, "peak": current}
+            self._open_stages.append(open_stage)
+        return open_stage
+
+    def _exit_memory(self, open_stage):
+        """
+        Stop measuring the peak memory of a stage
+
+        Parameters
+        ----------
+        open_stage : dict
+            as returned by _enter_memory
+
+        Returns
+        -------
+        int:
+            the peak traced memory above the start of the stage
+        """
+        with self._lock:
+            self._update_peaks()
+            self._open_stages.remove(open_stage)
+        return open_stage["peak"] - open_stage["before"]
+
+    @contextlib.contextmanager
+    def stage(self, name, **args):
+        """
+        Time a block of code as a stage
+
+        Parameters
+        ----------
+        name : str
+            the name of the stage, measurements of the same name add up
+        args : dict
+            JSON serializable details attached to the trace event
+        """
+        open_stage = self._enter_memory() \
+            if self._trace_memory and tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            end = time.perf_counter()
+            peak = 0 if open_stage is None \
+                else self._exit_memory(open_stage)
+            with self._lock:
+                self._record(name, end - start, 1, peak)
+                if len(self._events) < self._max_events:
+                    event = {"name": name, "ph": "X", "pid": os.getpid(),
+                             "tid": threading.get_ident(),
+                             "ts": (start - self._origin) * 1e6,
+                             "dur": (end - start) * 1e6}
+                    if args or peak:
+                        event["args"] = dict(args)
+                        if peak:
+                            event["args"]["peak_bytes"] = peak
+                    self._events.append(event)
+
+    def add(self, name, seconds, count=1):
+        """
+        Record time measured elsewhere under a stage, without a trace event
+
+        Parameters
+        ----------
+        name : str
+        seconds : double
+            the total time of the calls
+        count : int
+            the number of calls
+        """
+        if count <= 0:
+            return
+        with self._lock:
+            self._record(name, seconds, count, 0)
+
+    def count(self, name, n=1):
+        """
+        Increment a counter
+
+        Parameters
+        ----------
+        name : str
+        n : int
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    @property
+    def stats(self):
+        """
+        Get the statistics of every stage
+
+        Returns
+        -------
+        dict:
+            stage name to its "count", "total_seconds", "min_seconds",
+            "max_seconds" (per call) and "peak_bytes", the largest peak of
+            traced memory above the start of a call
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    @property
+    def counters(self):
+        """
+        Get the value of every counter
+
+        Returns
+        -------
+        dict:
+            counter name to its value
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def cprofile_report(self, limit=30):
+        """
+        Get the cProfile report of the captured code
+
+        Parameters
+        ----------
+        limit : int
+            the number of functions listed, by cumulative time
+
+        Raises
+        ------
+        ValueError:
+            if the profiler was not created with cprofile
+
+        Returns
+        -------
+        str:
+            the report
+        """
+        if self._cprofile is None:
+            raise ValueError("This profiler does not capture cProfile data")
+        stream = io.StringIO()
+        pstats.Stats(self._cprofile, stream=stream) \
+            .sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def to_dict(self):
+        """
+        Get the statistics and counters as a dict
+
+        Returns
+        -------
+        dict:
+            {"stages": stats, "counters": counters}
+        """
+        return {"stages": self.stats, "counters": self.counters}
+
+    def to_json(self, path=None):
+        """
+        Export the statistics and counters as JSON
+
+        Parameters
+        ----------
+        path : str
+            the file to write, if None the JSON is only returned
+
+        Returns
+        -------
+        str:
+            the JSON document
+        """
+        document = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as json_file:
+                json_file.write(document)
+        return document
+
+    def to_chrome_trace(self, path):
+        """
+        Export the timed stages in the Chrome trace event format, for
+        chrome://tracing or Perfetto
+
+        Parameters
+        ----------
+        path : str
+            the file to write
+        """
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"counters": self.counters}}, trace_file)
+
+
+def stage(profiler, name, **args):
+    """
+    Time a block of code as a stage of profiler, or do nothing if profiler
+    is None
+
+    Parameters
+    ----------
+    profiler : Profiler
+    name : str
+    args : dict
+        see Profiler.stage
+
+    Returns
+    -------
+    context manager
+    """
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name, **args)
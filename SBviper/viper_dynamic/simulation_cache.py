@@ -0,0 +1,253 @@
+"""Persistent, content-addressed cache of simulation results."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+
+# 1 GB
+DEFAULT_MAX_BYTES = 1 << 30
+ENTRY_SUFFIX = ".tsc"
+
+
+class SimulationCache:
+    """
+    A size-bounded on-disk cache of TimeSeriesCollections, keyed by a hash
+    of the model text and the simulation parameters
+    Entries are evicted in least recently used order
+
+    Attributes
+    ----------
+    _directory : str
+        the directory holding the cache entries
+    _max_bytes : int
+        the maximum total size of the entries
+    _hits : int
+        the number of lookups that found an entry
+    _misses : int
+        the number of lookups that did not find an entry
+
+    Methods
+    -------
+    directory()
+        Get the directory holding the cache entries
+    hits()
+        Get the number of lookups that found an entry
+    misses()
+        Get the number of lookups that did not find an entry
+    size_bytes()
+        Get the total size of the entries
+    make_key(model_text, **parameters)
+        Compute the cache key of a simulation
+    get(key)
+        Get the cached TimeSeriesCollection of a key
+    put(key, tsc)
+        Store a TimeSeriesCollection under a key
+    clear()
+        Remove every entry
+    __contains__(key)
+    __len__()
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Parameters
+        ----------
+        directory : str
+            the directory holding the cache entries, created if needed
+        max_bytes : int
+            the maximum total size of the entries
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(model_text, **parameters):
+        """
+        Compute the cache key of a simulation
+
+        Parameters
+        ----------
+        model_text : str
+            the text of the model (Antimony or SBML)
+        parameters : dict
+            every setting that influences the simulation result, must be
+            JSON serializable
+
+        Returns
+        -------
+        str:
+            a hex digest identifying the simulation
+        """
+        digest = hashlib.sha256()
+        digest.update(model_text.encode())
+        digest.update(json.dumps(parameters, sort_keys=True,
+                                 default=str).encode())
+        return digest.hexdigest()
+
+    @property
+    def directory(self):
+        """
+        Get the directory holding the cache entries
+
+        Returns
+        -------
+        str:
+            the cache directory
+        """
+        return self._directory
+
+    @property
+    def hits(self):
+        """
+        Get the number of lookups that found an entry
+
+        Returns
+        -------
+        int:
+            the number of cache hits
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Get the number of lookups that did not find an entry
+
+        Returns
+        -------
+        int:
+            the number of cache misses
+        """
+        return self._misses
+
+    @property
+    def size_bytes(self):
+        """
+        Get the total size of the entries
+
+        Returns
+        -------
+        int:
+            the total size of the entries in bytes
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self._directory, key + ENTRY_SUFFIX)
+
+    def _entries(self):
+        """
+        List the entries of the cache
+
+        Returns
+        -------
+        list of (str, int, double):
+            the path, size and last use time of every entry
+        """
+        entries = []
+        for filename in os.listdir(self._directory):
+            if not filename.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self._directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key):
+        """
+        Get the cached TimeSeriesCollection of a key
+
+        Parameters
+        ----------
+        key : str
+            a key from make_key
+
+        Returns
+        -------
+        TimeSeriesCollection:
+            the memory-mapped cached collection, None if not found
+        """
+        path = self._path(key)
+        try:
+            tsc = TimeSeriesCollection.load(path)
+            # the modification time records the last use for eviction
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self._misses += 1
+            return None
+        self._hits += 1
+        return tsc
+
+    def put(self, key, tsc):
+        """
+        Store a TimeSeriesCollection under a key, then evict the least
+        recently used entries until the cache fits in max_bytes
+
+        Parameters
+        ----------
+        key : str
+            a key from make_key
+        tsc : TimeSeriesCollection
+            the collection to store
+        """
+        handle, temp_path = tempfile.mkstemp(dir=self._directory,
+                                             suffix=".tmp")
+        os.close(handle)
+        try:
+            tsc.save(temp_path)
+            # an entry is never visible half written
+            os.replace(temp_path, self._path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._evict(keep=self._path(key))
+
+    def _evict(self, keep=None):
+        """
+        Remove the least recently used entries until the cache fits in
+        max_bytes
+
+        Parameters
+        ----------
+        keep : str
+            the path of an entry that must not be evicted
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self._max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                # still in use on platforms that lock open files
+                continue
+            total -= size
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+    def __contains__(self, key):
+        return os.path.isfile(self._path(key))
+
+    def __len__(self):
+        return len(self._entries())
@@ -0,0 +1,130 @@
+"""Resample TimeSeriesCollections onto a common time grid."""
+
+import numpy as np
+
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+from SBviper.viper_dynamic.time_series.sampling import TIME_ABS_TOL, \
+    search_time_indices
+
+GRID_MODES = ("union", "intersection")
+
+
+def common_time_grid(time_points_a, time_points_b, grid="union",
+                     abs_tol=TIME_ABS_TOL):
+    """
+    Build a time grid on which both time axes can be compared
+    Only the time range covered by both axes is used, so that no value has
+    to be extrapolated
+
+    Parameters
+    ----------
+    time_points_a : numpy.ndarray
+        a sorted time axis
+    time_points_b : numpy.ndarray
+        a sorted time axis
+    grid : str or int
+        "union" for every time point of either axis, "intersection" for the
+        time points present in both axes, or an int for that many evenly
+        spaced time points
+    abs_tol : double
+        the absolute tolerance used to compare time points
+
+    Raises
+    ------
+    ValueError:
+        if grid is invalid, the two axes do not overlap, or grid is
+        "intersection" and they share no time point
+
+    Returns
+    -------
+    numpy.ndarray:
+        the common time grid
+    """
+    time_points_a = np.asarray(time_points_a, dtype=float)
+    time_points_b = np.asarray(time_points_b, dtype=float)
+    start = max(time_points_a[0], time_points_b[0])
+    end = min(time_points_a[-1], time_points_b[-1])
+    if start > end + abs_tol:
+        raise ValueError("The time axes do not overlap")
+    if isinstance(grid, (int, np.integer)) and not isinstance(grid, bool):
+        if grid < 2:
+            raise ValueError("A fixed grid needs at least 2 time points")
+        return np.linspace(start, end, grid)
+    if grid == "intersection":
+        shared = time_points_a[
+            search_time_indices(time_points_b, time_points_a, abs_tol) >= 0]
+        if shared.shape[0] == 0:
+            raise ValueError("The time axes share no time point, use the "
+                             "union or a fixed grid")
+        return shared
+    if grid == "union":
+        merged = np.concatenate((time_points_a, time_points_b))
+        merged = np.sort(merged[(merged >= start - abs_tol) &
+                                (merged <= end + abs_tol)])
+        # time points closer than abs_tol are the same time point
+        keep = np.ones(merged.shape[0], dtype=bool)
+        keep[1:] = np.diff(merged) > abs_tol
+        return merged[keep]
+    raise ValueError("grid must be one of " + ", ".join(GRID_MODES) +
+                     " or a number of time points")
+
+
+def align_collections(tsc_a, tsc_b, grid="union", method="linear",
+                      abs_tol=TIME_ABS_TOL):
+    """
+    Resample two TimeSeriesCollections onto a common time grid
+    Every variable of a collection is resampled in a single vectorized call
+
+    Parameters
+    ----------
+    tsc_a : TimeSeriesCollection
+    tsc_b : TimeSeriesCollection
+    grid : str or int
+        "union", "intersection" or a number of time points, see
+        common_time_grid
+    method : str
+        "linear" (default), "cubic", or "exact" to only accept time points
+        that exist in both collections
+    abs_tol : double
+        the absolute tolerance used to compare time points
+
+    Raises
+    ------
+    ValueError:
+        if a collection does not have a shared time axis, grid is invalid,
+        or the time axes do not overlap or, for "intersection", share no
+        time point
+
+    Returns
+    -------
+    TimeSeriesCollection:
+        tsc_a on the common time grid
+    TimeSeriesCollection:
+        tsc_b on the common time grid
+    """
+    time_grid = common_time_grid(tsc_a.time_points, tsc_b.time_points, grid,
+                                 abs_tol)
+    return (_resample(tsc_a, time_grid, method, abs_tol),
+            _resample(tsc_b, time_grid, method, abs_tol))
+
+
+def _resample(tsc, time_grid, method, abs_tol):
+    """
+    Resample every variable of a TimeSeriesCollection onto time_grid
+
+    Parameters
+    ----------
+    tsc : TimeSeriesCollection
+    time_grid : numpy.ndarray
+    method : str
+    abs_tol : double
+
+    Returns
+    -------
+    TimeSeriesCollection:
+        a new collection on time_grid
+    """
+    values = tsc.get_values_at_times(time_grid, method, abs_tol)
+    return TimeSeriesCollection.from_matrix(time_grid, values,
+                                            list(tsc.variables), copy=False)
@@ -0,0 +1,206 @@
+"""
+Binary on-disk format for TimeSeriesCollections
+
+Layout of a file:
+    magic (8 bytes) | header length (uint32, little endian) | JSON header |
+    time axis block | (variables x time points) values block
+Both blocks are raw little endian float64 arrays aligned to BLOCK_ALIGNMENT
+bytes, so they can be opened with numpy.memmap without reading the file.
+"""
+
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"SBVIPER\x00"
+FORMAT_VERSION = 1
+BLOCK_ALIGNMENT = 64
+DTYPE = np.dtype("<f8")
+
+
+def _align(offset):
+    """
+    Round offset up to the next multiple of BLOCK_ALIGNMENT
+
+    Parameters
+    ----------
+    offset : int
+
+    Returns
+    -------
+    int:
+        the aligned offset
+    """
+    return -(-offset // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def write_collection(path, time_points, values, variables):
+    """
+    Write a time axis and a (variables x time points) array of values to
+    path
+    The file is written next to path and moved into place, so that memory
+    maps of a file being overwritten, e.g. by saving a loaded collection
+    back to its own path, keep their data
+
+    Parameters
+    ----------
+    path : str
+        the path of the file to write
+    time_points : numpy.ndarray
+        the shared time axis
+    values : numpy.ndarray
+        the (variables x time points) array of values
+    variables : list of str
+        the names of the variables, in the order of the rows
+    """
+    time_points = np.asarray(time_points, dtype=DTYPE)
+    values = np.asarray(values, dtype=DTYPE)
+    header = {"version": FORMAT_VERSION,
+              "dtype": DTYPE.str,
+              "n_variables": values.shape[0],
+              "n_time_points": time_points.shape[0],
+              "variables": [str(variable) for variable in variables]}
+    # the offsets depend on the header size, so reserve room for them
+    header["time_offset"] = header["values_offset"] = 0
+    prefix_size = len(MAGIC) + 4 + len(json.dumps(header)) + 40
+    header["time_offset"] = _align(prefix_size)
+    header["values_offset"] = _align(header["time_offset"] +
+                                     time_points.nbytes)
+    header_bytes = json.dumps(header).encode()
+    handle, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as binary_file:
+            binary_file.write(MAGIC)
+            binary_file.write(struct.pack("<I", len(header_bytes)))
+            binary_file.write(header_bytes)
+            binary_file.seek(header["time_offset"])
+            binary_file.write(time_points.tobytes())
+            binary_file.seek(header["values_offset"])
+            # write row by row so that a memmap-backed input is never fully
+            # loaded into memory
+            for row in values:
+                binary_file.write(np.ascontiguousarray(row).tobytes())
+        # mkstemp creates the file readable by its owner only, give it the
+        # permissions open() would have
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        # truncating path in place would pull the pages from under the
+        # memory maps of it
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def read_header(path):
+    """
+    Read the header of a file written by write_collection
+
+    Parameters
+    ----------
+    path : str
+        the path of the file to read
+
+    Raises
+    ------
+    FileNotFoundError:
+        if the file is not found
+    ValueError:
+        if the file is not in this format, or is corrupt or truncated
+
+    Returns
+    -------
+    dict:
+        the decoded header
+    """
+    try:
+        binary_file = open(path, "rb")
+    except OSError:
+        raise FileNotFoundError("File not found, check the path to the file")
+    with binary_file:
+        if binary_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a SBviper time series collection file")
+        try:
+            header_size = struct.unpack("<I", binary_file.read(4))[0]
+            header_bytes = binary_file.read(header_size)
+            if len(header_bytes) != header_size:
+                raise ValueError("the header is cut short")
+            header = json.loads(header_bytes.decode())
+            if not isinstance(header, dict):
+                raise ValueError("the header is not a JSON object")
+        except (struct.error, UnicodeDecodeError, ValueError) as error:
+            raise ValueError("Corrupt or truncated SBviper time series "
+                             "collection file " + str(path)) from error
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported file version " +
+                         str(header.get("version")))
+    return header
+
+
+def read_collection(path, mmap=True):
+    """
+    Read a file written by write_collection
+
+    Parameters
+    ----------
+    path : str
+        the path of the file to read
+    mmap : bool
+        if True (default) the arrays are read-only memory maps of the file
+        and values are only loaded when they are accessed, otherwise they
+        are read into memory
+
+    Raises
+    ------
+    FileNotFoundError:
+        if the file is not found
+    ValueError:
+        if the file is not in this format, or is corrupt or truncated
+
+    Returns
+    -------
+    numpy.ndarray:
+        the time axis
+    numpy.ndarray:
+        the (variables x time points) array of values
+    list of str:
+        the names of the variables, in the order of the rows
+    """
+    header = read_header(path)
+    try:
+        dtype = np.dtype(header["dtype"])
+        n_variables = header["n_variables"]
+        n_time_points = header["n_time_points"]
+        end = max(header["time_offset"] + n_time_points * dtype.itemsize,
+                  header["values_offset"] +
+                  n_variables * n_time_points * dtype.itemsize)
+        variables = header["variables"]
+    except (KeyError, TypeError) as error:
+        raise ValueError("Corrupt SBviper time series collection file " +
+                         str(path)) from error
+    if len(variables) != n_variables or os.path.getsize(path) < end:
+        raise ValueError("Corrupt or truncated SBviper time series "
+                         "collection file " + str(path))
+    if mmap:
+        time_points = np.memmap(path, dtype=dtype, mode="r",
+                                offset=header["time_offset"],
+                                shape=(n_time_points,))
+        if n_variables == 0:
+            values = np.empty((0, n_time_points), dtype=dtype)
+        else:
+            values = np.memmap(path, dtype=dtype, mode="r",
+                               offset=header["values_offset"],
+                               shape=(n_variables, n_time_points))
+    else:
+        time_points = np.fromfile(path, dtype=dtype, count=n_time_points,
+                                  offset=header["time_offset"])
+        values = np.fromfile(path, dtype=dtype,
+                             count=n_variables * n_time_points,
+                             offset=header["values_offset"])
+        values = values.reshape((n_variables, n_time_points))
+    return time_points, values, variables
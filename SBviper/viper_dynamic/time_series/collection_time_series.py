@@ -1,16 +1,42 @@
 import numpy as np
 
+from SBviper.viper_dynamic.time_series.binary_format import \
+    read_collection, write_collection
+from SBviper.viper_dynamic.time_series.csv_reader import \
+    DEFAULT_CHUNK_SIZE, read_csv_columns
+from SBviper.viper_dynamic.time_series.sampling import TIME_ABS_TOL, sample
 from SBviper.viper_dynamic.time_series.time_series import TimeSeries
 
 
 class TimeSeriesCollection:
     """
     Representation of a collection of time series
+    When all of the TimeSeries share one time axis, the collection keeps
+    their values as the rows of a single contiguous 2-D array and every
+    TimeSeries is a view of its row
 
     Attributes
     ----------
     _time_series_dict : dict
         dictionary of variables_str to the corresponding TimeSeries object
+    _time_points : numpy.ndarray
+        the time axis shared by every row of _matrix, None if there is no
+        columnar backend
+    _matrix : numpy.ndarray
+        a (variables x time points) array of values, None if there is no
+        columnar backend
+    _column_index : dict
+        dictionary of variables_str to the corresponding row in _matrix
+    _owns_matrix : bool
+        whether _matrix was allocated by the collection, so that changed
+        rows can be copied into it in place
+    _changed : set
+        the variables added, replaced or written since their row of _matrix
+        was last updated
+    _unbound : set
+        the variables whose TimeSeries is also stored under another
+        variable; it cannot be a view of each row, so it owns its values
+        and their rows are copied on every access
 
     Methods
     -------
@@ -18,12 +44,20 @@ class TimeSeriesCollection:
         Return an array of all variables in the collection
     time_series()
         Return an array of all TimeSeries objects in the collection
+    time_points()
+        Return the time axis shared by all TimeSeries in the collection
+    values_matrix()
+        Return the (variables x time points) array of values
+    get_values_at_times(time_points, method)
+        Get the values of every variable at every time point at once
     size()
         Return the size of the collection
     add_time_series(variable, time_series)
         Add a new TimeSeries object of a variable to this TimeSeriesCollection
     get_time_series(variable)
         Get the corresponding TimeSeries object of the variable
+    save(path)
+        Write the collection to a binary file that load() can memory-map
     __getitem__(variable)
     __setitem__(variable, time_series)
     __len__()
@@ -38,9 +72,53 @@ class TimeSeriesCollection:
             dictionary of variables_str to the corresponding TimeSeries object
         """
         self._time_series_dict = time_series_dict
+        self._time_points = None
+        self._matrix = None
+        self._column_index = {}
+        self._owns_matrix = False
+        self._changed = set()
+        self._unbound = set()
 
     @classmethod
-    def from_nd_array(cls, simulation_result):
+    def from_matrix(cls, time_points, values, variables, copy=True):
+        """
+        Create a TimeSeriesCollection object from a shared time axis and a
+        2-D array of values
+
+        Parameters
+        ----------
+        time_points : numpy.ndarray
+            the time axis shared by all variables
+        values : numpy.ndarray
+            a (variables x time points) array, values[i] belongs to
+            variables[i]
+        variables : list of str
+            the names of the variables
+        copy : bool
+            if True (default) the collection copies the input arrays,
+            otherwise it keeps views of them
+
+        Raises
+        ------
+        ValueError:
+            if the shape of values does not match time_points and variables
+        """
+        if copy:
+            time_points = np.array(time_points, dtype=float)
+            values = np.array(values, dtype=float, order="C")
+        else:
+            time_points = np.asarray(time_points)
+            values = np.asarray(values)
+        if time_points.ndim != 1 or values.ndim != 2 or \
+                values.shape != (len(variables), time_points.shape[0]):
+            raise ValueError("values must be a (variables x time points) "
+                             "array matching time_points and variables")
+        collection = cls({})
+        collection._set_columns(time_points, values, list(variables), copy)
+        return collection
+
+    @classmethod
+    def from_nd_array(cls, simulation_result, copy=True):
         """
         Create a TimeSeriesCollection object from the roadrunner's simulation
         result
@@ -49,26 +127,38 @@ class TimeSeriesCollection:
         ----------
         simulation_result : numpy.ndarray
             the output from simulating the model in roadrunner
+        copy : bool
+            if True (default) the collection copies the simulation result,
+            otherwise every TimeSeries is a read-only view into it
 
         Raises
         ------
         ValueError:
             if the input is not a valid simulation result from roadrunner
         """
-        time_series_dict = \
-            cls._create_dict_from_array(simulation_result,
-                                        simulation_result.colnames)
-        return cls(time_series_dict)
+        time_points, matrix, variables = \
+            cls._create_columns_from_array(simulation_result,
+                                           simulation_result.colnames, copy)
+        return cls.from_matrix(time_points, matrix, variables, copy=False)
 
     @classmethod
-    def from_csv(cls, path):
+    def from_csv(cls, path, variables=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 progress=None):
         """
         Create a TImeSeriesCollection object from csv file
+        The file is parsed in chunks straight into the columnar backend
 
         Parameters
         ----------
         path: str
             the path to the csv file in the current working directory
+        variables: list of str
+            only load these variables, all of them if None
+        chunk_size: int
+            the number of rows parsed at once
+        progress: Function
+            called after every chunk as progress(rows_read, bytes_read,
+            elapsed_seconds), see csv_reader.print_progress
 
         Raises
         ------
@@ -77,15 +167,33 @@ class TimeSeriesCollection:
         ValueError:
             if the input is not a valid simulation result from roadrunner
         """
-        try:
-            simulation_result = np.genfromtxt(path, delimiter=',', names=True)
-        except OSError:
-            raise FileNotFoundError(
-                "File not found, check the path to the CSV file")
-        time_series_dict = \
-            cls._create_dict_from_array(simulation_result,
-                                        simulation_result.dtype.names)
-        return cls(time_series_dict)
+        time_points, matrix, variables = \
+            read_csv_columns(path, variables, chunk_size, progress)
+        return cls.from_matrix(time_points, matrix, variables, copy=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Create a TimeSeriesCollection object from a file written by save()
+
+        Parameters
+        ----------
+        path: str
+            the path to the file
+        mmap: bool
+            if True (default) the file is memory-mapped and the values of a
+            variable are only read from disk when they are accessed
+
+        Raises
+        ------
+        FileNotFoundError:
+            if the file is not found
+        ValueError:
+            if the file is not a saved TimeSeriesCollection, or is corrupt
+            or truncated
+        """
+        time_points, matrix, variables = read_collection(path, mmap)
+        return cls.from_matrix(time_points, matrix, variables, copy=False)
 
     @classmethod
     def from_bio_model(cls, model):
@@ -104,17 +212,21 @@ class TimeSeriesCollection:
         pass
 
     @staticmethod
-    def _create_dict_from_array(simulation_result, col_names):
+    def _create_columns_from_array(simulation_result, col_names, copy=True):
         """
-        Helper function for creating a dict of variables name (str) to the
-        corresponding TimeSeries object
+        Helper function for splitting a simulation result into its time axis
+        and a (variables x time points) array of values
 
         Parameters
         ----------
         simulation_result : numpy.ndarray
-            the output of the simulation
+            the output of the simulation, a 2-D array whose columns are
+            named by col_names
         col_names : list or tuple
             the column names of the simulation result
+        copy : bool
+            if False, a view of simulation_result is returned whenever its
+            layout allows it
 
         Raises
         ------
@@ -123,24 +235,174 @@ class TimeSeriesCollection:
 
         Returns
         -------
-        dict:
-            a dict from variables name (str) to the
-            corresponding TimeSeries object
-        """
-        time_series_dict = {}
-        for col in col_names:
-            if col == "time":
-                continue
-            col_name = col.strip("[]")
-            try:
-                time_series_dict[col_name] = \
-                    TimeSeries(col_name, simulation_result["time"],
-                               simulation_result[col])
-            # input simulation result must match expected format
-            except IndexError:
-                raise ValueError(
-                    "Input must be the simulation result from roadrunner")
-        return time_series_dict
+        numpy.ndarray:
+            the time axis
+        numpy.ndarray:
+            the (variables x time points) array of values
+        list of str:
+            the names of the variables, in the order of the rows
+        """
+        col_names = list(col_names)
+        if "time" not in col_names:
+            raise ValueError(
+                "Input must be the simulation result from roadrunner")
+        time_col = col_names.index("time")
+        value_cols = [i for i in range(len(col_names)) if i != time_col]
+        variables = [col_names[i].strip("[]") for i in value_cols]
+        try:
+            array = np.asarray(simulation_result)
+            time_points = array[:, time_col]
+            if not copy and time_col == 0:
+                # the values are a plain slice, keep them as a view
+                matrix = array[:, 1:].T
+            else:
+                matrix = np.ascontiguousarray(array[:, value_cols].T,
+                                              dtype=float)
+        # input simulation result must match expected format
+        except (IndexError, ValueError):
+            raise ValueError(
+                "Input must be the simulation result from roadrunner")
+        if copy:
+            time_points = np.array(time_points, dtype=float)
+        return time_points, matrix, variables
+
+    def _set_columns(self, time_points, matrix, variables, owned):
+        """
+        Install a new columnar backend and make every TimeSeries of the
+        collection a view of its row
+        TimeSeries objects already in the collection are rebound in place
+
+        Parameters
+        ----------
+        time_points : numpy.ndarray
+            the shared time axis
+        matrix : numpy.ndarray
+            the (variables x time points) array of values
+        variables : list of str
+            the names of the variables, in the order of the rows
+        owned : bool
+            whether matrix was allocated for this collection
+        """
+        self._time_points = time_points
+        self._matrix = matrix
+        self._owns_matrix = owned
+        self._column_index = {}
+        self._changed.clear()
+        self._unbound.clear()
+        for row, variable in enumerate(variables):
+            self._column_index[variable] = row
+            if variable not in self._time_series_dict:
+                self._time_series_dict[variable] = \
+                    TimeSeries(variable, time_points, matrix[row], copy=False)
+            self._bind(row, variable)
+
+    def _bind(self, row, variable):
+        """
+        Make the TimeSeries of a variable a view of its row, unless it is
+        also stored under another variable of the collection
+
+        Parameters
+        ----------
+        row : int
+        variable : str
+        """
+        if variable in self._unbound:
+            return
+        time_series = self._time_series_dict[variable]
+        other = time_series._owner_key
+        if time_series._owner is self._changed and other != variable and \
+                self._time_series_dict.get(other) is time_series:
+            # a write could only tell one of the rows, copy both on every
+            # access instead
+            time_series._ensure_owned()
+            self._unbound.update((variable, other))
+            return
+        time_series._rebind(self._time_points, self._matrix[row],
+                            self._changed, variable)
+
+    def _sync_columns(self):
+        """
+        Bring the columnar backend up to date with the TimeSeries of the
+        collection
+        The TimeSeries tell the collection when they stop being a view of
+        their row, so only the changed rows are copied; the matrix is only
+        rebuilt when there is none, a variable was added, or the matrix is
+        not owned by the collection
+
+        Raises
+        ------
+        ValueError:
+            if the TimeSeries do not share a common time axis
+        """
+        if self._matrix is not None and not self._changed and \
+                not self._unbound:
+            return
+        changed = self._changed | self._unbound
+        if self._matrix is not None and self._owns_matrix and \
+                all(variable in self._column_index for variable in changed):
+            changed = [(variable, self._column_index[variable],
+                        self._time_series_dict[variable])
+                       for variable in changed]
+            for _, _, time_series in changed:
+                if not np.array_equal(time_series.time_points,
+                                      self._time_points):
+                    raise ValueError("TimeSeries in the collection do not "
+                                     "share a common time axis")
+            for variable, row, time_series in changed:
+                self._matrix[row] = time_series.values
+                self._changed.discard(variable)
+                self._bind(row, variable)
+            return
+        all_time_series = list(self._time_series_dict.values())
+        if len(all_time_series) == 0:
+            raise ValueError("The collection is empty")
+        time_points = all_time_series[0].time_points
+        for time_series in all_time_series[1:]:
+            if not np.array_equal(time_series.time_points, time_points):
+                raise ValueError("TimeSeries in the collection do not share "
+                                 "a common time axis")
+        matrix = np.array([time_series.values
+                           for time_series in all_time_series], dtype=float)
+        self._set_columns(np.array(time_points), matrix,
+                          list(self._time_series_dict.keys()), True)
+
+    @property
+    def time_points(self):
+        """
+        Return the time axis shared by all TimeSeries in the collection
+
+        Raises
+        ------
+        ValueError:
+            if the TimeSeries do not share a common time axis
+
+        Returns
+        -------
+        numpy.ndarray:
+            a read-only view of the shared time axis
+        """
+        self._sync_columns()
+        return TimeSeries._read_only_view(self._time_points)
+
+    @property
+    def values_matrix(self):
+        """
+        Return the values of every TimeSeries as a single 2-D array
+        Row i holds the values of variables[i]
+
+        Raises
+        ------
+        ValueError:
+            if the TimeSeries do not share a common time axis
+
+        Returns
+        -------
+        numpy.ndarray:
+            a read-only (variables x time points) view of the values; the
+            rows of TimeSeries written later are updated in place
+        """
+        self._sync_columns()
+        return TimeSeries._read_only_view(self._matrix)
 
     @property
     def variables(self):
@@ -178,6 +440,38 @@ class TimeSeriesCollection:
         """
         return len(self._time_series_dict)
 
+    def get_values_at_times(self, time_points, method="exact",
+                            abs_tol=TIME_ABS_TOL):
+        """
+        Get the values of every variable at every time point at once
+
+        Parameters
+        ------
+        time_points : numpy.ndarray
+            an array of time points to look up
+        method : str
+            "exact" (default) to only accept time points of the simulation,
+            "linear" or "cubic" to interpolate the time points in between
+        abs_tol : double
+            the absolute tolerance used to compare time points
+
+        Raises
+        ------
+        ValueError:
+            if the TimeSeries do not share a common time axis, if method is
+            "exact" and a time point does not exist in the simulation data,
+            or if a time point is outside of it
+
+        Returns
+        -------
+        numpy.ndarray:
+            a (variables x time_points) array of values, row i belongs to
+            variables[i]
+        """
+        self._sync_columns()
+        return sample(self._time_points, self._matrix, time_points, method,
+                      abs_tol)
+
     def add_time_series(self, variable, time_series):
         """
         Add a new TimeSeries object of a variable to this TimeSeriesCollection
@@ -195,7 +489,15 @@ class TimeSeriesCollection:
             if the input is not a valid TimeSeries object
         """
         if isinstance(time_series, TimeSeries):
+            previous = self._time_series_dict.get(variable)
+            if previous is not None and previous is not time_series and \
+                    previous._owner is self._changed and \
+                    previous._owner_key == variable:
+                # its row is about to be overwritten in place
+                previous._ensure_owned()
+            self._unbound.discard(variable)
             self._time_series_dict[variable] = time_series
+            self._changed.add(variable)
         else:
             raise ValueError("Input must be a valid TimeSeries object")
 
@@ -218,6 +520,24 @@ class TimeSeriesCollection:
         except KeyError:
             return None
 
+    def save(self, path):
+        """
+        Write the collection to a binary file that load() can memory-map
+
+        Parameters
+        ------
+        path : str
+            the path of the file to write
+
+        Raises
+        ------
+        ValueError:
+            if the TimeSeries do not share a common time axis
+        """
+        self._sync_columns()
+        write_collection(path, self._time_points, self._matrix,
+                         list(self._time_series_dict.keys()))
+
     def __getitem__(self, variable):
         return self.get_time_series(variable)
 
@@ -0,0 +1,116 @@
+"""Chunked reader for simulation results stored as CSV."""
+
+import time
+import warnings
+
+import numpy as np
+
+# number of rows parsed per call to numpy
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def read_csv_columns(path, variables=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     progress=None):
+    """
+    Read a CSV file with a "time" column into a time axis and a
+    (variables x time points) array of values
+    The file is parsed chunk by chunk straight into the column buffers, so
+    only the requested columns are ever held in memory
+
+    Parameters
+    ----------
+    path : str
+        the path to the csv file
+    variables : list of str
+        the variables to load, all of them if None
+    chunk_size : int
+        the number of rows parsed at once
+    progress : Function
+        called after every chunk as progress(rows_read, bytes_read,
+        elapsed_seconds)
+
+    Raises
+    ------
+    FileNotFoundError:
+        if the csv file is not found
+    ValueError:
+        if the file has no "time" column, a requested variable is missing
+        or a row cannot be parsed
+
+    Returns
+    -------
+    numpy.ndarray:
+        the time axis
+    numpy.ndarray:
+        the (variables x time points) array of values
+    list of str:
+        the names of the variables, in the order of the rows
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    try:
+        # binary mode keeps tell() usable while numpy iterates the file
+        csv_file = open(path, "rb")
+    except OSError:
+        raise FileNotFoundError(
+            "File not found, check the path to the CSV file")
+    with csv_file:
+        col_names = [col.strip().strip("[]")
+                     for col in csv_file.readline().decode().split(",")]
+        if "time" not in col_names:
+            raise ValueError("The CSV file must have a time column")
+        time_col = col_names.index("time")
+        if variables is None:
+            variables = [col for col in col_names if col != "time"]
+        else:
+            variables = list(variables)
+            missing = [variable for variable in variables
+                       if variable not in col_names]
+            if missing:
+                raise ValueError("Variables not found in the CSV file: " +
+                                 ", ".join(missing))
+        use_cols = [time_col] + [col_names.index(variable)
+                                 for variable in variables]
+        # row 0 is the time axis, rows 1.. are the variables
+        buffer = np.empty((len(use_cols), chunk_size))
+        rows_read = 0
+        start = time.perf_counter()
+        while True:
+            with warnings.catch_warnings():
+                # numpy warns when the last chunk is empty
+                warnings.simplefilter("ignore", UserWarning)
+                chunk = np.loadtxt(csv_file, delimiter=",", usecols=use_cols,
+                                   ndmin=2, max_rows=chunk_size)
+            if chunk.shape[0] == 0:
+                break
+            if rows_read + chunk.shape[0] > buffer.shape[1]:
+                # grow geometrically to keep the copies amortized
+                grown = np.empty((buffer.shape[0], 2 * buffer.shape[1]))
+                grown[:, :rows_read] = buffer[:, :rows_read]
+                buffer = grown
+            buffer[:, rows_read:rows_read + chunk.shape[0]] = chunk.T
+            rows_read += chunk.shape[0]
+            if progress is not None:
+                progress(rows_read, csv_file.tell(),
+                         time.perf_counter() - start)
+            if chunk.shape[0] < chunk_size:
+                break
+    if rows_read < buffer.shape[1]:
+        buffer = buffer[:, :rows_read].copy()
+    return buffer[0], buffer[1:], variables
+
+
+def print_progress(rows_read, bytes_read, elapsed_seconds):
+    """
+    A progress callback for read_csv_columns that prints the throughput
+
+    Parameters
+    ----------
+    rows_read : int
+    bytes_read : int
+    elapsed_seconds : double
+    """
+    elapsed_seconds = max(elapsed_seconds, 1e-9)
+    print("%d rows, %.1f MB in %.2f s (%.1f MB/s)" %
+          (rows_read, bytes_read / 1e6, elapsed_seconds,
+           bytes_read / 1e6 / elapsed_seconds))
@@ -0,0 +1,103 @@
+"""
+Multi-resolution min/max pyramids of time series
+
+Level 0 holds the values themselves, and every block of level k + 1 covers
+blocks 2j and 2j + 1 of level k with their minimum and maximum, down to a
+single block. Two time series of the same length have pyramids with the
+same block structure, which allows bounding their pointwise differences
+from the coarse levels.
+"""
+
+import numpy as np
+
+
+def build_pyramid(values):
+    """
+    Build the min/max pyramid of a time series
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the values of the time series
+
+    Returns
+    -------
+    tuple of (numpy.ndarray, numpy.ndarray):
+        the (lower, upper) envelopes of every level, the finest first;
+        level 0 shares the memory of values
+    """
+    values = np.asarray(values, dtype=float)
+    levels = [(values, values)]
+    lower, upper = values, values
+    while lower.shape[0] > 1:
+        if lower.shape[0] % 2:
+            # repeating the last value changes neither minimum nor maximum
+            lower = np.append(lower, lower[-1])
+            upper = np.append(upper, upper[-1])
+        lower = np.minimum(lower[0::2], lower[1::2])
+        upper = np.maximum(upper[0::2], upper[1::2])
+        levels.append((lower, upper))
+    return tuple(levels)
+
+
+def linf_pyramid_bounds(pyramid_a, pyramid_b, tol):
+    """
+    Bound the maximum absolute difference of two time series of the same
+    length from their pyramids, descending from the coarsest level only
+    into the blocks that may still hold a difference of at least tol
+    The bounds are refined until they are on the same side of tol, at
+    worst down to level 0 where they are exact
+
+    Parameters
+    ----------
+    pyramid_a : tuple of (numpy.ndarray, numpy.ndarray)
+        the pyramid of one time series, from build_pyramid
+    pyramid_b : tuple of (numpy.ndarray, numpy.ndarray)
+        the pyramid of the other time series
+    tol : double
+
+    Raises
+    ------
+    ValueError:
+        if the time series do not have the same length
+
+    Returns
+    -------
+    double:
+        a lower bound of the maximum absolute difference
+    double:
+        an upper bound of the maximum absolute difference; either the
+        lower bound is at least tol or the upper bound is below it
+    """
+    if pyramid_a[0][0].shape != pyramid_b[0][0].shape:
+        raise ValueError("The length of both time series needs to be the same!")
+    if pyramid_a[0][0].shape[0] == 0:
+        return 0.0, 0.0
+    # blocks that were dropped bound the difference from above for good
+    lower_bound = settled_upper = 0.0
+    candidates = None
+    for level in range(len(pyramid_a) - 1, -1, -1):
+        lower_a, upper_a = pyramid_a[level]
+        lower_b, upper_b = pyramid_b[level]
+        if candidates is not None:
+            lower_a, upper_a = lower_a[candidates], upper_a[candidates]
+            lower_b, upper_b = lower_b[candidates], upper_b[candidates]
+        block_lower = np.maximum(lower_a - upper_b, lower_b - upper_a)
+        block_upper = np.maximum(upper_a - lower_b, upper_b - lower_a)
+        lower_bound = max(lower_bound, float(block_lower.max()))
+        if lower_bound >= tol:
+            return lower_bound, max(settled_upper, float(block_upper.max()))
+        keep = block_upper >= tol
+        if not keep.all():
+            settled_upper = max(settled_upper,
+                                float(block_upper[~keep].max()))
+        if not keep.any():
+            return lower_bound, settled_upper
+        kept = np.flatnonzero(keep) if candidates is None \
+            else candidates[keep]
+        if level > 0:
+            children = np.concatenate((2 * kept, 2 * kept + 1))
+            candidates = np.sort(
+                children[children < pyramid_a[level - 1][0].shape[0]])
+    # unreachable: at level 0 the block bounds are exact
+    return lower_bound, max(settled_upper, lower_bound)
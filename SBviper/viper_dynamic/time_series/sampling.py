@@ -0,0 +1,119 @@
+"""Vectorized lookup and interpolation of values on a time grid."""
+
+import numpy as np
+
+# absolute tolerance, in time units, of matching a requested time point to
+# a simulated one; it absorbs the rounding of generated and parsed time
+# grids, and stays far below the spacing of any simulation grid
+TIME_ABS_TOL = 0.00003
+
+SAMPLING_METHODS = ("exact", "linear", "cubic")
+
+
+def search_time_indices(time_grid, query_times, abs_tol=TIME_ABS_TOL):
+    """
+    Get the index of every query time in a sorted time grid
+
+    Parameters
+    ----------
+    time_grid : numpy.ndarray
+        a sorted 1-D array of time points, the result is undefined if not
+        sorted
+    query_times : array like
+        the time points to look up
+    abs_tol : double
+        the absolute tolerance used to compare time points
+
+    Returns
+    -------
+    numpy.ndarray(int):
+        for every query time, the index of the closest grid point within
+        abs_tol, or -1 if no such point exists
+    """
+    time_grid = np.asarray(time_grid)
+    query_times = np.asarray(query_times, dtype=float)
+    if time_grid.shape[0] == 0:
+        return np.full(query_times.shape, -1, dtype=np.intp)
+    right = np.searchsorted(time_grid, query_times)
+    right = np.clip(right, 0, time_grid.shape[0] - 1)
+    left = np.clip(right - 1, 0, time_grid.shape[0] - 1)
+    # the closest grid point is either just before or just after the query
+    use_left = np.abs(time_grid[left] - query_times) <= \
+        np.abs(time_grid[right] - query_times)
+    nearest = np.where(use_left, left, right)
+    found = np.abs(time_grid[nearest] - query_times) <= abs_tol
+    return np.where(found, nearest, -1)
+
+
+def sample(time_grid, values, query_times, method="exact",
+           abs_tol=TIME_ABS_TOL):
+    """
+    Get the values at the query times, for one or many series sharing the
+    same time grid
+
+    Parameters
+    ----------
+    time_grid : numpy.ndarray
+        a sorted 1-D array of time points
+    values : numpy.ndarray
+        an array of values whose last axis corresponds to time_grid, either
+        a single series or a (series x time points) array
+    query_times : array like
+        the time points to sample
+    method : str
+        "exact" to only accept query times on the grid, "linear" or "cubic"
+        to interpolate query times that are not on the grid; "cubic"
+        requires scipy
+    abs_tol : double
+        the absolute tolerance used to compare time points
+
+    Raises
+    ------
+    ValueError:
+        if method is unknown, if method is "exact" and a query time does not
+        exist in time_grid, or if a query time is outside of time_grid
+    ImportError:
+        if method is "cubic" and scipy is not installed
+
+    Returns
+    -------
+    numpy.ndarray:
+        the sampled values, the last axis corresponds to query_times
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError("method must be one of " + ", ".join(
+            SAMPLING_METHODS))
+    time_grid = np.asarray(time_grid)
+    values = np.asarray(values)
+    query_times = np.asarray(query_times, dtype=float)
+    indices = search_time_indices(time_grid, query_times, abs_tol)
+    on_grid = indices >= 0
+    if np.all(on_grid):
+        return values[..., indices]
+    if method == "exact":
+        raise ValueError("Input time_point does not exist in the "
+                         "simulation data")
+    if time_grid.shape[0] < 2 or \
+            np.any(query_times < time_grid[0] - abs_tol) or \
+            np.any(query_times > time_grid[-1] + abs_tol):
+        raise ValueError("Input time_point is outside of the simulation "
+                         "data")
+    if method == "cubic":
+        # scipy is only needed for cubic interpolation
+        try:
+            from scipy.interpolate import CubicSpline
+        except ImportError as error:
+            raise ImportError("Cubic interpolation requires scipy, install "
+                              "it with pip install scipy") from error
+        result = CubicSpline(time_grid, values, axis=-1)(query_times)
+    else:
+        left = np.searchsorted(time_grid, query_times, side="right") - 1
+        left = np.clip(left, 0, time_grid.shape[0] - 2)
+        step = time_grid[left + 1] - time_grid[left]
+        weight = np.divide(query_times - time_grid[left], step,
+                           out=np.zeros_like(query_times), where=step != 0)
+        result = values[..., left] * (1 - weight) + \
+            values[..., left + 1] * weight
+    # grid points are returned as they are, without interpolation error
+    result[..., on_grid] = values[..., indices[on_grid]]
+    return result
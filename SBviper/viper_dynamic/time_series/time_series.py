@@ -1,6 +1,10 @@
+import hashlib
+
 import numpy
-import copy
-import math
+
+from SBviper.viper_dynamic.time_series.pyramid import build_pyramid
+from SBviper.viper_dynamic.time_series.sampling import TIME_ABS_TOL, \
+    sample, search_time_indices
 
 
 class TimeSeries:
@@ -18,6 +22,11 @@ class TimeSeries:
     _values : numpy.ndarray
         an array of values for the simulation corresponding to time_points
         values[0] represents the value of the specie at time[0]
+    _owner : set
+        the changed variables of the TimeSeriesCollection whose row this
+        TimeSeries is a view of, None if it is not a row of a collection
+    _owner_key : str
+        the variable this TimeSeries is stored under in that collection
 
     Methods
     -------
@@ -27,19 +36,29 @@ class TimeSeries:
         Get an array of *the current* time points for this TimeSeries
     values()
         Get an array of *the current* values for this TimeSeries
+    is_view()
+        Whether this TimeSeries still shares its buffers with another owner
+    fingerprint()
+        A digest of the time points and values of this TimeSeries
+    pyramid()
+        The multi-resolution min/max envelopes of the values
     size()
         The size of the current TimeSeries
     get_value_at_time(time_point)
         Get the value at the specified time_point
+    get_values_at_times(time_points, method)
+        Get the values at every time point in time_points at once
     replace_values_at_times(time_points, new_values)
         Replace the value at time points in time_points with values
         in new_values
+    copy()
+        Return an independent TimeSeries that owns its own buffers
     __getitem__(time_point)
     __setitem__(time_point, new_value)
     __len__()
     """
 
-    def __init__(self, variable, time_points, values):
+    def __init__(self, variable, time_points, values, copy=True):
         """
         Parameters
         ----------
@@ -49,44 +68,96 @@ class TimeSeries:
             an array of time points for the simulation
         values : numpy.ndarray
             an array of values for the simulation corresponding to time_points
+        copy : bool
+            if True (default) the TimeSeries owns private copies of
+            time_points and values; if False it keeps views of the input
+            arrays and only copies values the first time they are mutated
+            (copy-on-write)
         """
         self._variable = variable
-        self._time_points = copy.deepcopy(time_points)
-        self._values = copy.deepcopy(values)
+        if copy:
+            self._time_points = numpy.array(time_points)
+            self._values = numpy.array(values)
+        else:
+            self._time_points = numpy.asarray(time_points)
+            self._values = numpy.asarray(values)
+        # time points are never mutated in place, so they can always be
+        # shared; values are shared until the first write
+        self._shared = not copy
+        self._owner = None
+        self._owner_key = None
+        self._fingerprint = None
+        self._pyramid = None
 
     @staticmethod
-    def _binary_search(array, target):
+    def _read_only_view(array):
         """
-        Get the index of the target in the input array
+        Get a read-only view of the input array without copying it
 
         Parameters
         -------
-        array : 1-D array (numpy.ndarray)
-            a sorted 1-D array, the result is undefined if not sorted
-        target : int
-            the target value to find in the array
+        array : numpy.ndarray
+            the array to be viewed
 
         Returns
         -------
-        int:
-            the index of the target value in the input array
-            if duplicates exists, any could be returned
-            if no such value exists in the array, -1 is returned
-            if the input array is not sorted, the return value is undefined
-        """
-        left = 0
-        right = len(array) - 1
-        while left <= right:
-            mid = int(left + (right - left) / 2)
-            # value is compared with an absolute tolerance
-            # TODO: confirm abs_tol
-            if math.isclose(array[mid], target, abs_tol=0.00003):
-                return mid
-            elif array[mid] > target:
-                right = mid - 1
-            else:
-                left = mid + 1
-        return -1
+        numpy.ndarray:
+            a view of array that cannot be written to
+        """
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def _ensure_owned(self):
+        """
+        Copy the values into a private buffer if they are still shared, so
+        that the following write does not leak into the other owners
+        """
+        if self._shared:
+            self._values = numpy.array(self._values)
+            self._shared = False
+            # no longer a view of its row, the collection has to copy it back
+            self._set_owner(None, None)
+
+    def _set_owner(self, owner, key):
+        """
+        Record the collection whose row this TimeSeries is a view of
+        The previous collection, if any, is told that its row is no longer
+        viewed by this TimeSeries
+
+        Parameters
+        -------
+        owner : set
+            the changed variables of the collection, None if the TimeSeries
+            is not a row of a collection
+        key : str
+            the variable this TimeSeries is stored under in the collection
+        """
+        if self._owner is not None and \
+                (self._owner is not owner or self._owner_key != key):
+            self._owner.add(self._owner_key)
+        self._owner = owner
+        self._owner_key = key
+
+    def _rebind(self, time_points, values, owner=None, key=None):
+        """
+        Attach this TimeSeries to new shared buffers without copying
+
+        Parameters
+        -------
+        time_points : numpy.ndarray
+        values : numpy.ndarray
+        owner : set
+            the changed variables of the collection values is a row of
+        key : str
+            the variable this TimeSeries is stored under in that collection
+        """
+        self._time_points = time_points
+        self._values = values
+        self._shared = True
+        self._fingerprint = None
+        self._pyramid = None
+        self._set_owner(owner, key)
 
     @property
     def variable(self):
@@ -108,9 +179,9 @@ class TimeSeries:
         Returns
         -------
         numpy.ndarray:
-            a deep copy of the array of time points
+            a read-only view of the array of time points
         """
-        return copy.deepcopy(self._time_points)
+        return self._read_only_view(self._time_points)
 
     @property
     def values(self):
@@ -120,10 +191,60 @@ class TimeSeries:
         Returns
         -------
         numpy.ndarray:
-            a deep copy of the array of values for the simulation
-            corresponding to time_points
+            a read-only view of the array of values for the simulation
+            corresponding to time_points, use copy() for a writable version
         """
-        return copy.deepcopy(self._values)
+        return self._read_only_view(self._values)
+
+    @property
+    def is_view(self):
+        """
+        Whether the values of this TimeSeries are still shared with the
+        array it was created from
+
+        Returns
+        -------
+        bool:
+            True if the values have not been copied yet
+        """
+        return self._shared
+
+    @property
+    def fingerprint(self):
+        """
+        A digest of the time points and values of this TimeSeries
+        It is computed once and reset when the values are written through
+        this TimeSeries
+
+        Returns
+        -------
+        str:
+            a hex digest, equal for TimeSeries with identical content
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for array in (self._time_points, self._values):
+                digest.update(array.dtype.str.encode())
+                digest.update(numpy.ascontiguousarray(array))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def pyramid(self):
+        """
+        The multi-resolution min/max envelopes of the values, see
+        pyramid.build_pyramid
+        It is built once and reset when the values are written through
+        this TimeSeries
+
+        Returns
+        -------
+        tuple of (numpy.ndarray, numpy.ndarray):
+            the (lower, upper) envelopes of every level, the finest first
+        """
+        if self._pyramid is None:
+            self._pyramid = build_pyramid(self._read_only_view(self._values))
+        return self._pyramid
 
     @property
     def size(self):
@@ -151,11 +272,36 @@ class TimeSeries:
         numpy.float64:
             the value at the specified time_point, or None if not exist
         """
-        index = self._binary_search(self._time_points, time_point)
-        if index == -1:
-            raise ValueError("Input time_point does not exist in the "
-                             "simulation data")
-        return self._values[index]
+        return self.get_values_at_times(numpy.array([time_point]))[0]
+
+    def get_values_at_times(self, time_points, method="exact",
+                            abs_tol=TIME_ABS_TOL):
+        """
+        Get the values at every time point in time_points at once
+
+        Parameters
+        -------
+        time_points : numpy.ndarray
+            an array of time points to look up
+        method : str
+            "exact" (default) to only accept time points of the simulation,
+            "linear" or "cubic" to interpolate the time points in between
+        abs_tol : double
+            the absolute tolerance used to compare time points
+
+        Raises
+        ------
+        ValueError:
+            if method is "exact" and a time point does not exist in the
+            simulation data, or if a time point is outside of it
+
+        Returns
+        -------
+        numpy.ndarray:
+            the values corresponding to time_points
+        """
+        return sample(self._time_points, self._values, time_points, method,
+                      abs_tol)
 
     def replace_values_at_times(self, time_points, new_values):
         """
@@ -173,26 +319,38 @@ class TimeSeries:
         ValueError:
             if the input time_points does not exist in the simulation data
         """
-        if len(time_points) < 0 or len(new_values) < 0:
-            raise ValueError("Input data cannot be empty")
-        original_index = self._binary_search(self._time_points, time_points[0])
-        if original_index == -1:
+        if len(time_points) != len(new_values):
+            raise ValueError("time_points and new_values must have the same "
+                             "length")
+        indices = search_time_indices(self._time_points, time_points)
+        if numpy.any(indices == -1):
             raise ValueError("Input time_point does not exist in the "
                              "simulation data")
-        for i in range(len(time_points)):
-            # value is compared with an absolute tolerance
-            if original_index >= len(self._time_points) or \
-                    not math.isclose(self._time_points[original_index],
-                                     time_points[i], abs_tol=0.00003):
-                raise ValueError("Input time_point does not exist in the "
-                                 "simulation data")
-            self._values[original_index] = new_values[i]
-            original_index += 1
+        self._ensure_owned()
+        self._fingerprint = None
+        self._pyramid = None
+        self._values[indices] = new_values
+
+    def copy(self):
+        """
+        Return an independent TimeSeries that owns its own buffers
+
+        Returns
+        -------
+        TimeSeries:
+            a copy of this TimeSeries
+        """
+        return TimeSeries(self._variable, self._time_points, self._values)
 
     def __getitem__(self, time_point):
-        return self._values[time_point]
+        # slices of the shared buffer must not be writable, writes have to
+        # go through __setitem__ to copy on write
+        return self._read_only_view(self._values)[time_point]
 
     def __setitem__(self, time_point, new_value):
+        self._ensure_owned()
+        self._fingerprint = None
+        self._pyramid = None
         self._values[time_point] = new_value
 
     def __len__(self):
@@ -1,10 +1,19 @@
 """Commonly used utilities."""
 
+import asyncio
+import functools
 import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from SBviper.viper_dynamic.profiling import stage
+from SBviper.viper_dynamic.simulation_cache import SimulationCache
 from SBviper.viper_dynamic.time_series.collection_time_series import \
     TimeSeriesCollection
 import tellurium as te
 
+MODEL_LOADERS = {"antimony": te.loada, "sbml": te.loadSBMLModel}
+
 
 def get_abs_path(filename):
     """
@@ -24,7 +33,284 @@ def get_abs_path(filename):
     return os.path.join(dirname, filename)
 
 
-def get_tsc_from_Ant(original_path, revised_path):
+def _cache_key(model_text, model_format, settings):
+    """
+    Compute the SimulationCache key of a simulation
+
+    Parameters
+    ----------
+    model_text: str
+        the Antimony or SBML text of the model
+    model_format: str
+        "antimony" or "sbml"
+    settings: dict
+        the simulation settings of simulate_model
+
+    Returns
+    -------
+    str:
+        the cache key
+    """
+    settings = {"start": 0, "end": 100, "points": 1000, "selections": None,
+                "integrator": None, "integrator_settings": None, **settings}
+    return SimulationCache.make_key(model_text, model_format=model_format,
+                                    tellurium_version=te.__version__,
+                                    **settings)
+
+
+def simulate_model(model_text, model_format="antimony", start=0, end=100,
+                   points=1000, selections=None, integrator=None,
+                   integrator_settings=None, cache=None, profiler=None):
+    """
+    Simulate a model and return the result as a TimeSeriesCollection
+
+    Parameters
+    ----------
+    model_text: str
+        the Antimony or SBML text of the model
+    model_format: str
+        "antimony" or "sbml"
+    start: double
+        simulation start time
+    end: double
+        simulation end time
+    points: int
+        number of time points of the simulation
+    selections: list of str
+        the columns to simulate, roadrunner's default if None
+    integrator: str
+        the name of the roadrunner integrator, roadrunner's default if None
+    integrator_settings: dict
+        integrator setting name to value, e.g. {"relative_tolerance": 1e-8}
+    cache: SimulationCache
+        if given, the result is looked up in and stored to the cache
+    profiler: Profiler
+        if given, the stages of the simulation are timed into it
+
+    Raises
+    ------
+    ValueError:
+        invalid model_format
+
+    Returns
+    -------
+    TimeSeriesCollection:
+        the simulation result
+    """
+    if model_format not in MODEL_LOADERS:
+        raise ValueError("model_format must be one of " +
+                         ", ".join(MODEL_LOADERS))
+    settings = {"start": start, "end": end, "points": points,
+                "selections": selections, "integrator": integrator,
+                "integrator_settings": integrator_settings}
+    key = None
+    if cache is not None:
+        key = _cache_key(model_text, model_format, settings)
+        with stage(profiler, "simulation_cache.get"):
+            tsc = cache.get(key)
+        if tsc is not None:
+            return tsc
+    with stage(profiler, "load_model", model_format=model_format):
+        model = MODEL_LOADERS[model_format](model_text)
+        if integrator is not None:
+            model.setIntegrator(integrator)
+        for name, value in (integrator_settings or {}).items():
+            model.integrator.setValue(name, value)
+    with stage(profiler, "simulate", points=points):
+        if selections is None:
+            result = model.simulate(start, end, points)
+        else:
+            result = model.simulate(start, end, points, selections)
+    with stage(profiler, "create_collection"):
+        tsc = TimeSeriesCollection.from_nd_array(result)
+    if cache is not None:
+        with stage(profiler, "simulation_cache.put"):
+            cache.put(key, tsc)
+    return tsc
+
+
+def _simulate_to_shared_memory(model_text, model_format, settings):
+    """
+    Process pool worker: simulate a model and place the result in a new
+    shared memory block instead of pickling it back to the parent
+
+    Parameters
+    ----------
+    model_text: str
+        the Antimony or SBML text of the model
+    model_format: str
+        "antimony" or "sbml"
+    settings: dict
+        keyword arguments of simulate_model
+
+    Returns
+    -------
+    str:
+        the name of the shared memory block, holding the time axis followed
+        by the (variables x time points) values as float64
+    list of str:
+        the names of the variables
+    int:
+        the number of time points
+    """
+    tsc = simulate_model(model_text, model_format, **settings)
+    matrix = tsc.values_matrix
+    n_variables, n_time_points = matrix.shape
+    block = shared_memory.SharedMemory(
+        create=True, size=max(8 * n_time_points * (n_variables + 1), 1))
+    buffer = np.ndarray((n_variables + 1, n_time_points), dtype=np.float64,
+                        buffer=block.buf)
+    buffer[0] = tsc.time_points
+    buffer[1:] = matrix
+    del buffer
+    block.close()
+    return block.name, list(tsc.variables), n_time_points
+
+
+def _collect_from_shared_memory(name, variables, n_time_points):
+    """
+    Copy a simulation result out of a shared memory block written by
+    _simulate_to_shared_memory and release the block
+
+    Parameters
+    ----------
+    name: str
+        the name of the shared memory block
+    variables: list of str
+        the names of the variables
+    n_time_points: int
+        the number of time points
+
+    Returns
+    -------
+    TimeSeriesCollection:
+        the simulation result
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        buffer = np.ndarray((len(variables) + 1, n_time_points),
+                            dtype=np.float64, buffer=block.buf)
+        tsc = TimeSeriesCollection.from_matrix(buffer[0], buffer[1:],
+                                               variables)
+        del buffer
+    finally:
+        block.close()
+        block.unlink()
+    return tsc
+
+
+def _release_shared_memory(future):
+    """
+    Unlink the shared memory block of a simulation that is not collected,
+    waiting for the simulation if it already started
+
+    Parameters
+    ----------
+    future: concurrent.futures.Future
+        a future of _simulate_to_shared_memory
+    """
+    if future.cancel() or future.exception() is not None:
+        return
+    try:
+        block = shared_memory.SharedMemory(name=future.result()[0])
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def simulate_models(models, workers=None, cache=None, profiler=None,
+                    **settings):
+    """
+    Simulate several models at once in a pool of processes, each worker
+    running its own roadrunner instance
+
+    Parameters
+    ----------
+    models: list of (str, str)
+        the (model_text, model_format) of every model, see simulate_model
+    workers: int
+        the number of worker processes, the number of CPUs if None
+        1 simulates the models one after the other in this process
+    cache: SimulationCache
+        if given, only the models missing from the cache are simulated
+    profiler: Profiler
+        if given, the simulations are timed into it; with a pool of
+        processes only the whole simulation of each model is timed
+    settings: dict
+        the other keyword arguments of simulate_model, shared by all models
+
+    Returns
+    -------
+    list of TimeSeriesCollection:
+        the simulation results, in the order of models
+    """
+    if workers == 1 or len(models) <= 1:
+        return [simulate_model(model_text, model_format, cache=cache,
+                               profiler=profiler, **settings)
+                for model_text, model_format in models]
+    results = [None] * len(models)
+    pending = []
+    for index, (model_text, model_format) in enumerate(models):
+        if cache is not None and model_format in MODEL_LOADERS:
+            key = _cache_key(model_text, model_format, settings)
+            results[index] = cache.get(key)
+        if results[index] is None:
+            pending.append(index)
+    if pending:
+        if os.name == "posix":
+            # workers share this resource tracker, so the blocks they create
+            # are only cleaned up by _collect_from_shared_memory
+            resource_tracker.ensure_running()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {index: executor.submit(_simulate_to_shared_memory,
+                                              models[index][0],
+                                              models[index][1], settings)
+                       for index in pending}
+            collected = set()
+            try:
+                for index, future in futures.items():
+                    with stage(profiler, "simulate_in_process", model=index):
+                        shared = future.result()
+                    # the block is released by _collect_from_shared_memory
+                    collected.add(index)
+                    with stage(profiler, "create_collection"):
+                        results[index] = _collect_from_shared_memory(*shared)
+                    if cache is not None:
+                        cache.put(_cache_key(models[index][0],
+                                             models[index][1], settings),
+                                  results[index])
+            finally:
+                # after a failure, the blocks of the other simulations
+                # would otherwise stay in /dev/shm
+                for index, future in futures.items():
+                    if index not in collected:
+                        _release_shared_memory(future)
+    return results
+
+
+def _read_file(path):
+    """
+    Read the text of a model file
+
+    Parameters
+    ----------
+    path: str
+        path to the file
+
+    Returns
+    -------
+    str:
+        the content of the file
+    """
+    with open(path, "r") as model_file:
+        return model_file.read()
+
+
+def get_tsc_from_Ant(original_path, revised_path, start=0, end=100,
+                     points=1000, selections=None, integrator=None,
+                     integrator_settings=None, cache=None, workers=1,
+                     profiler=None):
     """
     get tsc from Antimony file
 
@@ -34,6 +320,27 @@ def get_tsc_from_Ant(original_path, revised_path):
         path to the original Antimony file
     revised_path: str
         path to the revised Antimony file
+    start: double
+        simulation start time
+    end: double
+        simulation end time
+    points: int
+        number of time points of the simulation
+    selections: list of str
+        the columns to simulate, roadrunner's default if None
+    integrator: str
+        the name of the roadrunner integrator, roadrunner's default if None
+    integrator_settings: dict
+        integrator setting name to value
+    cache: SimulationCache
+        if given, a model whose text and settings were already simulated
+        is loaded from the cache instead of being simulated again
+    workers: int
+        1 (default) simulates both models one after the other, otherwise
+        they are simulated concurrently in a pool of that many processes
+        (None for the number of CPUs)
+    profiler: Profiler
+        if given, reading and simulating the models is timed into it
 
     Raises
     ------
@@ -53,17 +360,18 @@ def get_tsc_from_Ant(original_path, revised_path):
         if not os.path.isfile(original_path) or not os.path.isfile(
                 revised_path):
             raise ValueError
-    original_model = te.loada(original_path)
-    revised_model = te.loada(revised_path)
-    # TODO: Making an assumption here
-    original_result = original_model.simulate(0, 100, 1000)
-    revised_result = revised_model.simulate(0, 100, 1000)
-    original_tsc = TimeSeriesCollection.from_nd_array(original_result)
-    revised_tsc = TimeSeriesCollection.from_nd_array(revised_result)
+    with stage(profiler, "read_model_files"):
+        models = [(_read_file(original_path), "antimony"),
+                  (_read_file(revised_path), "antimony")]
+    original_tsc, revised_tsc = simulate_models(
+        models, workers=workers, cache=cache, profiler=profiler,
+        start=start, end=end, points=points,
+        selections=selections, integrator=integrator,
+        integrator_settings=integrator_settings)
     return original_tsc, revised_tsc
 
 
-def get_tsc_from_CSV(original_path, revised_path):
+def get_tsc_from_CSV(original_path, revised_path, profiler=None):
     """
     get tsc from csv file
 
@@ -73,6 +381,8 @@ def get_tsc_from_CSV(original_path, revised_path):
         path to the original csv file
     revised_path: str
         path to the revised csv file
+    profiler: Profiler
+        if given, reading the files is timed into it
 
     Raises
     ------
@@ -92,11 +402,16 @@ def get_tsc_from_CSV(original_path, revised_path):
         if not os.path.isfile(original_path) or not os.path.isfile(
                 revised_path):
             raise ValueError
-    original_tsc = TimeSeriesCollection.from_csv(original_path)
-    revised_tsc = TimeSeriesCollection.from_csv(revised_path)
+    with stage(profiler, "read_csv", path=original_path):
+        original_tsc = TimeSeriesCollection.from_csv(original_path)
+    with stage(profiler, "read_csv", path=revised_path):
+        revised_tsc = TimeSeriesCollection.from_csv(revised_path)
     return original_tsc, revised_tsc
 
-def get_tsc_from_SBML(original_path, revised_path):
+def get_tsc_from_SBML(original_path, revised_path, start=0, end=100,
+                      points=1000, selections=None, integrator=None,
+                      integrator_settings=None, cache=None, workers=1,
+                      profiler=None):
     """
     get tsc from SBML file
 
@@ -106,6 +421,27 @@ def get_tsc_from_SBML(original_path, revised_path):
         path to the original SBML file
     revised_path: str
         path to the revised SBML file
+    start: double
+        simulation start time
+    end: double
+        simulation end time
+    points: int
+        number of time points of the simulation
+    selections: list of str
+        the columns to simulate, roadrunner's default if None
+    integrator: str
+        the name of the roadrunner integrator, roadrunner's default if None
+    integrator_settings: dict
+        integrator setting name to value
+    cache: SimulationCache
+        if given, a model whose text and settings were already simulated
+        is loaded from the cache instead of being simulated again
+    workers: int
+        1 (default) simulates both models one after the other, otherwise
+        they are simulated concurrently in a pool of that many processes
+        (None for the number of CPUs)
+    profiler: Profiler
+        if given, reading and simulating the models is timed into it
 
     Raises
     ------
@@ -125,11 +461,66 @@ def get_tsc_from_SBML(original_path, revised_path):
         if not os.path.isfile(original_path) or not os.path.isfile(
                 revised_path):
             raise ValueError
-    original_model = te.loadSBMLModel(original_path)
-    revised_model = te.loadSBMLModel(revised_path)
-    # TODO: Making an assumption here
-    original_result = original_model.simulate(0, 100, 1000)
-    revised_result = revised_model.simulate(0, 100, 1000)
-    original_tsc = TimeSeriesCollection.from_nd_array(original_result)
-    revised_tsc = TimeSeriesCollection.from_nd_array(revised_result)
+    with stage(profiler, "read_model_files"):
+        models = [(_read_file(original_path), "sbml"),
+                  (_read_file(revised_path), "sbml")]
+    original_tsc, revised_tsc = simulate_models(
+        models, workers=workers, cache=cache, profiler=profiler,
+        start=start, end=end, points=points,
+        selections=selections, integrator=integrator,
+        integrator_settings=integrator_settings)
     return original_tsc, revised_tsc
+
+
+async def load_tsc_async(original_path, revised_path, model_format="sbml",
+                         executor=None, semaphore=None, **settings):
+    """
+    get tsc from a pair of model or csv files without blocking the event
+    loop, the loading runs in an executor
+
+    Parameters
+    ----------
+    original_path: str
+        path to the original file
+    revised_path: str
+        path to the revised file
+    model_format: str
+        "sbml", "antimony" or "csv"
+    executor: concurrent.futures.Executor
+        the executor running the loading, the default executor of the
+        event loop if None; a ProcessPoolExecutor keeps simulations from
+        competing with the event loop for the GIL
+    semaphore: asyncio.Semaphore
+        if given, held while loading, to bound the number of concurrent
+        loadings
+    settings: dict
+        keyword arguments of get_tsc_from_SBML, get_tsc_from_Ant or
+        get_tsc_from_CSV, e.g. profiler
+
+    Raises
+    ------
+    ValueError:
+        invalid path or unknown model_format
+    asyncio.CancelledError:
+        if the task is cancelled; a loading that already started in the
+        executor still runs to completion, but its result is dropped
+
+    Returns
+    -------
+    TimeSeriesCollection:
+        original tsc
+    TimeSeriesCollection:
+        revised tsc
+    """
+    loaders = {"sbml": get_tsc_from_SBML, "antimony": get_tsc_from_Ant,
+               "csv": get_tsc_from_CSV}
+    if model_format not in loaders:
+        raise ValueError("model_format must be one of " +
+                         ", ".join(loaders))
+    load = functools.partial(loaders[model_format], original_path,
+                             revised_path, **settings)
+    loop = asyncio.get_running_loop()
+    if semaphore is None:
+        return await loop.run_in_executor(executor, load)
+    async with semaphore:
+        return await loop.run_in_executor(executor, load)
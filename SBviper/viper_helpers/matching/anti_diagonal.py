@@ -0,0 +1,193 @@
+"""
+Anti-diagonal dynamic program shared by the elastic distances
+
+The coupling (or warping) matrix C of two sequences a and b of lengths n
+and m is filled one anti-diagonal k = i + j at a time: every cell of an
+anti-diagonal only depends on the two previous ones, so a whole
+anti-diagonal is computed with a few NumPy operations and only three of
+them are kept in memory.
+Every monotone path from (0, 0) to (n - 1, m - 1) visits at least one of
+any two consecutive anti-diagonals, and the cost of a path never
+decreases along it, so once two consecutive anti-diagonals only hold
+costs at or above a threshold no path can end below it.
+"""
+
+import numpy as np
+
+COMBINE_MODES = ("max", "sum")
+
+
+def _rows(k, n, m, band):
+    """
+    Get the rows of the cells of anti-diagonal k inside the matrix and the
+    Sakoe-Chiba band
+
+    Parameters
+    ----------
+    k : int
+    n : int
+    m : int
+    band : int
+        the maximum |i - j| of a cell, None for no band
+
+    Returns
+    -------
+    int:
+        the first row
+    int:
+        the last row, below the first one if the anti-diagonal is empty
+    """
+    first = max(0, k - m + 1)
+    last = min(k, n - 1)
+    if band is not None:
+        first = max(first, -((band - k) // 2))
+        last = min(last, (k + band) // 2)
+    return first, last
+
+
+def _itakura_mask(rows, cols, n, m, slope):
+    """
+    Whether cells are inside the Itakura parallelogram
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+    cols : numpy.ndarray
+    n : int
+    m : int
+    slope : double
+        the maximum local slope of a path, at least 1
+
+    Returns
+    -------
+    numpy.ndarray(boolean):
+        for every cell, true if and only if it is inside the parallelogram
+    """
+    x = rows / max(n - 1, 1)
+    y = cols / max(m - 1, 1)
+    # a half-cell margin keeps the corners reachable on coarse grids
+    margin = 0.5 / max(n - 1, m - 1, 1)
+    return ((y <= slope * x + margin) & (x <= slope * y + margin) &
+            (1 - y <= slope * (1 - x) + margin) &
+            (1 - x <= slope * (1 - y) + margin))
+
+
+def _shifted(diagonal, first, rows_first, size, shift):
+    """
+    Read an anti-diagonal at the rows rows_first - shift, ...,
+    rows_first - shift + size - 1, with inf outside of it
+
+    Parameters
+    ----------
+    diagonal : numpy.ndarray
+        the costs of the anti-diagonal
+    first : int
+        the row of diagonal[0]
+    rows_first : int
+    size : int
+    shift : int
+
+    Returns
+    -------
+    numpy.ndarray:
+        the costs at the requested rows
+    """
+    start = rows_first - shift - first
+    stop = start + size
+    if start >= 0 and stop <= diagonal.shape[0]:
+        return diagonal[start:stop]
+    result = np.full(size, np.inf)
+    source_start = max(start, 0)
+    source_stop = min(stop, diagonal.shape[0])
+    if source_start < source_stop:
+        result[source_start - start:source_stop - start] = \
+            diagonal[source_start:source_stop]
+    return result
+
+
+def anti_diagonal_distance(a, b, combine, band=None, slope=None,
+                           threshold=None):
+    """
+    Run the dynamic program
+        C[i, j] = d(i, j) (+ or max) min(C[i - 1, j], C[i, j - 1],
+                                         C[i - 1, j - 1])
+    with d(i, j) = |a[i] - b[j]|, anti-diagonal by anti-diagonal
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        a 1-d array of length n
+    b : numpy.ndarray
+        a 1-d array of length m
+    combine : str
+        "max" for the discrete Frechet distance, "sum" for dynamic time
+        warping
+    band : int
+        Sakoe-Chiba band, the maximum |i - j| of a coupled pair, widened to
+        |n - m| so the last cell stays reachable; None for no band
+    slope : double
+        Itakura parallelogram, the maximum local slope of a path; None for
+        no parallelogram
+    threshold : double
+        if given, stop as soon as every path is known to cost at least
+        threshold
+
+    Raises
+    ------
+    ValueError:
+        if combine is unknown, band is negative, slope is below 1 or a
+        sequence is empty
+
+    Returns
+    -------
+    double:
+        C[n - 1, m - 1], inf if no path fits in the constraints or the
+        program stopped early
+    """
+    if combine not in COMBINE_MODES:
+        raise ValueError("combine must be one of " + ", ".join(COMBINE_MODES))
+    if band is not None and band < 0:
+        raise ValueError("band must not be negative")
+    if slope is not None and slope < 1:
+        raise ValueError("slope must be at least 1")
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n, m = a.shape[0], b.shape[0]
+    if n == 0 or m == 0:
+        raise ValueError("Both time series need at least one time point")
+    if band is not None:
+        band = max(int(band), abs(n - m))
+    combine_function = np.maximum if combine == "max" else np.add
+    # the two previous anti-diagonals and the row of their first cell
+    before_previous, before_previous_first = np.empty(0), 0
+    previous, previous_first = np.empty(0), 0
+    previous_min = np.inf
+    for k in range(n + m - 1):
+        first, last = _rows(k, n, m, band)
+        size = last - first + 1
+        if size <= 0:
+            current = np.empty(0)
+        else:
+            # rows first..last meet columns k - first down to k - last
+            current = np.abs(a[first:last + 1] -
+                             b[k - last:k - first + 1][::-1])
+            if slope is not None:
+                rows = np.arange(first, last + 1)
+                current[~_itakura_mask(rows, k - rows, n, m, slope)] = np.inf
+            if k > 0:
+                best = np.minimum(
+                    _shifted(previous, previous_first, first, size, 1),
+                    _shifted(previous, previous_first, first, size, 0))
+                np.minimum(best, _shifted(before_previous,
+                                          before_previous_first, first,
+                                          size, 1), out=best)
+                combine_function(current, best, out=current)
+        current_min = current.min() if size > 0 else np.inf
+        if threshold is not None and current_min >= threshold and \
+                previous_min >= threshold:
+            return np.inf
+        before_previous, before_previous_first = previous, previous_first
+        previous, previous_first, previous_min = current, first, current_min
+    if previous.shape[0] == 0 or previous_first + previous.shape[0] != n:
+        return np.inf
+    return float(previous[-1])
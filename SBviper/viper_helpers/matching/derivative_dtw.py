@@ -1,6 +1,71 @@
 import numpy as np
-from viper_dynamic.time_series.time_series import TimeSeries
-import matplotlib.pyplot as plt
+
+from SBviper.viper_helpers.matching.anti_diagonal import \
+    anti_diagonal_distance
+from SBviper.viper_helpers.matching.pointwise_distance import as_values
+
+
+def estimate_derivative(values):
+    """
+    Estimate the derivative of a time series as in the DDTW paper, the
+    average of the slope to the previous point and of the slope between
+    both neighbours; the first and last points copy their neighbour
+
+    Parameters
+    ----------
+    values : TimeSeries / array like
+        the time series
+
+    Returns
+    -------
+    numpy.ndarray:
+        the estimated derivative, zeros for fewer than 3 points
+    """
+    values = as_values(values)
+    derivative = np.zeros(values.shape[0])
+    if values.shape[0] < 3:
+        return derivative
+    derivative[1:-1] = ((values[1:-1] - values[:-2]) +
+                        (values[2:] - values[:-2]) / 2) / 2
+    derivative[0] = derivative[1]
+    derivative[-1] = derivative[-2]
+    return derivative
+
+
+def derivative_dtw_distance(original, revised, tol=None, band=None,
+                            slope=None):
+    """
+    Derivative dynamic time warping distance of two time series
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series
+    revised : TimeSeries / array like
+        the revised time series, may have another length
+    tol : double
+        if given, the computation stops as soon as the distance is known
+        to be at least tol
+    band : int
+        Sakoe-Chiba band, the maximum index difference of two aligned
+        points
+    slope : double
+        Itakura parallelogram, the maximum local slope of the warping path
+
+    Raises
+    ------
+    ValueError:
+        a time series is empty, band is negative or slope is below 1
+
+    Returns
+    -------
+    double:
+        the DDTW distance, inf if the computation stopped early
+    """
+    return anti_diagonal_distance(estimate_derivative(original),
+                                  estimate_derivative(revised), "sum",
+                                  band=band, slope=slope, threshold=tol)
+
 
 class DerivativeDTW:
     """
@@ -16,14 +81,20 @@ class DerivativeDTW:
         a TimeSeries representation of the time series
     _time_series_b : TimeSeries
         a TimeSeries representation of the time series
+    _band : int
+        Sakoe-Chiba band of the warping path, None for no band
+    _slope : double
+        Itakura slope constraint of the warping path, None for no constraint
 
     Methods
     -------
-    compute()
+    compute(tol)
         Computes the DDTW score for the two time series
+    plot_derivative()
+        Plots the estimated derivatives of the two time series
     """
 
-    def __init__(self, time_series_a, time_series_b):
+    def __init__(self, time_series_a, time_series_b, band=None, slope=None):
         """
         Parameters
         -------
@@ -31,53 +102,50 @@ class DerivativeDTW:
             a representation of one of the time series
         time_series_b : TimeSeries
             a representation of the other time series
+        band : int
+            Sakoe-Chiba band, the maximum index difference of two aligned
+            points
+        slope : double
+            Itakura parallelogram, the maximum local slope of the warping
+            path
+
+        Raises
+        ------
+        ValueError:
+            a time series is empty
         """
-        # TODO: Input validation
+        if len(time_series_a) == 0 or len(time_series_b) == 0:
+            raise ValueError("Both time series need at least one time point")
         self._time_series_a = time_series_a
         self._time_series_b = time_series_b
-        self.__compute_derivative_matrix()
-
-    def __compute_derivative_matrix(self):
-        """
-        Compute the derivative matrix for estimating the dtw value
-        """
-        self._derivative_matrix_a = self.__get_derivative_matrix(self._time_series_a)
-        self._derivative_matrix_b = self.__get_derivative_matrix(self._time_series_b)
-        print(self._derivative_matrix_a)
-        print(self._derivative_matrix_b)
+        self._band = band
+        self._slope = slope
+        self._derivative_matrix_a = estimate_derivative(time_series_a)
+        self._derivative_matrix_b = estimate_derivative(time_series_b)
 
-    @staticmethod
-    def __get_derivative_matrix(ts):
-        """
-        Estimate the derivative matrix
-        """
-        derivative_matrix = np.zeros(ts.size)
-        for i in range(1, ts.size - 1):
-            derivative_matrix[i] = ((ts[i] - ts[i - 1]) + ((ts[i + 1] - ts[i - 1]) / 2)) / 2
-        derivative_matrix[0] = derivative_matrix[1]
-        derivative_matrix[-1] = derivative_matrix[-2]
-        return derivative_matrix
-
-    def compute(self):
+    def compute(self, tol=None):
         """
         Computes the numerical representation of the similarity of the two time series
 
+        Parameters
+        ----------
+        tol : double
+            if given, the computation stops as soon as the distance is
+            known to be at least tol
+
         Returns
         -------
         double:
-            a numerical measure of the similarity between the two time series of the object
+            a numerical measure of the similarity between the two time series of the object,
+            inf if the computation stopped early
         """
-        # Initialize dtw matrix
-        n, m = self._time_series_a.size, self._time_series_b.size
-        dtw_matrix = np.zeros((n + 1, m + 1))
-        for i in range(n):
-            for j in range(m):
-                dtw_matrix[i + 1, j + 1] = abs(self._derivative_matrix_a[i] - self._derivative_matrix_b[j]) + \
-                                           min(dtw_matrix[i, j], dtw_matrix[i, j + 1], dtw_matrix[i + 1, j])
-        print(dtw_matrix)
-        return dtw_matrix[n, m]
+        return anti_diagonal_distance(self._derivative_matrix_a,
+                                      self._derivative_matrix_b, "sum",
+                                      band=self._band, slope=self._slope,
+                                      threshold=tol)
 
     def plot_derivative(self):
+        import matplotlib.pyplot as plt
         plt.plot(self._derivative_matrix_a)
         plt.plot(self._derivative_matrix_b)
         plt.show()
@@ -1,3 +1,9 @@
+from SBviper.viper_helpers.matching.anti_diagonal import \
+    anti_diagonal_distance
+from SBviper.viper_helpers.matching.pointwise_distance import as_values, \
+    linf_distance
+
+
 def frechet_distance(original, revised):
     """
     Determine whether two time series is an exact match
@@ -14,7 +20,8 @@ def frechet_distance(original, revised):
     -------
     double:
         The Frechet distance (https://en.wikipedia.org/wiki/Fréchet_distance)
-        of the two time series
+        of the two time series when coupled point by point, the maximum
+        absolute difference; an upper bound of discrete_frechet_distance
 
     Raises
     ------
@@ -23,7 +30,62 @@ def frechet_distance(original, revised):
     """
     if len(original) != len(revised):
         raise ValueError("The length of both time series needs to be the same!")
-    score = 0
-    for i in range(len(original)):
-        score = max(score, abs(original[i] - revised[i]))
-    return score
+    return linf_distance(original, revised)
+
+
+def frechet_distance_rows(original, revised):
+    """
+    Row-wise frechet_distance of two arrays of time series
+
+    Parameters
+    ----------
+    original: numpy.ndarray
+        a (time series x time points) array
+    revised: numpy.ndarray
+        a (time series x time points) array of the same shape
+
+    Returns
+    -------
+    numpy.ndarray:
+        the frechet_distance of every row pair
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+    """
+    return linf_distance(original, revised)
+
+
+def discrete_frechet_distance(original, revised, tol=None, band=None):
+    """
+    Discrete Frechet distance of two time series, the smallest maximum
+    absolute difference over all monotone couplings of their points, so a
+    shifted copy of a time series stays close to it
+    The time series may have different lengths
+
+    Parameters
+    ----------
+    original: TimeSeries / array-like
+        the original time series
+    revised: TimeSeries / array-like
+        the revised time series
+    tol: double
+        if given, the computation stops as soon as the distance is known
+        to be at least tol
+    band: int
+        if given, only points at most band indices apart are coupled
+
+    Returns
+    -------
+    double:
+        the discrete Frechet distance, inf if the computation stopped
+        early
+
+    Raises
+    ------
+    ValueError:
+        a time series is empty or band is negative
+    """
+    return anti_diagonal_distance(as_values(original), as_values(revised),
+                                  "max", band=band, threshold=tol)
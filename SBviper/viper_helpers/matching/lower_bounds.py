@@ -0,0 +1,346 @@
+"""
+Lower and upper bounds of the dynamic time warping distance, and a cascade
+that only runs the full derivative DTW when the bounds cannot decide
+
+LB_Kim: every warping path couples the first points and the last points
+    of both series
+LB_Keogh: with a Sakoe-Chiba band r, a point of one series can only be
+    coupled to points of the other series inside its [i - r, i + r]
+    envelope
+Diagonal path: coupling point i to point i is one of the warping paths of
+    two series of the same length, so its cost is an upper bound
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from SBviper.viper_helpers.matching.anti_diagonal import \
+    anti_diagonal_distance
+from SBviper.viper_helpers.matching.derivative_dtw import estimate_derivative
+
+CASCADE_STAGES = ("lb_kim", "lb_keogh", "upper_bound", "dtw")
+# 64 MB of derivatives and envelopes, about 900k points of every series
+DEFAULT_CACHE_BYTES = 64 << 20
+
+
+def _running_max(values, radius):
+    """
+    Maximum of every window [i - radius, i + radius] in O(n), with the van
+    Herk / Gil-Werman block decomposition
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        a 1-d array
+    radius : int
+
+    Returns
+    -------
+    numpy.ndarray:
+        the running maximum
+    """
+    n = values.shape[0]
+    width = 2 * radius + 1
+    n_blocks = -(-(n + 2 * radius) // width)
+    padded = np.full(n_blocks * width, -np.inf)
+    padded[radius:radius + n] = values
+    blocks = padded.reshape(n_blocks, width)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(suffix[:n], prefix[width - 1:width - 1 + n])
+
+
+def envelope(values, band=None):
+    """
+    Compute the LB_Keogh envelope of a time series
+
+    Parameters
+    ----------
+    values : array like
+        the time series
+    band : int
+        Sakoe-Chiba band, None for no band
+
+    Raises
+    ------
+    ValueError:
+        if band is negative
+
+    Returns
+    -------
+    numpy.ndarray:
+        the lower envelope, the minimum of every window
+    numpy.ndarray:
+        the upper envelope, the maximum of every window
+    """
+    values = np.asarray(values, dtype=float)
+    if band is not None and band < 0:
+        raise ValueError("band must not be negative")
+    if values.shape[0] == 0:
+        return values.copy(), values.copy()
+    if band is None or band >= values.shape[0] - 1:
+        return (np.full(values.shape, values.min()),
+                np.full(values.shape, values.max()))
+    return -_running_max(-values, int(band)), _running_max(values, int(band))
+
+
+def lb_kim(a, b):
+    """
+    LB_Kim lower bound of the DTW distance, the cost of coupling the first
+    points and the last points
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+    b : numpy.ndarray
+
+    Returns
+    -------
+    double:
+        a lower bound of the DTW distance of a and b
+    """
+    bound = abs(a[0] - b[0])
+    if a.shape[0] + b.shape[0] > 2:
+        bound += abs(a[-1] - b[-1])
+    return float(bound)
+
+
+def lb_keogh(a, lower, upper):
+    """
+    LB_Keogh lower bound of the DTW distance, the distance of a to the
+    envelope of the other series
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+    lower : numpy.ndarray
+        the lower envelope of the other series, of the same length
+    upper : numpy.ndarray
+        the upper envelope of the other series, of the same length
+
+    Returns
+    -------
+    double:
+        a lower bound of the DTW distance of a and the other series
+    """
+    return float(np.sum(np.maximum(a - upper, 0) + np.maximum(lower - a, 0)))
+
+
+class LowerBoundCascade:
+    """
+    Derivative DTW score function that evaluates cheap bounds first and
+    only runs the full dynamic program for the pairs whose bounds straddle
+    the tolerance
+    Used as the score function of a Filter with early_abandon, a pair is
+    pruned as clearly different (score inf) when LB_Kim or LB_Keogh reaches
+    the tolerance, and as clearly similar when the diagonal path costs less
+    than the tolerance, in which case its score is that upper bound
+    The derivatives and envelopes of the time series are computed once and
+    cached by fingerprint, up to max_cache_bytes; TimeSeriesMatcher clears
+    the cache at the end of every run, so a cascade shared by matchers
+    does not hold on to the series of past runs
+
+    Attributes
+    ----------
+    _band : int
+        Sakoe-Chiba band of the warping path, None for no band
+    _prune_similar : bool
+        whether to accept pairs on the diagonal upper bound
+    _max_cache_bytes : int
+        the maximum number of bytes of derivatives and envelopes kept
+    _cache : OrderedDict
+        fingerprint to (derivative, lower envelope, upper envelope), least
+        recently used first
+    _cache_bytes : int
+        the number of bytes of the arrays in _cache
+    _counters : dict
+        stage name to the number of pairs decided by that stage
+
+    Methods
+    -------
+    counters()
+        Get the number of pairs decided by every stage
+    reset_counters()
+        Set every counter back to 0
+    cache_bytes()
+        Get the number of bytes of the cached arrays
+    clear_cache()
+        Drop every cached derivative and envelope
+    __call__(ts_a, ts_b, tol)
+        Score a pair of time series
+    """
+
+    def __init__(self, band=None, prune_similar=True,
+                 max_cache_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Parameters
+        ----------
+        band : int
+            Sakoe-Chiba band of the warping path, None for no band
+        prune_similar : bool
+            if True, pairs whose diagonal path costs less than the
+            tolerance are filtered without running the full DTW; their
+            score is then an upper bound rather than the exact distance
+        max_cache_bytes : int
+            the maximum number of bytes of derivatives and envelopes kept,
+            the least recently used are dropped first; 0 disables the
+            cache
+
+        Raises
+        ------
+        ValueError:
+            if band or max_cache_bytes is negative
+        """
+        if band is not None and band < 0:
+            raise ValueError("band must not be negative")
+        if max_cache_bytes < 0:
+            raise ValueError("max_cache_bytes must not be negative")
+        self._band = band
+        self._prune_similar = prune_similar
+        self._max_cache_bytes = max_cache_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(CASCADE_STAGES, 0)
+
+    @property
+    def counters(self):
+        """
+        Get the number of pairs decided by every stage
+        Filters run by the process backend count in the worker processes
+
+        Returns
+        -------
+        dict:
+            "lb_kim", "lb_keogh" and "upper_bound" to the number of pairs
+            they pruned, and "dtw" to the number of full computations
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def reset_counters(self):
+        """
+        Set every counter back to 0
+        """
+        with self._lock:
+            self._counters = dict.fromkeys(CASCADE_STAGES, 0)
+
+    @property
+    def cache_bytes(self):
+        """
+        Get the number of bytes of the cached arrays
+
+        Returns
+        -------
+        int
+        """
+        with self._lock:
+            return self._cache_bytes
+
+    def clear_cache(self):
+        """
+        Drop every cached derivative and envelope
+        """
+        with self._lock:
+            self._cache = OrderedDict()
+            self._cache_bytes = 0
+
+    def _count(self, stage):
+        with self._lock:
+            self._counters[stage] += 1
+
+    def _prepare(self, series):
+        """
+        Get the derivative and envelope of a time series, from the cache
+        when the series has a fingerprint
+
+        Parameters
+        ----------
+        series : TimeSeries / array like
+
+        Returns
+        -------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+            the derivative and its lower and upper envelopes
+        """
+        key = getattr(series, "fingerprint", None)
+        if key is not None:
+            with self._lock:
+                prepared = self._cache.get(key)
+                if prepared is not None:
+                    self._cache.move_to_end(key)
+                    return prepared
+        derivative = estimate_derivative(series)
+        prepared = (derivative,) + envelope(derivative, self._band)
+        size = sum(array.nbytes for array in prepared)
+        if key is not None and size <= self._max_cache_bytes:
+            with self._lock:
+                if key not in self._cache:
+                    self._cache[key] = prepared
+                    self._cache_bytes += size
+                while self._cache_bytes > self._max_cache_bytes:
+                    _, dropped = self._cache.popitem(last=False)
+                    self._cache_bytes -= sum(array.nbytes
+                                             for array in dropped)
+        return prepared
+
+    def __call__(self, ts_a, ts_b, tol):
+        """
+        Score a pair of time series
+
+        Parameters
+        ----------
+        ts_a : TimeSeries / array like
+        ts_b : TimeSeries / array like
+        tol : double
+            the tolerance of the filter
+
+        Raises
+        ------
+        ValueError:
+            if a time series is empty
+
+        Returns
+        -------
+        double:
+            the derivative DTW distance, an upper bound of it below tol, or
+            inf for a pair pruned as different
+        """
+        a, lower_a, upper_a = self._prepare(ts_a)
+        b, lower_b, upper_b = self._prepare(ts_b)
+        if a.shape[0] == 0 or b.shape[0] == 0:
+            raise ValueError("Both time series need at least one time point")
+        if lb_kim(a, b) >= tol:
+            self._count("lb_kim")
+            return np.inf
+        if a.shape[0] == b.shape[0]:
+            if max(lb_keogh(a, lower_b, upper_b),
+                   lb_keogh(b, lower_a, upper_a)) >= tol:
+                self._count("lb_keogh")
+                return np.inf
+            if self._prune_similar:
+                upper_bound = float(np.sum(np.abs(a - b)))
+                if upper_bound < tol:
+                    self._count("upper_bound")
+                    return upper_bound
+        self._count("dtw")
+        return anti_diagonal_distance(a, b, "sum", band=self._band,
+                                      threshold=tol)
+
+    def __getstate__(self):
+        # locks cannot be pickled, and the cache is rebuilt per process
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_cache"] = OrderedDict()
+        state["_cache_bytes"] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "LowerBoundCascade(band=%r, prune_similar=%r)" % \
+            (self._band, self._prune_similar)
@@ -0,0 +1,256 @@
+"""
+Vectorized pointwise distances between time series
+
+Every kernel compares the values of two time series at the same time
+points and reduces along the last axis, so it takes either two time series
+(TimeSeries or 1-d array like) and returns a double, or two
+(time series x time points) arrays and returns the distance of every row
+pair.
+"""
+
+import numpy as np
+
+from SBviper.viper_dynamic.time_series.pyramid import build_pyramid, \
+    linf_pyramid_bounds
+
+# the smallest magnitude relative_error divides by
+RELATIVE_EPS = 1e-12
+
+
+def as_values(series):
+    """
+    Get the values of a time series as a float array
+
+    Parameters
+    ----------
+    series : TimeSeries / array like
+
+    Returns
+    -------
+    numpy.ndarray:
+        the values, without copying when they already are a float array
+    """
+    values = getattr(series, "values", series)
+    return np.asarray(values, dtype=float)
+
+
+def _differences(original, revised):
+    """
+    Compute the absolute pointwise differences of two time series
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+    revised : TimeSeries / array like
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+
+    Returns
+    -------
+    numpy.ndarray:
+        |original - revised|, in a new array
+    numpy.ndarray:
+        the values of original
+    numpy.ndarray:
+        the values of revised
+    """
+    original = as_values(original)
+    revised = as_values(revised)
+    if original.shape != revised.shape:
+        raise ValueError("The length of both time series needs to be the same!")
+    # a single temporary, the absolute value is taken in place
+    differences = np.subtract(original, revised)
+    np.abs(differences, out=differences)
+    return differences, original, revised
+
+
+def _reduce(differences, reduction):
+    """
+    Reduce the differences along the time axis, 0 for empty time series
+
+    Parameters
+    ----------
+    differences : numpy.ndarray
+    reduction : Function
+        a numpy reduction taking an axis
+
+    Returns
+    -------
+    double / numpy.ndarray:
+        the reduced value of every time series
+    """
+    if differences.shape[-1] == 0:
+        result = np.zeros(differences.shape[:-1])
+    else:
+        result = reduction(differences, axis=-1)
+    return result[()] if result.ndim == 0 else result
+
+
+def linf_distance(original, revised):
+    """
+    Maximum absolute difference (L infinity norm of the difference)
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series, or a (time series x time points) array
+    revised : TimeSeries / array like
+        the revised time series, of the same shape
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+
+    Returns
+    -------
+    double / numpy.ndarray:
+        the distance, or the distance of every row pair
+    """
+    differences, _, _ = _differences(original, revised)
+    return _reduce(differences, np.max)
+
+
+def l1_distance(original, revised):
+    """
+    Sum of the absolute differences (L1 norm of the difference)
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series, or a (time series x time points) array
+    revised : TimeSeries / array like
+        the revised time series, of the same shape
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+
+    Returns
+    -------
+    double / numpy.ndarray:
+        the distance, or the distance of every row pair
+    """
+    differences, _, _ = _differences(original, revised)
+    return _reduce(differences, np.sum)
+
+
+def l2_distance(original, revised):
+    """
+    Euclidean distance (L2 norm of the difference)
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series, or a (time series x time points) array
+    revised : TimeSeries / array like
+        the revised time series, of the same shape
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+
+    Returns
+    -------
+    double / numpy.ndarray:
+        the distance, or the distance of every row pair
+    """
+    differences, _, _ = _differences(original, revised)
+    np.square(differences, out=differences)
+    return np.sqrt(_reduce(differences, np.sum))
+
+
+def rmse(original, revised):
+    """
+    Root mean square of the differences, the L2 distance normalized by the
+    number of time points
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series, or a (time series x time points) array
+    revised : TimeSeries / array like
+        the revised time series, of the same shape
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+
+    Returns
+    -------
+    double / numpy.ndarray:
+        the distance, or the distance of every row pair
+    """
+    differences, _, _ = _differences(original, revised)
+    np.square(differences, out=differences)
+    return np.sqrt(_reduce(differences, np.mean))
+
+
+def relative_error(original, revised):
+    """
+    Maximum relative difference, |original - revised| divided by the
+    largest magnitude of both series at every time point
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series, or a (time series x time points) array
+    revised : TimeSeries / array like
+        the revised time series, of the same shape
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same shape
+
+    Returns
+    -------
+    double / numpy.ndarray:
+        the distance, or the distance of every row pair
+    """
+    differences, original, revised = _differences(original, revised)
+    scale = np.maximum(np.abs(original), np.abs(revised))
+    np.maximum(scale, RELATIVE_EPS, out=scale)
+    np.divide(differences, scale, out=differences)
+    return _reduce(differences, np.max)
+
+
+def linf_bounds(original, revised, tol):
+    """
+    Bound linf_distance from the min/max pyramids of both time series,
+    refining only until the bounds are on the same side of tol
+
+    Parameters
+    ----------
+    original : TimeSeries / array like
+        the original time series, its cached pyramid is used if it has one
+    revised : TimeSeries / array like
+        the revised time series, of the same length
+    tol : double
+
+    Raises
+    ------
+    ValueError:
+        original and revised do not have the same length
+
+    Returns
+    -------
+    double:
+        a lower bound of linf_distance
+    double:
+        an upper bound of linf_distance; either the lower bound is at
+        least tol or the upper bound is below it
+    """
+    pyramids = []
+    for series in (original, revised):
+        pyramid = getattr(series, "pyramid", None)
+        if pyramid is None:
+            pyramid = build_pyramid(as_values(series))
+        pyramids.append(pyramid)
+    return linf_pyramid_bounds(pyramids[0], pyramids[1], tol)
@@ -1,10 +1,9 @@
 from SBviper.viper_helpers.matching.frechet_distance import frechet_distance
 
 
-def frechet_distance_wrapper(original, revised):
+def frechet_distance_wrapper(original, revised, tol=0.5):
     """
     Wrapper function for frechet_distance
-    NOTE: tolerance should be hard coded in this function
 
     Parameters
     ----------
@@ -12,6 +11,8 @@ def frechet_distance_wrapper(original, revised):
         the original time series
     revised: TimeSeries
         the original time series
+    tol: double
+        the pair is filtered if its score is below tol
 
     Returns
     -------
@@ -23,4 +24,4 @@ def frechet_distance_wrapper(original, revised):
         indication of whether the ts pair has been filtered or not
     """
     score = frechet_distance(original, revised)
-    return score, 0.5, score < 0.5
+    return score, tol, score < tol
@@ -0,0 +1,28 @@
+import numpy as np
+
+from SBviper.viper_dynamic.constants import str_to_function
+from SBviper.viper_dynamic.matcher.time_series_matcher import TimeSeriesMatcher
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+
+
+class MatcherFixture:
+    """
+    Collections shared by the matcher tests: S1 and S2 are close in both
+    collections, S3 only exists in the original one and S4 only in the
+    revised one
+    """
+
+    time_points = np.linspace(0, 10, 50)
+    tsc_original = TimeSeriesCollection.from_matrix(
+        time_points, [np.sin(time_points), np.cos(time_points),
+                      np.ones(50)], ["S1", "S2", "S3"])
+    tsc_revised = TimeSeriesCollection.from_matrix(
+        time_points, [np.cos(time_points), np.sin(time_points) + 0.1,
+                      np.zeros(50)], ["S2", "S1", "S4"])
+
+    def make_matcher(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        matcher.add_filter(str_to_function["frechet_distance"])
+        return matcher
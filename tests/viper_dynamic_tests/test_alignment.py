@@ -0,0 +1,53 @@
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.time_series.alignment import align_collections, \
+    common_time_grid
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+
+
+class TestAlignment(unittest.TestCase):
+
+    tsc_a = TimeSeriesCollection.from_matrix(np.array([0.0, 1.0, 2.0, 3.0]),
+                                             [[0, 1, 2, 3], [1, 1, 1, 1]],
+                                             ["S1", "S2"])
+    tsc_b = TimeSeriesCollection.from_matrix(np.array([0.0, 1.5, 3.0]),
+                                             [[0, 3, 6]], ["S1"])
+
+    def test_union(self):
+        np.testing.assert_allclose(
+            common_time_grid([0.0, 1.0, 2.0, 3.0], [0.0, 1.5, 3.0]),
+            [0.0, 1.0, 1.5, 2.0, 3.0])
+
+    def test_intersection(self):
+        np.testing.assert_allclose(
+            common_time_grid([0.0, 1.0, 2.0, 3.0], [0.0, 1.5, 3.0],
+                             "intersection"), [0.0, 3.0])
+        with self.assertRaises(ValueError):
+            common_time_grid([0.0, 1.0, 2.0, 3.0], [0.5, 1.5, 2.5],
+                             "intersection")
+
+    def test_fixed(self):
+        np.testing.assert_allclose(
+            common_time_grid([0.0, 1.0, 2.0, 3.0], [1.0, 4.0], 3),
+            [1.0, 2.0, 3.0])
+
+    def test_invalid_grid(self):
+        with self.assertRaises(ValueError):
+            common_time_grid([0.0, 1.0], [0.0, 1.0], "nearest")
+        with self.assertRaises(ValueError):
+            common_time_grid([0.0, 1.0], [2.0, 3.0])
+
+    def test_align_collections(self):
+        aligned_a, aligned_b = align_collections(self.tsc_a, self.tsc_b)
+        np.testing.assert_allclose(aligned_a.time_points,
+                                   aligned_b.time_points)
+        np.testing.assert_allclose(aligned_a["S1"].values,
+                                   [0, 1, 1.5, 2, 3])
+        np.testing.assert_allclose(aligned_b["S1"].values, [0, 2, 3, 4, 6])
+        self.assertEqual(len(aligned_a), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
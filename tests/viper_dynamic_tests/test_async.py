@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+import threading
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.matcher.time_series_matcher import TimeSeriesMatcher
+from SBviper.viper_dynamic.util import load_tsc_async
+
+from matcher_fixture import MatcherFixture
+
+MODEL = "S1 -> S2; k1 * S1; S1 = 10; S2 = 0; k1 = %s"
+
+
+class TestAsync(MatcherFixture, unittest.TestCase):
+
+    def test_run_async(self):
+        matcher = self.make_matcher()
+        expected = matcher.run()
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(2)
+            return await asyncio.gather(*[
+                matcher.run_async(chunk_size=1, semaphore=semaphore)
+                for _ in range(3)])
+
+        for filtered, non_filtered in asyncio.run(run_all()):
+            self.assertEqual(list(filtered.variables),
+                             list(expected[0].variables))
+            self.assertEqual(list(non_filtered.variables),
+                             list(expected[1].variables))
+
+    def test_run_async_cancel(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking(ts_a, ts_b):
+            started.set()
+            release.wait(5)
+            return 1.0, 0.5, False
+
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        counting = Filter(blocking, 0.5)
+        matcher.add_filter(counting)
+
+        async def cancel():
+            task = asyncio.ensure_future(matcher.run_async(chunk_size=1))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            release.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+        self.assertEqual(counting._calls, 1)
+
+    def test_load_tsc_async(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, k1 in (("original.ant", "0.1"), ("revised.ant", "0.2")):
+                path = os.path.join(directory, name)
+                with open(path, "w") as model_file:
+                    model_file.write(MODEL % k1)
+                paths.append(path)
+            tsc_original, tsc_revised = asyncio.run(load_tsc_async(
+                paths[0], paths[1], "antimony", end=10, points=11))
+        self.assertEqual(len(tsc_original.time_points), 11)
+        self.assertLess(tsc_revised["S1"].values[-1],
+                        tsc_original["S1"].values[-1])
+        with self.assertRaises(ValueError):
+            asyncio.run(load_tsc_async(paths[0], paths[1], "cellml"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,13 @@
+import os
+import tempfile
 import tellurium as te
+import numpy as np
 import unittest
+from unittest import mock
 
-from viper_dynamic.time_series.collection_time_series import \
+from SBviper.viper_dynamic.time_series.collection_time_series import \
     TimeSeriesCollection
+from SBviper.viper_dynamic.time_series.time_series import TimeSeries
 
 
 class TestTimeSeriesCollection(unittest.TestCase):
@@ -40,6 +45,68 @@ class TestTimeSeriesCollection(unittest.TestCase):
         except:
             self.fail()
 
+    def test_from_csv_variables(self):
+        path = "examples/csv_output/foo.csv"
+        tsc = TimeSeriesCollection.from_csv(path, ["S2"], chunk_size=4)
+        self.assertEqual(list(tsc.variables), ["S2"])
+        self.assertEqual(tsc.values_matrix.shape, (1, 25))
+        with self.assertRaises(ValueError):
+            TimeSeriesCollection.from_csv(path, ["S3"])
+
+    def test_from_csv_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            TimeSeriesCollection.from_csv("examples/csv_output/missing.csv")
+
+    def test_save_load(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tsc.bin")
+            tsc.save(path)
+            for mmap in (False, True):
+                loaded = TimeSeriesCollection.load(path, mmap)
+                self.assertEqual(list(loaded.variables), ["S1", "S2"])
+                np.testing.assert_array_equal(loaded.time_points,
+                                              tsc.time_points)
+                np.testing.assert_array_equal(loaded.values_matrix,
+                                              tsc.values_matrix)
+            loaded["S1"][0] = 100
+            self.assertEqual(loaded["S1"][0], 100)
+            del loaded
+
+    def test_load_invalid(self):
+        with self.assertRaises(ValueError):
+            TimeSeriesCollection.load("examples/csv_output/foo.csv")
+
+    def test_save_over_memory_map(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tsc.bin")
+            tsc.save(path)
+            loaded = TimeSeriesCollection.load(path, mmap=True)
+            loaded.save(path)
+            np.testing.assert_array_equal(loaded.values_matrix,
+                                          tsc.values_matrix)
+            np.testing.assert_array_equal(
+                TimeSeriesCollection.load(path, mmap=False).values_matrix,
+                tsc.values_matrix)
+            self.assertEqual(os.listdir(directory), ["tsc.bin"])
+            del loaded
+
+    def test_load_truncated(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tsc.bin")
+            tsc.save(path)
+            with open(path, "rb") as binary_file:
+                content = binary_file.read()
+            # inside the header length, the header and the values block
+            for size in (10, 20, len(content) - 8):
+                with open(path, "wb") as binary_file:
+                    binary_file.write(content[:size])
+                for mmap in (False, True):
+                    with self.assertRaisesRegex(ValueError, "truncated"):
+                        TimeSeriesCollection.load(path, mmap)
+
     def test_add_time_series(self):
         pass
 
@@ -47,6 +114,99 @@ class TestTimeSeriesCollection(unittest.TestCase):
         tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
         self.assertEqual(len(tsc), 2)
 
+    def test_from_matrix(self):
+        tsc = TimeSeriesCollection.from_matrix(np.arange(3),
+                                               np.ones((2, 3)),
+                                               ["S1", "S2"])
+        self.assertEqual(len(tsc), 2)
+        self.assertEqual(tsc.values_matrix.shape, (2, 3))
+
+    def test_from_matrix_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            TimeSeriesCollection.from_matrix(np.arange(3), np.ones((2, 4)),
+                                             ["S1", "S2"])
+
+    def test_shared_time_axis(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        self.assertTrue(tsc["S1"].is_view)
+        self.assertTrue(np.shares_memory(tsc["S1"].time_points,
+                                         tsc["S2"].time_points))
+        self.assertTrue(np.shares_memory(tsc["S1"].values,
+                                         tsc.values_matrix))
+
+    def test_values_matrix_after_write(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        tsc["S1"][0] = 100
+        self.assertEqual(tsc.values_matrix[0, 0], 100)
+        self.assertTrue(np.shares_memory(tsc["S1"].values,
+                                         tsc.values_matrix))
+
+    def test_values_matrix_copies_changed_rows(self):
+        tsc = TimeSeriesCollection.from_matrix(np.arange(3), np.ones((3, 3)),
+                                               ["S1", "S2", "S3"])
+        matrix = tsc.values_matrix
+        rebind = TimeSeries._rebind
+        with mock.patch.object(TimeSeries, "_rebind", autospec=True,
+                               side_effect=rebind) as rebound:
+            tsc.values_matrix
+            self.assertEqual(rebound.call_count, 0)
+            tsc["S2"][1] = 5
+            tsc.values_matrix
+            self.assertEqual(rebound.call_count, 1)
+        self.assertTrue(np.shares_memory(tsc.values_matrix, matrix))
+        self.assertEqual(matrix[1, 1], 5)
+        self.assertTrue(np.shares_memory(tsc["S2"].values, matrix))
+
+    def test_values_matrix_aliased_time_series(self):
+        time_points = np.arange(3)
+        tsc = TimeSeriesCollection(
+            {"S1": TimeSeries("S1", time_points, np.ones(3)),
+             "S2": TimeSeries("S2", time_points, np.ones(3))})
+        tsc.values_matrix
+        tsc["S3"] = tsc["S1"]
+        tsc.values_matrix
+        tsc["S1"][0] = 5
+        np.testing.assert_array_equal(tsc.values_matrix,
+                                      [[5, 1, 1], [1, 1, 1], [5, 1, 1]])
+        tsc["S3"][1] = 7
+        np.testing.assert_array_equal(tsc.values_matrix[[0, 2]],
+                                      [[5, 7, 1], [5, 7, 1]])
+        other = TimeSeriesCollection.from_matrix(time_points,
+                                                 np.zeros((1, 3)), ["S4"])
+        other["S2"] = tsc["S2"]
+        other.values_matrix
+        tsc["S2"][2] = 9
+        np.testing.assert_array_equal(tsc.values_matrix[1], [1, 1, 9])
+        np.testing.assert_array_equal(other.values_matrix[1], [1, 1, 9])
+
+    def test_values_matrix_after_replace(self):
+        tsc = TimeSeriesCollection.from_matrix(np.arange(3), np.ones((2, 3)),
+                                               ["S1", "S2"])
+        replaced = tsc["S1"]
+        tsc["S1"] = TimeSeries("S1", np.arange(3), np.zeros(3))
+        np.testing.assert_array_equal(tsc.values_matrix, [[0, 0, 0],
+                                                          [1, 1, 1]])
+        np.testing.assert_array_equal(replaced.values, [1, 1, 1])
+        tsc["S2"] = TimeSeries("S2", np.arange(1, 4), np.zeros(3))
+        with self.assertRaises(ValueError):
+            tsc.values_matrix
+
+    def test_values_matrix_different_time_axis(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        other = TimeSeriesCollection.from_matrix(np.arange(3), np.ones((1, 3)),
+                                                 ["S3"])
+        tsc["S3"] = other["S3"]
+        with self.assertRaises(ValueError):
+            tsc.values_matrix
+
+    def test_get_values_at_times(self):
+        tsc = TimeSeriesCollection.from_matrix(np.arange(3),
+                                               [[0, 2, 4], [1, 1, 1]],
+                                               ["S1", "S2"])
+        np.testing.assert_allclose(
+            tsc.get_values_at_times(np.array([0.5, 2]), "linear"),
+            [[1, 4], [1, 1]])
+
 
 if __name__ == '__main__':
     unittest.main()
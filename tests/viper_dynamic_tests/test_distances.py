@@ -0,0 +1,295 @@
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.constants import str_to_function
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.matcher.time_series_matcher import TimeSeriesMatcher
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+from SBviper.viper_dynamic.time_series.time_series import TimeSeries
+from SBviper.viper_helpers.matching.derivative_dtw import DerivativeDTW, \
+    derivative_dtw_distance, estimate_derivative
+from SBviper.viper_helpers.matching.frechet_distance import \
+    discrete_frechet_distance, frechet_distance, frechet_distance_rows
+from SBviper.viper_helpers.matching.lower_bounds import \
+    LowerBoundCascade, envelope, lb_keogh, lb_kim
+from SBviper.viper_helpers.matching.pointwise_distance import \
+    linf_bounds, linf_distance, l1_distance, l2_distance, rmse, \
+    relative_error
+from SBviper.viper_helpers.wrappers.frechet_distance_wrapper import \
+    frechet_distance_wrapper
+
+
+class TestPointwiseDistance(unittest.TestCase):
+
+    original = np.array([[1.0, 2.0, 3.0, 4.0], [0.0, 0.0, 0.0, 0.0]])
+    revised = np.array([[1.0, 2.5, 2.0, 4.0], [0.0, 0.0, 0.0, 0.0]])
+
+    def test_kernels(self):
+        self.assertEqual(linf_distance(self.original[0], self.revised[0]), 1.0)
+        self.assertEqual(l1_distance(self.original[0], self.revised[0]), 1.5)
+        self.assertAlmostEqual(l2_distance(self.original[0], self.revised[0]),
+                               np.sqrt(1.25))
+        self.assertAlmostEqual(rmse(self.original[0], self.revised[0]),
+                               np.sqrt(1.25 / 4))
+        self.assertAlmostEqual(relative_error(self.original[0],
+                                              self.revised[0]), 1 / 3)
+
+    def test_rows(self):
+        for kernel in (linf_distance, l1_distance, l2_distance, rmse,
+                       relative_error):
+            scores = kernel(self.original, self.revised)
+            self.assertEqual(scores.shape, (2,))
+            self.assertAlmostEqual(scores[0], kernel(self.original[0],
+                                                     self.revised[0]))
+            self.assertEqual(scores[1], 0.0)
+
+    def test_time_series(self):
+        time_points = np.arange(4.0)
+        ts_a = TimeSeries("S1", time_points, self.original[0])
+        ts_b = TimeSeries("S1", time_points, self.revised[0])
+        self.assertEqual(frechet_distance(ts_a, ts_b), 1.0)
+        self.assertEqual(str_to_function["linf_distance"].run_filter(
+            ts_a, ts_b), (1.0, 0.5, False))
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            linf_distance([1.0, 2.0], [1.0])
+        with self.assertRaises(ValueError):
+            frechet_distance([1.0, 2.0], [1.0])
+
+    def test_linf_bounds(self):
+        generator = np.random.default_rng(5)
+        for n in (1, 2, 7, 100, 1000):
+            a = generator.normal(size=n)
+            b = a + generator.normal(scale=0.1, size=n)
+            exact = linf_distance(a, b)
+            for tol in (0.01, exact, exact * 1.01, 1.0):
+                lower, upper = linf_bounds(a, b, tol)
+                self.assertLessEqual(lower, exact)
+                self.assertGreaterEqual(upper, exact)
+                self.assertTrue(lower >= tol or upper < tol)
+        with self.assertRaises(ValueError):
+            linf_bounds([1.0, 2.0], [1.0], 0.5)
+
+    def test_empty(self):
+        self.assertEqual(l1_distance([], []), 0.0)
+        np.testing.assert_array_equal(rmse(np.empty((2, 0)),
+                                           np.empty((2, 0))), [0.0, 0.0])
+
+
+def reference_frechet(a, b):
+    coupling = np.full((len(a), len(b)), np.inf)
+    for i in range(len(a)):
+        for j in range(len(b)):
+            best = 0.0 if i == j == 0 else min(
+                coupling[i - 1, j] if i else np.inf,
+                coupling[i, j - 1] if j else np.inf,
+                coupling[i - 1, j - 1] if i and j else np.inf)
+            coupling[i, j] = max(abs(a[i] - b[j]), best)
+    return coupling[-1, -1]
+
+
+class TestFilterTolerance(unittest.TestCase):
+
+    def test_wrapper_tol(self):
+        original = TimeSeries("S1", np.arange(3.0), np.zeros(3))
+        revised = TimeSeries("S1", np.arange(3.0), np.full(3, 0.3))
+        ts_filter = Filter(frechet_distance_wrapper, 0.2, frechet_distance_rows)
+        score, tol, result = ts_filter.run_filter(original, revised)
+        self.assertAlmostEqual(score, 0.3)
+        self.assertEqual(tol, 0.2)
+        self.assertFalse(result)
+        _, results = ts_filter.run_vectorized(original.values[np.newaxis],
+                                              revised.values[np.newaxis])
+        self.assertFalse(results[0])
+        ts_filter.set_tol(0.4)
+        self.assertTrue(ts_filter.run_filter(original, revised)[2])
+
+
+class TestDiscreteFrechetDistance(unittest.TestCase):
+
+    def test_reference(self):
+        generator = np.random.default_rng(0)
+        for n, m in ((1, 1), (1, 5), (7, 7), (12, 9), (20, 31)):
+            a = generator.normal(size=n)
+            b = generator.normal(size=m)
+            self.assertAlmostEqual(discrete_frechet_distance(a, b),
+                                   reference_frechet(a, b))
+
+    def test_shift(self):
+        time_points = np.linspace(0, 10, 200)
+        a = np.exp(-(time_points - 4) ** 2)
+        b = np.exp(-(time_points - 5) ** 2)
+        self.assertGreater(frechet_distance(a, b), 0.4)
+        self.assertLess(discrete_frechet_distance(a, b), 0.05)
+        self.assertLess(discrete_frechet_distance(a, b, band=25), 0.05)
+        self.assertGreater(discrete_frechet_distance(a, b, band=0), 0.4)
+
+    def test_band_is_upper_bound(self):
+        generator = np.random.default_rng(1)
+        a = generator.normal(size=40)
+        b = generator.normal(size=40)
+        exact = discrete_frechet_distance(a, b)
+        self.assertGreaterEqual(discrete_frechet_distance(a, b, band=3), exact)
+        self.assertAlmostEqual(discrete_frechet_distance(a, b, band=0),
+                               frechet_distance(a, b))
+
+    def test_early_abandon(self):
+        a = np.zeros(50)
+        self.assertEqual(discrete_frechet_distance(a, a + 1, tol=0.5), np.inf)
+        self.assertAlmostEqual(discrete_frechet_distance(a, a + 0.1,
+                                                         tol=0.5), 0.1)
+
+    def test_filter(self):
+        ts_filter = str_to_function["discrete_frechet_distance"]
+        self.assertEqual(ts_filter.run_filter(np.zeros(5), np.ones(5)),
+                         (np.inf, 0.5, False))
+        with self.assertRaises(ValueError):
+            discrete_frechet_distance([], [1.0])
+
+
+def reference_dtw(a, b):
+    warping = np.full((len(a) + 1, len(b) + 1), np.inf)
+    warping[0, 0] = 0.0
+    for i in range(len(a)):
+        for j in range(len(b)):
+            warping[i + 1, j + 1] = abs(a[i] - b[j]) + min(
+                warping[i, j], warping[i, j + 1], warping[i + 1, j])
+    return warping[-1, -1]
+
+
+class TestDerivativeDTW(unittest.TestCase):
+
+    def test_derivative(self):
+        values = np.array([0.0, 1.0, 4.0, 9.0, 16.0])
+        np.testing.assert_allclose(estimate_derivative(values),
+                                   [1.5, 1.5, 3.5, 5.5, 5.5])
+        np.testing.assert_array_equal(estimate_derivative([1.0, 2.0]),
+                                      [0.0, 0.0])
+
+    def test_reference(self):
+        generator = np.random.default_rng(2)
+        for n, m in ((3, 3), (4, 10), (25, 18)):
+            a = generator.normal(size=n)
+            b = generator.normal(size=m)
+            self.assertAlmostEqual(
+                DerivativeDTW(a, b).compute(),
+                reference_dtw(estimate_derivative(a), estimate_derivative(b)))
+
+    def test_constraints(self):
+        generator = np.random.default_rng(3)
+        a = generator.normal(size=60)
+        b = generator.normal(size=60)
+        exact = derivative_dtw_distance(a, b)
+        self.assertGreaterEqual(derivative_dtw_distance(a, b, band=5), exact)
+        self.assertGreaterEqual(derivative_dtw_distance(a, b, slope=2.0),
+                                exact)
+        self.assertAlmostEqual(derivative_dtw_distance(a, b, band=0),
+                               l1_distance(estimate_derivative(a),
+                                           estimate_derivative(b)))
+        with self.assertRaises(ValueError):
+            derivative_dtw_distance(a, b, slope=0.5)
+
+    def test_early_abandon(self):
+        time_points = np.linspace(0, 10, 100)
+        a = np.sin(time_points)
+        b = np.cos(3 * time_points)
+        exact = derivative_dtw_distance(a, b)
+        self.assertEqual(derivative_dtw_distance(a, b, tol=exact / 2), np.inf)
+        self.assertAlmostEqual(derivative_dtw_distance(a, b, tol=exact * 2),
+                               exact)
+
+    def test_filter(self):
+        time_points = np.linspace(0, 10, 100)
+        ts_a = TimeSeries("S1", time_points, np.sin(time_points))
+        ts_b = TimeSeries("S1", time_points, np.sin(time_points))
+        score, tol, filtered = \
+            str_to_function["derivative_dtw"].run_filter(ts_a, ts_b)
+        self.assertEqual((score, tol, filtered), (0.0, 0.5, True))
+
+
+class TestLowerBoundCascade(unittest.TestCase):
+
+    def test_envelope(self):
+        values = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0])
+        lower, upper = envelope(values, 1)
+        np.testing.assert_array_equal(upper, [3, 4, 4, 5, 9, 9, 9])
+        np.testing.assert_array_equal(lower, [1, 1, 1, 1, 1, 2, 2])
+        lower, upper = envelope(values)
+        np.testing.assert_array_equal(upper, np.full(7, 9.0))
+
+    def test_bounds(self):
+        generator = np.random.default_rng(4)
+        for band in (None, 0, 3):
+            for _ in range(5):
+                a = generator.normal(size=30)
+                b = generator.normal(size=30)
+                exact = derivative_dtw_distance(a, b, band=band)
+                a = estimate_derivative(a)
+                b = estimate_derivative(b)
+                lower, upper = envelope(b, band)
+                self.assertLessEqual(lb_kim(a, b), exact + 1e-9)
+                self.assertLessEqual(lb_keogh(a, lower, upper), exact + 1e-9)
+                self.assertGreaterEqual(np.sum(np.abs(a - b)), exact - 1e-9)
+
+    def test_cascade(self):
+        time_points = np.linspace(0, 10, 100)
+        base = np.sin(time_points)
+        pairs = [(base, base + 1e-4 * time_points),
+                 (base, np.sin(time_points + 0.3)),
+                 (base, np.sin(1.5 * time_points)),
+                 (base, np.concatenate(([3.0], base[1:])))]
+        cascade = LowerBoundCascade()
+        for ts_a, ts_b in pairs:
+            exact = derivative_dtw_distance(ts_a, ts_b)
+            self.assertEqual(cascade(ts_a, ts_b, 0.5) < 0.5, exact < 0.5)
+        counters = cascade.counters
+        self.assertEqual(sum(counters.values()), len(pairs))
+        self.assertEqual(counters, {"lb_kim": 1, "lb_keogh": 1,
+                                    "upper_bound": 1, "dtw": 1})
+        cascade.reset_counters()
+        self.assertEqual(sum(cascade.counters.values()), 0)
+
+    def test_cascade_filter(self):
+        ts_filter = str_to_function["derivative_dtw_cascade"]
+        time_points = np.arange(4.0)
+        ts_a = TimeSeries("S1", time_points, [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(ts_filter.run_filter(ts_a, ts_a.copy())[2], True)
+        self.assertIn("LowerBoundCascade", ts_filter.identity)
+
+    def test_cache_bytes(self):
+        time_points = np.linspace(0, 10, 100)
+        series = [TimeSeries("S%d" % index, time_points,
+                             np.sin(time_points + index))
+                  for index in range(4)]
+        cascade = LowerBoundCascade(max_cache_bytes=5000)
+        for ts_a, ts_b in zip(series, series[1:]):
+            cascade(ts_a, ts_b, 0.5)
+            self.assertLessEqual(cascade.cache_bytes, 5000)
+        self.assertGreater(cascade.cache_bytes, 0)
+        cascade.clear_cache()
+        self.assertEqual(cascade.cache_bytes, 0)
+        with self.assertRaises(ValueError):
+            LowerBoundCascade(max_cache_bytes=-1)
+
+    def test_cache_released_after_run(self):
+        ts_filter = str_to_function["derivative_dtw_cascade"]
+        cascade = ts_filter._score_function
+        time_points = np.linspace(0, 10, 50)
+        tsc = TimeSeriesCollection.from_matrix(
+            time_points, [np.sin(time_points), np.cos(time_points)],
+            ["S1", "S2"])
+        matcher = TimeSeriesMatcher(tsc, tsc)
+        matcher.add_filter(ts_filter)
+        results = matcher.iter_run(chunk_size=1)
+        next(results)
+        self.assertGreater(cascade.cache_bytes, 0)
+        results.close()
+        self.assertEqual(cascade.cache_bytes, 0)
+        matcher.run()
+        self.assertEqual(cascade.cache_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
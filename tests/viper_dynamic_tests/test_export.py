@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.Filter.filter_result import FilterResult
+from SBviper.viper_dynamic.match_result.export import CSVWriter, \
+    JSONLinesWriter, ParquetWriter, downsample
+from SBviper.viper_dynamic.match_result.match_result import MatchResult
+
+from matcher_fixture import MatcherFixture
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def abandoned(ts_a, ts_b, tol):
+    return np.inf
+
+
+class TestExport(MatcherFixture, unittest.TestCase):
+
+    def make_abandoned_result(self):
+        match_result = MatchResult(self.__class__.tsc_original["S1"],
+                                   self.__class__.tsc_revised["S1"])
+        match_result.filter_results[Filter(None, 0.5, score_function=abandoned,
+                                           early_abandon=True)] = \
+            FilterResult(np.inf, None, False)
+        return match_result
+
+    def test_csv_callback(self):
+        output = io.StringIO()
+        with CSVWriter(output) as writer:
+            self.make_matcher().run(callback=writer)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(writer.rows, 4)
+        self.assertEqual([row["variable"] for row in rows],
+                         ["S1", "S2", "S3", "S4"])
+        self.assertEqual(rows[0]["verdict"], "filtered")
+        self.assertAlmostEqual(float(rows[0]["score"]), 0.1)
+        self.assertEqual(rows[2]["filter"], "")
+        with self.assertRaises(ValueError):
+            writer.write("S1", None)
+
+    def test_json_lines_trajectories(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.jsonl")
+            with JSONLinesWriter(path, trajectory_points=5) as writer:
+                for _ in self.make_matcher().iter_run(chunk_size=1,
+                                                      callback=writer):
+                    pass
+            with open(path) as json_file:
+                rows = [json.loads(line) for line in json_file]
+        self.assertEqual(rows[0]["filter"], "frechet_distance")
+        self.assertEqual(rows[0]["original_time"],
+                         list(np.linspace(0, 10, 50)[[0, 12, 24, 37, 49]]))
+        self.assertIsNone(rows[0]["nonfinite_score"])
+        self.assertIsNone(rows[2]["revised_values"])
+        self.assertIsNone(rows[3]["score"])
+
+    def test_json_lines_strict(self):
+        output = io.StringIO()
+        with JSONLinesWriter(output) as writer:
+            writer.write("S1", self.make_abandoned_result())
+
+        def reject(constant):
+            raise ValueError("non-standard JSON constant " + constant)
+
+        row = json.loads(output.getvalue(), parse_constant=reject)
+        self.assertIsNone(row["score"])
+        self.assertEqual(row["nonfinite_score"], "inf")
+        self.assertIsNone(row["tol"])
+
+    def test_csv_missing_tol(self):
+        output = io.StringIO()
+        with CSVWriter(output) as writer:
+            writer.write("S1", self.make_abandoned_result())
+        row = next(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(row["score"], "inf")
+        self.assertEqual(row["tol"], "")
+
+    def test_downsample(self):
+        time_series = self.__class__.tsc_original["S1"]
+        time_points, values = downsample(time_series, 100)
+        self.assertEqual(len(time_points), 50)
+        time_points, values = downsample(time_series, 2)
+        self.assertEqual(time_points, [0.0, 10.0])
+        self.assertEqual(downsample(None, 2), (None, None))
+        with self.assertRaises(ValueError):
+            CSVWriter(io.StringIO(), trajectory_points=1)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.parquet")
+            with ParquetWriter(path, trajectory_points=3,
+                               row_group_size=2) as writer:
+                filtered, non_filtered = self.make_matcher().run()
+                writer.write_collection(filtered)
+                writer.write_collection(non_filtered)
+                writer.write("S5", self.make_abandoned_result())
+            parquet_file = pyarrow.parquet.ParquetFile(path)
+            table = parquet_file.read()
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        rows = table.to_pylist()
+        self.assertEqual([row["variable"] for row in rows],
+                         ["S1", "S2", "S3", "S4", "S5"])
+        self.assertAlmostEqual(rows[0]["score"], 0.1)
+        self.assertEqual(rows[0]["verdict"], "filtered")
+        self.assertEqual(rows[0]["original_time"], [0.0, 5.0, 10.0])
+        self.assertIsNone(rows[2]["filter"])
+        self.assertIsNone(rows[3]["original_values"])
+        self.assertEqual(rows[4]["score"], np.inf)
+        self.assertIsNone(rows[4]["tol"])
+
+    @unittest.skipIf(pyarrow is not None, "pyarrow is installed")
+    def test_parquet_missing(self):
+        with self.assertRaises(ImportError):
+            ParquetWriter("results.parquet")
+
+
+if __name__ == '__main__':
+    unittest.main()
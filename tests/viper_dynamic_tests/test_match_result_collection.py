@@ -0,0 +1,126 @@
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.Filter.filter_result import FilterResult
+from SBviper.viper_dynamic.match_result.collection_match_result import \
+    MatchResultCollection, VERDICT_FILTERED, VERDICT_MISSING, \
+    VERDICT_NOT_FILTERED, VERDICT_SKIPPED
+from SBviper.viper_dynamic.match_result.match_result import MatchResult
+
+
+def constant_filter(ts_a, ts_b):
+    return 1.0, 0.5, False
+
+
+class TestMatchResultCollection(unittest.TestCase):
+
+    filter_a = Filter(constant_filter, 0.5)
+    filter_b = Filter(constant_filter, 2.0)
+
+    def make_match_result(self, results):
+        match_result = MatchResult(None, None)
+        for ts_filter, filter_result in results:
+            match_result.filter_results.add_filter_result(ts_filter,
+                                                          filter_result)
+        return match_result
+
+    def make_collection(self):
+        collection = MatchResultCollection()
+        collection["S1"] = self.make_match_result(
+            [(self.filter_a, FilterResult(0.1, 0.5, True)),
+             (self.filter_b, FilterResult(None, 2.0, None, skipped=True))])
+        collection["S2"] = self.make_match_result(
+            [(self.filter_a, FilterResult(0.9, 0.5, False)),
+             (self.filter_b, FilterResult(3.0, 2.0, False))])
+        collection["S3"] = self.make_match_result([])
+        return collection
+
+    def test_arrays(self):
+        collection = self.make_collection()
+        self.assertEqual(list(collection.variables), ["S1", "S2", "S3"])
+        self.assertEqual(list(collection.filters),
+                         [self.filter_a, self.filter_b])
+        np.testing.assert_array_equal(
+            collection.scores,
+            [[0.1, np.nan], [0.9, 3.0], [np.nan, np.nan]])
+        np.testing.assert_array_equal(
+            collection.tols, [[0.5, 2.0], [0.5, 2.0], [np.nan, np.nan]])
+        np.testing.assert_array_equal(
+            collection.verdicts,
+            [[VERDICT_FILTERED, VERDICT_SKIPPED],
+             [VERDICT_NOT_FILTERED, VERDICT_NOT_FILTERED],
+             [VERDICT_MISSING, VERDICT_MISSING]])
+        np.testing.assert_array_equal(collection.filtered_mask,
+                                      [True, False, False])
+        self.assertIs(collection.scores, collection.scores)
+        with self.assertRaises(ValueError):
+            collection.scores[0, 0] = 1.0
+
+    def test_views(self):
+        collection = self.make_collection()
+        skipped = collection["S1"].filter_results[self.filter_b]
+        self.assertTrue(skipped.skipped)
+        self.assertIsNone(skipped.score)
+        self.assertEqual(collection["S2"].filter_results[self.filter_b].score,
+                         3.0)
+        self.assertTrue(collection["S1"].filtered)
+        self.assertEqual(len(collection["S3"].filter_results), 0)
+        self.assertIs(collection["S1"], collection.match_results[0])
+        self.assertIsNone(collection["S4"])
+        with self.assertRaises(AttributeError):
+            collection["S1"].extra = None
+
+    def test_added_objects_kept(self):
+        collection = MatchResultCollection()
+        match_result = self.make_match_result(
+            [(self.filter_a, FilterResult(0.1, 0.5, True))])
+        collection["S1"] = match_result
+        self.assertIs(collection["S1"], match_result)
+        self.assertEqual(collection.scores.shape, (1, 1))
+        match_result.filter_results.add_filter_result(
+            self.filter_b, FilterResult(3.0, 2.0, False))
+        np.testing.assert_array_equal(collection.scores, [[0.1, 3.0]])
+        self.assertEqual(list(collection.filters),
+                         [self.filter_a, self.filter_b])
+        self.assertEqual(collection.column(self.filter_b), 1)
+
+    def test_non_number_score(self):
+        collection = MatchResultCollection()
+        collection["S1"] = self.make_match_result(
+            [(self.filter_a, FilterResult("far", 0.5, False))])
+        np.testing.assert_array_equal(collection.scores, [[np.nan]])
+        self.assertEqual(
+            collection["S1"].filter_results[self.filter_a].score, "far")
+
+    def test_replace(self):
+        collection = self.make_collection()
+        collection["S1"] = self.make_match_result(
+            [(self.filter_b, FilterResult(1.0, 2.0, True))])
+        self.assertEqual(len(collection), 3)
+        np.testing.assert_array_equal(collection.scores[0], [np.nan, 1.0])
+        self.assertEqual(list(collection["S1"].filter_results.filters),
+                         [self.filter_b])
+        replaced = collection["S2"]
+        collection["S2"] = self.make_match_result([])
+        replaced.filter_results.add_filter_result(
+            self.filter_a, FilterResult(5.0, 0.5, False))
+        np.testing.assert_array_equal(collection.scores[1], [np.nan, np.nan])
+
+    def test_compact(self):
+        collection = MatchResultCollection()
+        filters = [Filter(constant_filter, 0.5) for _ in range(10)]
+        for index in range(10000):
+            collection["S%d" % index] = self.make_match_result(
+                [(ts_filter, FilterResult(float(index), 0.5, False))
+                 for ts_filter in filters])
+        self.assertEqual(collection.scores.shape, (10000, 10))
+        self.assertEqual(collection.scores[9999, 9], 9999.0)
+        self.assertEqual(collection.nbytes, 10000 * 10 * 17)
+        self.assertLess(collection.nbytes, 2 * 2 ** 20)
+        self.assertLessEqual(collection.capacity_nbytes,
+                             2 * collection.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
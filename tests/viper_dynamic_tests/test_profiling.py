@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.constants import str_to_function
+from SBviper.viper_dynamic.matcher.time_series_matcher import TimeSeriesMatcher
+from SBviper.viper_dynamic.profiling import Profiler, stage
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+from SBviper.viper_dynamic.util import simulate_model
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_stage(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.stage("work", size=2):
+                sum(range(1000))
+        profiler.add("filter:f", 0.5, 10)
+        profiler.count("pairs", 4)
+        with stage(None, "ignored"):
+            pass
+        stats = profiler.stats
+        self.assertEqual(stats["work"]["count"], 3)
+        self.assertGreater(stats["work"]["total_seconds"], 0)
+        self.assertEqual(stats["filter:f"]["count"], 10)
+        self.assertAlmostEqual(stats["filter:f"]["max_seconds"], 0.05)
+        self.assertEqual(profiler.counters, {"pairs": 4})
+
+    def test_memory_and_cprofile(self):
+        with Profiler(trace_memory=True, cprofile=True) as profiler:
+            with profiler.stage("outer"):
+                with profiler.stage("allocate"):
+                    data = np.ones(1 << 20)
+                del data
+                with profiler.stage("temporary"):
+                    # freed before the stage ends: only the peak shows it
+                    np.ones(1 << 20).sum()
+        stats = profiler.stats
+        self.assertGreaterEqual(stats["allocate"]["peak_bytes"], 8 << 20)
+        self.assertGreaterEqual(stats["temporary"]["peak_bytes"], 8 << 20)
+        self.assertGreaterEqual(stats["outer"]["peak_bytes"], 8 << 20)
+        self.assertLess(stats["outer"]["peak_bytes"], 16 << 20)
+        self.assertIn("function calls", profiler.cprofile_report())
+        with self.assertRaises(ValueError):
+            Profiler().cprofile_report()
+
+    def test_export(self):
+        profiler = Profiler()
+        with profiler.stage("work", size=2):
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, "profile.json")
+            trace_path = os.path.join(directory, "trace.json")
+            profiler.to_json(json_path)
+            profiler.to_chrome_trace(trace_path)
+            with open(json_path) as json_file:
+                self.assertIn("work", json.load(json_file)["stages"])
+            with open(trace_path) as trace_file:
+                events = json.load(trace_file)["traceEvents"]
+        self.assertEqual(events[0]["name"], "work")
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["args"], {"size": 2})
+
+    def test_matcher_and_loader(self):
+        profiler = Profiler()
+        tsc = simulate_model("S1 -> S2; k1 * S1; S1 = 10; k1 = 0.1",
+                             end=10, points=11, profiler=profiler)
+        time_points = np.linspace(0, 10, 50)
+        tsc_original = TimeSeriesCollection.from_matrix(
+            time_points, [np.sin(time_points)], ["S1"])
+        matcher = TimeSeriesMatcher(tsc_original, tsc_original,
+                                    profiler=profiler)
+        matcher.add_filter(str_to_function["frechet_distance"])
+        matcher.run()
+        matcher.run(short_circuit=True)
+        stats = profiler.stats
+        self.assertEqual(profiler.counters["pairs"], 2)
+        self.assertEqual(profiler.counters["short_circuit.skipped"], 0)
+        for name in ("load_model", "simulate", "create_collection",
+                     "evaluate_pairs", "assemble",
+                     "filter:frechet_distance"):
+            self.assertIn(name, stats)
+        self.assertEqual(len(tsc.time_points), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
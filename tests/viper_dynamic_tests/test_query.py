@@ -0,0 +1,121 @@
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.Filter.filter_result import FilterResult
+from SBviper.viper_dynamic.match_result.collection_match_result import \
+    MatchResultCollection
+from SBviper.viper_dynamic.match_result.match_result import MatchResult
+from SBviper.viper_dynamic.match_result.query import MatchResultQuery
+
+
+def distance(ts_a, ts_b):
+    return 1.0, 0.5, False
+
+
+def slope(ts_a, ts_b):
+    return 1.0, 0.5, False
+
+
+class TestMatchResultQuery(unittest.TestCase):
+
+    filter_a = Filter(distance, 0.5)
+    filter_b = Filter(slope, 2.0)
+
+    def make_collection(self, scores_a, scores_b):
+        collection = MatchResultCollection()
+        for index, (score_a, score_b) in enumerate(zip(scores_a, scores_b)):
+            match_result = MatchResult(None, None)
+            match_result.filter_results[self.filter_a] = \
+                FilterResult(score_a, 0.5, score_a < 0.5)
+            match_result.filter_results[self.filter_b] = \
+                FilterResult(None, 2.0, None, skipped=True) \
+                if score_b is None else \
+                FilterResult(score_b, 2.0, score_b < 2.0)
+            collection["S%d" % index] = match_result
+        return collection
+
+    def test_top_k(self):
+        collection = self.make_collection([0.3, 2.0, 0.1, 2.0, 5.0],
+                                          [1.0, None, 3.0, 0.0, 4.0])
+        query = collection.query
+        self.assertIs(query, collection.query)
+        expected = [("S4", 5.0), ("S1", 2.0), ("S3", 2.0)]
+        self.assertEqual(query.top_k(self.filter_a, 3), expected)
+        self.assertEqual(query.top_k("distance", 2, largest=False),
+                         [("S2", 0.1), ("S0", 0.3)])
+        self.assertEqual(query.top_k("slope", 10),
+                         [("S4", 4.0), ("S2", 3.0), ("S0", 1.0),
+                          ("S3", 0.0)])
+        # the same answer from the sorted indices
+        query.sorted_rows(self.filter_a)
+        self.assertEqual(query.top_k(self.filter_a, 3), expected)
+        self.assertEqual(query.top_k(0, 2, largest=False),
+                         [("S2", 0.1), ("S0", 0.3)])
+        with self.assertRaises(ValueError):
+            query.top_k(self.filter_a, -1)
+        with self.assertRaises(ValueError):
+            query.top_k("missing", 1)
+
+    def test_top_k_partition(self):
+        generator = np.random.default_rng(7)
+        scores = generator.integers(0, 5, size=40).astype(float)
+        collection = self.make_collection(scores, [None] * 40)
+        order = sorted(range(40), key=lambda row: (-scores[row], row))
+        for k in (0, 1, 7, 40, 50):
+            self.assertEqual(collection.query.top_k(self.filter_a, k),
+                             [("S%d" % row, scores[row])
+                              for row in order[:k]])
+        order = sorted(range(40), key=lambda row: (scores[row], row))
+        self.assertEqual(collection.query.top_k(self.filter_a, 9,
+                                                largest=False),
+                         [("S%d" % row, scores[row]) for row in order[:9]])
+
+    def test_top_k_early_abandon(self):
+        abandoning = Filter(None, 0.5, score_function=lambda a, b, tol: tol,
+                            early_abandon=True)
+        collection = MatchResultCollection()
+        for index, score in enumerate([0.1, np.inf, 0.3]):
+            match_result = MatchResult(None, None)
+            match_result.filter_results[abandoning] = \
+                FilterResult(score, 0.5, score < 0.5)
+            collection["S%d" % index] = match_result
+        with self.assertRaises(ValueError):
+            collection.query.top_k(abandoning, 1)
+        self.assertEqual(collection.query.top_k(abandoning, 2, largest=False),
+                         [("S0", 0.1), ("S2", 0.3)])
+
+    def test_range_and_combinations(self):
+        collection = self.make_collection([0.3, 2.0, 0.1, 2.0, 5.0],
+                                          [1.0, None, 3.0, 0.0, 4.0])
+        query = collection.query
+        in_range = query.score_range(self.filter_a, 0.3, 2.0)
+        self.assertEqual(list(in_range.variables), ["S0", "S1", "S3"])
+        exclusive = query.score_range(self.filter_a, 0.3, 2.0,
+                                      include_low=False, include_high=False)
+        self.assertEqual(len(exclusive), 0)
+        combined = (in_range & ~query.filtered(self.filter_b)) | \
+            query.skipped(self.filter_b)
+        self.assertEqual(list(combined.variables), ["S1"])
+        self.assertEqual(list(query.filtered().variables),
+                         ["S0", "S2", "S3"])
+        top = query.top_k(self.filter_b, 1, selection=~query.filtered())
+        self.assertEqual(top, [("S4", 4.0)])
+        self.assertEqual(len(query.everything()), 5)
+
+    def test_invalidation(self):
+        collection = self.make_collection([1.0, 2.0], [1.0, 1.0])
+        query = MatchResultQuery(collection)
+        self.assertEqual(query.top_k(self.filter_a, 1), [("S1", 2.0)])
+        query.sorted_rows(self.filter_a)
+        match_result = MatchResult(None, None)
+        match_result.filter_results[self.filter_a] = \
+            FilterResult(9.0, 0.5, False)
+        collection["S0"] = match_result
+        self.assertEqual(query.top_k(self.filter_a, 1), [("S0", 9.0)])
+        np.testing.assert_array_equal(query.sorted_rows(self.filter_a),
+                                      [1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import functools
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.Filter.score_cache import ScoreCache
+from SBviper.viper_dynamic.matcher.time_series_matcher import \
+    TimeSeriesMatcher
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+
+
+def max_difference(ts_a, ts_b):
+    score = np.max(np.abs(ts_a.values - ts_b.values))
+    return score, 0.5, score < 0.5
+
+
+def within(ts_a, ts_b, window=1):
+    score = np.max(np.abs(ts_a.values[:window] - ts_b.values[:window]))
+    return score, 0.5, score < 0.5
+
+
+def make_window_filter(window):
+    def window_difference(ts_a, ts_b):
+        return within(ts_a, ts_b, window)
+    return window_difference
+
+
+class Unnamed:
+    def __call__(self, ts_a, ts_b):
+        return within(ts_a, ts_b)
+
+
+class TestScoreCache(unittest.TestCase):
+
+    tsc_original = TimeSeriesCollection.from_matrix(
+        np.arange(10), [np.zeros(10), np.ones(10)], ["S1", "S2"])
+    tsc_revised = TimeSeriesCollection.from_matrix(
+        np.arange(10), [np.zeros(10), np.zeros(10)], ["S1", "S2"])
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "scores.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_put(self):
+        cache = ScoreCache(self.path)
+        self.assertEqual(cache.get_many(["a", "b"]), [None, None])
+        cache.put_many([("a", (0.25, 0.5, True))])
+        self.assertEqual(cache.get_many(["a", "b"]), [(0.25, 0.5, True), None])
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 3)
+        cache.close()
+
+    def test_eviction(self):
+        cache = ScoreCache(self.path, max_entries=2)
+        cache.put_many([("a", (0, 0, True))])
+        cache.put_many([("b", (0, 0, True))])
+        cache.get_many(["a"])
+        cache.put_many([("c", (0, 0, True))])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get_many(["b"])[0])
+        cache.close()
+
+    def test_matcher(self):
+        counting = Filter(max_difference, 0.5)
+        for run in range(2):
+            cache = ScoreCache(self.path)
+            matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                        self.__class__.tsc_revised,
+                                        score_cache=cache)
+            matcher.add_filter(counting)
+            filtered, non_filtered = matcher.run()
+            self.assertEqual(list(filtered.variables), ["S1"])
+            self.assertEqual(list(non_filtered.variables), ["S2"])
+            cache.close()
+        self.assertEqual(counting._calls, 2)
+        self.assertEqual(cache.hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestFilterIdentity(unittest.TestCase):
+
+    def test_closures(self):
+        self.assertNotEqual(Filter(make_window_filter(2), 0.5).identity,
+                            Filter(make_window_filter(3), 0.5).identity)
+        self.assertEqual(Filter(make_window_filter(2), 0.5).identity,
+                         Filter(make_window_filter(2), 0.5).identity)
+
+    def test_partial(self):
+        identity = Filter(functools.partial(within, window=2), 0.5).identity
+        self.assertNotIn(" at 0x", identity)
+        self.assertNotEqual(
+            identity, Filter(functools.partial(within, window=3),
+                             0.5).identity)
+        # the same in another process, so the persistent cache can hit
+        script = ("import functools, importlib, sys; sys.path[:0] = %r; "
+                  "module = importlib.import_module(%r); "
+                  "print(module.Filter(functools.partial(module.within, "
+                  "window=2), 0.5).identity)" %
+                  ([os.path.dirname(__file__)] + sys.path, within.__module__))
+        output = subprocess.run([sys.executable, "-c", script],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), identity)
+
+    def test_unstable(self):
+        ts_filter = Filter(Unnamed(), 0.5)
+        self.assertIsNone(ts_filter.identity)
+        self.assertIsNotNone(Filter(Unnamed(), 0.5, key="unnamed").identity)
+        tsc_original = TestScoreCache.tsc_original
+        tsc_revised = TestScoreCache.tsc_revised
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ScoreCache(os.path.join(directory, "scores.db"))
+            matcher = TimeSeriesMatcher(tsc_original, tsc_revised,
+                                        score_cache=cache)
+            matcher.add_filter(ts_filter)
+            filtered, _ = matcher.run()
+            matcher.run(incremental=True)
+            self.assertEqual(list(filtered.variables), ["S1"])
+            self.assertEqual(len(cache), 0)
+            cache.close()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.simulation_cache import SimulationCache
+from SBviper.viper_dynamic.util import simulate_models
+
+MODELS = [("S1 -> S2; k1 * S1; S1 = 10; k1 = 0.1", "antimony"),
+          ("S1 -> S2; k1 * S1; S1 = 5; k1 = 0.3", "antimony")]
+
+
+def shared_memory_blocks():
+    return {name for name in os.listdir("/dev/shm")
+            if name.startswith("psm_")}
+
+
+class TestSimulateModels(unittest.TestCase):
+
+    def test_process_pool(self):
+        expected = simulate_models(MODELS, workers=1, end=10, points=11)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SimulationCache(directory)
+            results = simulate_models(MODELS, workers=2, cache=cache,
+                                      end=10, points=11)
+            for tsc, expected_tsc in zip(results, expected):
+                self.assertEqual(list(tsc.variables),
+                                 list(expected_tsc.variables))
+                np.testing.assert_allclose(tsc.values_matrix,
+                                           expected_tsc.values_matrix)
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+            cached = simulate_models(MODELS, workers=2, cache=cache,
+                                     end=10, points=11)
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+            np.testing.assert_allclose(cached[1].values_matrix,
+                                       expected[1].values_matrix)
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"),
+                         "shared memory is not listed in /dev/shm")
+    def test_failure_releases_shared_memory(self):
+        before = shared_memory_blocks()
+        with self.assertRaises(Exception):
+            simulate_models([("this is not a model", "antimony")] + MODELS,
+                            workers=2, end=10, points=11)
+        self.assertEqual(shared_memory_blocks() - before, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import tempfile
+import numpy as np
+import unittest
+
+from SBviper.viper_dynamic.simulation_cache import SimulationCache
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+
+
+class TestSimulationCache(unittest.TestCase):
+
+    tsc = TimeSeriesCollection.from_matrix(np.arange(100), np.ones((2, 100)),
+                                           ["S1", "S2"])
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_make_key(self):
+        key = SimulationCache.make_key("S1 -> S2; k1", start=0, end=10)
+        self.assertEqual(key, SimulationCache.make_key("S1 -> S2; k1",
+                                                       end=10, start=0))
+        self.assertNotEqual(key, SimulationCache.make_key("S1 -> S2; k1",
+                                                          start=0, end=20))
+        self.assertNotEqual(key, SimulationCache.make_key("S1 -> S2; k2",
+                                                          start=0, end=10))
+
+    def test_get_put(self):
+        cache = SimulationCache(self.directory.name)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", self.__class__.tsc)
+        self.assertIn("a", cache)
+        cached = cache.get("a")
+        np.testing.assert_array_equal(cached.values_matrix,
+                                      self.__class__.tsc.values_matrix)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_eviction(self):
+        cache = SimulationCache(self.directory.name)
+        cache.put("a", self.__class__.tsc)
+        entry_size = cache.size_bytes
+        cache = SimulationCache(self.directory.name,
+                                max_bytes=int(entry_size * 2.5))
+        cache.put("b", self.__class__.tsc)
+        cache.get("a")
+        cache.put("c", self.__class__.tsc)
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,12 @@
+import sys
 import tellurium as te
 import numpy as np
 import unittest
+from unittest import mock
 
-from viper_dynamic.time_series.collection_time_series import TimeSeriesCollection
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+from SBviper.viper_dynamic.time_series.time_series import TimeSeries
 
 
 class TestTimeSeries(unittest.TestCase):
@@ -40,5 +44,81 @@ class TestTimeSeries(unittest.TestCase):
         self.assertEqual(s1ts.get_value_at_time(0.41666667), 100)
         self.assertEqual(s1ts.get_value_at_time(0.83333333), 100)
 
+    def test_values_read_only(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        s1ts = tsc.get_time_series("S1")
+        with self.assertRaises(ValueError):
+            s1ts.values[0] = 100
+        with self.assertRaises(ValueError):
+            s1ts.time_points[0] = 100
+
+    def test_copy_on_write(self):
+        values = np.array([1.0, 2.0, 3.0])
+        ts = TimeSeries("S1", np.array([0.0, 1.0, 2.0]), values, copy=False)
+        self.assertTrue(ts.is_view)
+        ts[0] = 100
+        self.assertFalse(ts.is_view)
+        self.assertEqual(ts[0], 100)
+        self.assertEqual(values[0], 1.0)
+
+    def test_slice_read_only(self):
+        values = np.array([1.0, 2.0, 3.0])
+        ts = TimeSeries("S1", np.array([0.0, 1.0, 2.0]), values, copy=False)
+        fingerprint = ts.fingerprint
+        with self.assertRaises(ValueError):
+            ts[0:2][0] = 99
+        self.assertEqual(list(values), [1.0, 2.0, 3.0])
+        self.assertTrue(ts.is_view)
+        self.assertEqual(ts.fingerprint, fingerprint)
+
+    def test_copy(self):
+        tsc = TimeSeriesCollection.from_nd_array(self.__class__.result)
+        s1ts = tsc.get_time_series("S1")
+        s1ts_copy = s1ts.copy()
+        s1ts_copy[0] = 100
+        self.assertFalse(s1ts_copy.is_view)
+        self.assertNotEqual(s1ts[0], 100)
+
+    def test_get_values_at_times(self):
+        ts = TimeSeries("S1", np.array([0.0, 1.0, 2.0]),
+                        np.array([1.0, 3.0, 5.0]))
+        np.testing.assert_array_equal(
+            ts.get_values_at_times(np.array([2.0, 0.0])), [5.0, 1.0])
+        with self.assertRaises(ValueError):
+            ts.get_values_at_times(np.array([0.5]))
+
+    def test_get_values_at_times_interpolation(self):
+        ts = TimeSeries("S1", np.array([0.0, 1.0, 2.0]),
+                        np.array([1.0, 3.0, 5.0]))
+        np.testing.assert_allclose(
+            ts.get_values_at_times(np.array([0.5, 1.0, 1.75]), "linear"),
+            [2.0, 3.0, 4.5])
+        np.testing.assert_allclose(
+            ts.get_values_at_times(np.array([0.5]), "cubic"), [2.0])
+        with self.assertRaises(ValueError):
+            ts.get_values_at_times(np.array([3.0]), "linear")
+
+    def test_get_values_at_times_cubic_without_scipy(self):
+        ts = TimeSeries("S1", np.array([0.0, 1.0, 2.0]),
+                        np.array([1.0, 3.0, 5.0]))
+        with mock.patch.dict(sys.modules, {"scipy": None,
+                                           "scipy.interpolate": None}):
+            with self.assertRaisesRegex(ImportError, "scipy"):
+                ts.get_values_at_times(np.array([0.5]), "cubic")
+            np.testing.assert_allclose(
+                ts.get_values_at_times(np.array([1.0]), "cubic"), [3.0])
+
+    def test_pyramid(self):
+        ts = TimeSeries("S1", np.arange(5.0),
+                        np.array([3.0, 1.0, 4.0, 1.0, 5.0]))
+        pyramid = ts.pyramid
+        self.assertEqual(len(pyramid), 4)
+        np.testing.assert_array_equal(pyramid[1][0], [1.0, 1.0, 5.0])
+        np.testing.assert_array_equal(pyramid[1][1], [3.0, 4.0, 5.0])
+        self.assertEqual((pyramid[-1][0][0], pyramid[-1][1][0]), (1.0, 5.0))
+        self.assertIs(ts.pyramid, pyramid)
+        ts[4] = 0.0
+        self.assertEqual(ts.pyramid[-1][0][0], 0.0)
+
     if __name__ == '__main__':
         unittest.main()
@@ -0,0 +1,280 @@
+import numpy as np
+import pickle
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from SBviper.viper_dynamic.constants import str_to_function
+from SBviper.viper_dynamic.Filter.filter import Filter
+from SBviper.viper_dynamic.matcher.time_series_matcher import TimeSeriesMatcher
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
+from SBviper.viper_helpers.matching.frechet_distance import \
+    discrete_frechet_distance
+
+from matcher_fixture import MatcherFixture
+
+
+def max_difference(ts_a, ts_b):
+    score = np.max(np.abs(ts_a.values - ts_b.values))
+    return score, 0.5, score < 0.5
+
+
+def never_filtered(ts_a, ts_b):
+    return 1.0, 0.5, False
+
+
+def slow_never_filtered(ts_a, ts_b):
+    time.sleep(0.005)
+    return 1.0, 0.5, False
+
+
+class TestTimeSeriesMatcher(MatcherFixture, unittest.TestCase):
+
+    def assert_same_results(self, results, expected):
+        for collection, expected_collection in zip(results, expected):
+            self.assertEqual(list(collection.variables),
+                             list(expected_collection.variables))
+            for variable in collection.variables:
+                filter_results = collection[variable].filter_results
+                expected_results = expected_collection[variable].filter_results
+                for filter_result, expected_result in \
+                        zip(filter_results.filter_results,
+                            expected_results.filter_results):
+                    self.assertAlmostEqual(filter_result.score,
+                                           expected_result.score)
+                    self.assertEqual(filter_result.filtered_or_not,
+                                     expected_result.filtered_or_not)
+
+    def test_run(self):
+        filtered, non_filtered = self.make_matcher().run()
+        self.assertEqual(list(filtered.variables), ["S1", "S2"])
+        self.assertEqual(list(non_filtered.variables), ["S3", "S4"])
+        self.assertIsNone(non_filtered["S3"].revised_ts)
+        self.assertIsNone(non_filtered["S4"].original_ts)
+
+    def test_iter_run(self):
+        matcher = self.make_matcher()
+        seen = []
+        results = list(matcher.iter_run(
+            chunk_size=1, callback=lambda variable, _: seen.append(variable)))
+        self.assertEqual([variable for variable, _ in results],
+                         ["S1", "S2", "S3", "S4"])
+        self.assertEqual(seen, ["S1", "S2", "S3", "S4"])
+        self.assertEqual([match_result.filtered for _, match_result in
+                          results], [True, True, False, False])
+        self.assertIsNone(results[3][1].original_ts)
+        with self.assertRaises(ValueError):
+            next(matcher.iter_run(chunk_size=0))
+
+    def test_iter_run_incremental(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        counting = Filter(max_difference, 0.5)
+        matcher.add_filter(counting)
+        list(matcher.iter_run(incremental=True, chunk_size=1))
+        self.assertEqual(counting._calls, 2)
+        matcher.run(incremental=True)
+        self.assertEqual(counting._calls, 2)
+
+    def test_run_filter(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        filtered, non_filtered = \
+            matcher.run_filter(str_to_function["frechet_distance"])
+        self.assertEqual(len(filtered), 2)
+
+    def test_run_vectorized(self):
+        matcher = self.make_matcher()
+        matcher.add_filter(Filter(max_difference, 0.5))
+        self.assert_same_results(matcher.run(vectorized=True),
+                                 matcher.run())
+
+    def test_run_parallel(self):
+        matcher = self.make_matcher()
+        matcher.add_filter(Filter(max_difference, 0.5))
+        expected = matcher.run()
+        for backend in ("thread", "process"):
+            self.assert_same_results(matcher.run(workers=2, backend=backend),
+                                     expected)
+
+    def test_run_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            self.make_matcher().run(workers=2, backend="cluster")
+
+    def test_run_short_circuit(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        expensive = Filter(never_filtered, 0.5)
+        cheap = Filter(max_difference, 0.5)
+        matcher.add_filter(expensive)
+        matcher.add_filter(cheap)
+        # measure both filters
+        matcher.run()
+        expensive._total_time = 1000.0
+        filtered, non_filtered = matcher.run(short_circuit=True)
+        self.assertEqual(list(filtered.variables), ["S1", "S2"])
+        skipped = filtered["S1"].filter_results[expensive]
+        self.assertTrue(skipped.skipped)
+        self.assertIsNone(skipped.score)
+        self.assertFalse(filtered["S1"].filter_results[cheap].skipped)
+        parallel_filtered, _ = matcher.run(short_circuit=True, workers=2)
+        self.assertTrue(parallel_filtered["S2"].filter_results[
+                            expensive].skipped)
+
+    def test_run_short_circuit_first_run(self):
+        for workers, backend in ((1, "thread"), (2, "process")):
+            matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                        self.__class__.tsc_revised)
+            expensive = Filter(slow_never_filtered, 0.5)
+            cheap = Filter(max_difference, 0.5)
+            matcher.add_filter(expensive)
+            matcher.add_filter(cheap)
+            # fresh filters, the expensive one listed first
+            filtered, _ = matcher.run(short_circuit=True, workers=workers,
+                                      backend=backend)
+            self.assertEqual(list(filtered.variables), ["S1", "S2"])
+            # probed on S1, skipped on S2
+            self.assertFalse(filtered["S1"].filter_results[expensive].skipped)
+            self.assertTrue(filtered["S2"].filter_results[expensive].skipped)
+            self.assertEqual(expensive._calls, 1)
+            self.assertGreater(expensive.mean_cost, cheap.mean_cost)
+
+    def test_run_process_costs(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        ts_filter = Filter(max_difference, 0.5)
+        matcher.add_filter(ts_filter)
+        matcher.run(workers=2, backend="process")
+        self.assertEqual(ts_filter._calls, 2)
+        self.assertGreater(ts_filter.mean_cost, 0)
+
+    def test_record_cost_threads(self):
+        class SlowCount(int):
+            # gives the other threads a chance to run inside +=
+            def __add__(self, other):
+                time.sleep(0.0001)
+                return SlowCount(int(self) + other)
+
+        ts_filter = Filter(max_difference, 0.5)
+        ts_filter._calls = SlowCount(0)
+
+        def record(_):
+            for _ in range(100):
+                ts_filter._record_cost(1.0, 1)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(record, range(8)))
+        self.assertEqual(ts_filter._calls, 800)
+        self.assertEqual(ts_filter._total_time, 800.0)
+        copied = pickle.loads(pickle.dumps(Filter(max_difference, 0.5)))
+        copied._record_cost(1.0, 1)
+        self.assertEqual(copied._calls, 1)
+
+    def test_run_incremental(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        counting = Filter(max_difference, 0.5)
+        matcher.add_filter(counting)
+        matcher.run(incremental=True)
+        self.assertEqual(counting._calls, 2)
+        matcher.run(incremental=True)
+        self.assertEqual(counting._calls, 2)
+        tsc_revised = TimeSeriesCollection.from_matrix(
+            self.__class__.time_points,
+            self.__class__.tsc_revised.values_matrix, ["S2", "S1", "S4"])
+        tsc_revised["S1"][0] = 10
+        matcher.set_collections(tsc_revised=tsc_revised)
+        filtered, non_filtered = matcher.run(incremental=True)
+        self.assertEqual(counting._calls, 3)
+        self.assertEqual(list(filtered.variables), ["S2"])
+        self.assertEqual(list(non_filtered.variables), ["S1", "S3", "S4"])
+
+    def test_run_incremental_after_short_circuit(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        cheap = Filter(max_difference, 0.5)
+        expensive = Filter(slow_never_filtered, 0.5)
+        matcher.add_filter(cheap)
+        matcher.add_filter(expensive)
+        filtered, _ = matcher.run(short_circuit=True, incremental=True)
+        # S1 is the probe of the costs, S2 is short-circuited
+        self.assertTrue(filtered["S2"].filter_results[expensive].skipped)
+        filtered, _ = matcher.run(incremental=True)
+        result = filtered["S2"].filter_results[expensive]
+        self.assertFalse(result.skipped)
+        self.assertEqual(result.score, 1.0)
+        # complete outputs are reused by a short-circuited run
+        calls = expensive._calls
+        matcher.run(short_circuit=True, incremental=True)
+        self.assertEqual(expensive._calls, calls)
+
+    def test_run_coarse_to_fine(self):
+        time_points = np.linspace(0, 10, 1001)
+        values = np.sin(np.outer(np.arange(1, 6), time_points))
+        revised = values.copy()
+        revised[0, 500] += 0.6
+        revised[1] += 0.4
+        revised[2, -1] += 0.5
+        tsc_original = TimeSeriesCollection.from_matrix(
+            time_points, values, ["S1", "S2", "S3", "S4", "S5"])
+        tsc_revised = TimeSeriesCollection.from_matrix(
+            time_points, revised, ["S1", "S2", "S3", "S4", "S5"])
+        matcher = TimeSeriesMatcher(tsc_original, tsc_revised)
+        matcher.add_filter(str_to_function["frechet_distance"])
+        matcher.add_filter(str_to_function["linf_distance"])
+        expected = matcher.run()
+        filtered, non_filtered = matcher.run(coarse_to_fine=True)
+        for collection, expected_collection in zip((filtered, non_filtered),
+                                                   expected):
+            self.assertEqual(list(collection.variables),
+                             list(expected_collection.variables))
+        self.assertEqual(list(filtered.variables), ["S2", "S4", "S5"])
+
+    def test_score_matrix(self):
+        matcher = self.make_matcher()
+        matcher.add_filter(Filter(max_difference, 0.5))
+        variables, scores = matcher.score_matrix()
+        self.assertEqual(variables, ["S1", "S2"])
+        self.assertEqual(scores.shape, (2, 2))
+        np.testing.assert_allclose(scores[:, 0], [0.1, 0.0], atol=1e-12)
+        np.testing.assert_allclose(scores[:, 0], scores[:, 1])
+
+    def test_sweep_tolerances(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        ts_filter = str_to_function["frechet_distance"]
+        calls = ts_filter._calls
+        partitions = matcher.sweep_tolerances(ts_filter, [0.0, 0.05, 0.5])
+        self.assertEqual(ts_filter._calls - calls, 2)
+        self.assertEqual([list(filtered) for filtered, _ in partitions],
+                         [[], ["S2"], ["S1", "S2"]])
+        self.assertEqual([list(non_filtered) for _, non_filtered in
+                          partitions], [["S1", "S2"], ["S1"], []])
+
+    def test_sweep_tolerances_early_abandon(self):
+        matcher = TimeSeriesMatcher(self.__class__.tsc_original,
+                                    self.__class__.tsc_revised)
+        ts_filter = Filter(None, 0.01,
+                           score_function=discrete_frechet_distance,
+                           early_abandon=True)
+        partitions = matcher.sweep_tolerances(ts_filter, [0.05, 5.0])
+        self.assertEqual(list(partitions[0][0]), ["S2"])
+        self.assertEqual(list(partitions[1][0]), ["S1", "S2"])
+        self.assertEqual(ts_filter.get_tol(), 0.01)
+
+    def test_filter_evaluate(self):
+        ts_filter = Filter(None, 0.5, score_function=lambda a, b: 0.3)
+        self.assertEqual(ts_filter.run_filter(None, None), (0.3, 0.5, True))
+        self.assertEqual(ts_filter.score(None, None), 0.3)
+        verdicts = ts_filter.evaluate([0.1, 0.3, 0.7], [0.2, 0.5])
+        np.testing.assert_array_equal(verdicts, [[True, False, False],
+                                                 [True, True, False]])
+        np.testing.assert_array_equal(ts_filter.evaluate([0.1, 0.7]),
+                                      [True, False])
+        with self.assertRaises(ValueError):
+            Filter(None, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import tellurium as te
 
-from viper_dynamic.time_series.collection_time_series import TimeSeriesCollection
+from SBviper.viper_dynamic.time_series.collection_time_series import \
+    TimeSeriesCollection
 
 ant_str = """
 model test               # name the model